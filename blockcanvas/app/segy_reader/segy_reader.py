@@ -2,14 +2,18 @@
 """
 
 # Standard imports
-from numpy import array
-import logging, os, struct, string
+from collections import OrderedDict
+from numpy import (arange, asarray, atleast_1d, broadcast_arrays, concatenate,
+                   dtype, empty, float32, float64, int64, lexsort, memmap,
+                   ones, sort, uint64)
+from tempfile import TemporaryFile
+import logging, os, string
 
 # Enthought lib imports
 from codetools.contexts.data_context import DataContext
 from pyface.api import ProgressDialog
 from traits.api import HasTraits, File, Int, Enum, Float, Property, \
-     Any, Instance, on_trait_change
+     Any, Bool, Instance, on_trait_change
 from scimath.units.quantity_traits import QuantityTrait
 from scimath.units.time import msec
 
@@ -64,20 +68,36 @@ class SegyReader(HasTraits):
     samples             = Int(901)
     active_traceheader  = Instance(TraceHeaderView, ())
     file_handle         = Any
-    x_format            = Property(depends_on = ['x_location_bytes',
-                                                 'byte_order'])
-    y_format            = Property(depends_on = ['y_location_bytes',
-                                                 'byte_order'])
-    inline_format       = Property(depends_on = ['inline_bytes',
-                                                 'byte_order'])
-    crossline_format    = Property(depends_on = ['crossline_bytes',
-                                                 'byte_order'])
-    scale_format        = Property(depends_on = ['xy_scale_bytes',
-                                                 'byte_order'])
     byte_order_char     = Property(depends_on = ['byte_order'])
-    data_format         = Property(depends_on = ['data_type', 'byte_order',
+    trace_dtype         = Property(depends_on = ['inline_bytes',
+                                                 'crossline_bytes',
+                                                 'x_location_bytes',
+                                                 'y_location_bytes',
+                                                 'xy_scale_bytes',
+                                                 'data_type', 'byte_order',
                                                  'samples'])
 
+    # Number of traces converted at a time by read_data, between updates of
+    # the progress dialog.
+    chunk_size          = Int(4096)
+
+    # Whether read_data leaves the traces on disk, binding them to an array
+    # mapped on the file, so that surveys larger than the memory can be read.
+    lazy                = Bool(False)
+
+    # Number of trace headers kept in memory by trace_header.
+    header_cache_size   = Int(256)
+
+    # Most recently used trace headers, by trace number.
+    _trace_headers      = Instance(OrderedDict, ())
+
+    # Lazily built index of the traces by inline and crossline values:
+    # the trace positions sorted by (inline, crossline) with their keys,
+    # and sorted by crossline with their crossline values.  The key of a
+    # trace is the unsigned 64 bits (inline << 32) | crossline, as both
+    # values are read as unsigned 32 bits integers.
+    _line_index         = Any
+
     #---------------------------------------------------------------------------
     # HasTraits interface
     #---------------------------------------------------------------------------
@@ -92,46 +112,33 @@ class SegyReader(HasTraits):
         else:
             return '<'
 
-    def _get_crossline_format(self):
-        """ Property getter for crossline_format
-        """
-        return self.byte_order_char + 'x'*(self.crossline_bytes-1) + 'I' + \
-               'x'*(237-self.crossline_bytes)
-
-    def _get_data_format(self):
-        """ Property getter for data_format
-        """
-        if self.data_type == 'IBM':
-            return self.byte_order_char + 'i'*(self.samples/4)
-        else:
-            return self.byte_order_char + 'f'*(self.samples/4)
-
-    def _get_inline_format(self):
-        """ Property getter for inline_format
-        """
-        return self.byte_order_char + 'x'*(self.inline_bytes-1) + 'I' + \
-               'x'*(237-self.inline_bytes)
+    def _get_trace_dtype(self):
+        """ Property getter for trace_dtype
 
-    def _get_x_format(self):
-        """ Property getter for x_format
-        """
-        return self.byte_order_char + 'x'*(self.x_location_bytes-1) + 'I' + \
-               'x'*(237-self.x_location_bytes)
-
-    def _get_scale_format(self):
-        """ Property getter for scale_format
+            A trace is laid out as a record of its header followed by its
+            samples, with the header values read by read_data as fields at
+            their byte offsets.
         """
+        order = self.byte_order_char
+        names = ['x', 'y', 'inline', 'crossline']
+        offsets = [self.x_location_bytes-1, self.y_location_bytes-1,
+                   self.inline_bytes-1, self.crossline_bytes-1]
         if self.xy_scale_bytes > 0:
-            return self.byte_order_char + 'x'*(self.xy_scale_bytes-1) + 'I' + \
-                   'x'*(237-self.xy_scale_bytes)
+            names.append('scale_factor')
+            offsets.append(self.xy_scale_bytes-1)
+        formats = [order + 'u4']*len(names)
+
+        if self.data_type == 'IBM':
+            sample_format = order + 'u4'
         else:
-            return ''
+            sample_format = order + 'f4'
+        names.append('trace')
+        offsets.append(Segy.TRACE_HEADER_LEN)
+        formats.append((sample_format, (self.samples/4,)))
 
-    def _get_y_format(self):
-        """ Property getter for y_format
-        """
-        return self.byte_order_char + 'x'*(self.y_location_bytes-1) + 'I' + \
-               'x'*(237-self.y_location_bytes)
+        return dtype({'names': names, 'formats': formats,
+                      'offsets': offsets,
+                      'itemsize': Segy.TRACE_HEADER_LEN + self.samples})
 
     def _filename_changed(self):
         """ Change binary header and update inline_byte_data,
@@ -178,17 +185,56 @@ class SegyReader(HasTraits):
         """ Change the trace header being viewed
         """
 
-        offset = Segy.CARD_IMAGE_HEADER_LEN + Segy.BINARY_HEADER_LEN + \
-                 (self.active_traceheader.trace_header_number-1)* \
-                 (Segy.TRACE_HEADER_LEN+self.samples)
-        self.file_handle.seek(offset)
-        header_data = self.file_handle.read(Segy.TRACE_HEADER_LEN)
-        byte_format = getattr(Segy, self.byte_order.replace(' ', '_').upper())
+        header = self.trace_header(self.active_traceheader.trace_header_number)
         del self.active_traceheader.model
-        self.active_traceheader.model = TraceHeader(header_data, byte_format)
+        self.active_traceheader.model = header
+
+    @on_trait_change('filename, samples, byte_order')
+    def _clear_trace_headers(self):
+        """ Forget the cached trace headers, which are read again from the file
+        """
+        self._trace_headers.clear()
+        self._line_index = None
+
+    @on_trait_change('inline_bytes, crossline_bytes')
+    def _clear_line_index(self):
+        """ Forget the index of the traces by inline and crossline
+        """
+        self._line_index = None
+
+    def _build_line_index(self):
+        """ Index the traces by inline and crossline values, reading only
+            these two columns of the headers.
+        """
+
+        traces = self._map_traces()
+        if traces is None or len(traces) == 0:
+            inlines = crosslines = empty(0, int64)
+        else:
+            inlines = traces['inline'].astype(int64)
+            crosslines = traces['crossline'].astype(int64)
+        del traces
+
+        order = lexsort((crosslines, inlines))
+        keys = _line_keys(inlines[order], crosslines[order])
+        crossline_order = crosslines.argsort(kind='mergesort')
+        self._line_index = (order, keys, crossline_order,
+                            crosslines[crossline_order])
+
+    def _count_traces(self):
+        """ Return the number of whole traces in the file and the number of
+            bytes left after them.
+        """
+
+        offset = Segy.CARD_IMAGE_HEADER_LEN + Segy.BINARY_HEADER_LEN
+        size = os.path.getsize(self.filename) - offset
+        if size < 0:
+            return 0, 0
+        return divmod(size, Segy.TRACE_HEADER_LEN + self.samples)
 
     def _inspect_traces(self):
-        """ Inspect all the traces, save the first trace-header
+        """ Count the traces from the size of the file, save the first
+            trace-header
         """
 
         # Get trace header data of 240 bytes.
@@ -197,15 +243,16 @@ class SegyReader(HasTraits):
         byte_format = getattr(Segy, self.byte_order.replace(' ', '_').upper())
         traceheader = TraceHeader(header_data, byte_format)
 
-        # Find trace counts
-        trace_count = 0
-        while header_data != '':
-            self.file_handle.seek(self.samples, 1)
-            trace_count += 1
-            header_data = self.file_handle.read(Segy.TRACE_HEADER_LEN)
+        # Traces all have the same size, so there is no need to go through
+        # the file to count them.
+        trace_count, remainder = self._count_traces()
+        if remainder != 0:
+            logger.warning('SegyReader: %d bytes after the last trace of %s',
+                           remainder, self.filename)
 
         # Set all the UI fields.
         self.trace_count = trace_count
+        self._trace_headers[1] = traceheader
         self.active_traceheader.model = traceheader
         self.active_traceheader.total_headers = self.trace_count
 
@@ -215,61 +262,178 @@ class SegyReader(HasTraits):
 
         return
 
-    def _read_trace(self, header_data, check_length):
-        """ Read a trace successfully from its header data and return a trace.
-
-            Returns:
-            --------
-            x: float
-              x location of trace
-            y: float
-              y location of trace
-            inline: float
-              inline location of trace
-            crossline: float
-              crossline location of trace
-            scale_factor: float
-              factor by which x and y are scaled
-            trace: array
-              samples constituting the trace
-
+    def _map_traces(self):
+        """ Return the traces of the file mapped as records of trace_dtype,
+            or None if the file does not hold whole traces.
         """
 
-        if len(header_data) != check_length:
+        trace_count, remainder = self._count_traces()
+        if remainder != 0:
             logger.error('SegyReader: Mismatch in trace header data length')
             return None
 
-        x_val = float(struct.unpack(self.x_format, header_data)[0])
-        y_val = float(struct.unpack(self.y_format, header_data)[0])
-        inline_val = float(struct.unpack(self.inline_format, header_data)[0])
-        crossline_val = float(struct.unpack(self.crossline_format,
-                                            header_data)[0])
-
-        scale_factor = 1.0
-        if self.scale_format != '':
-            scale_factor = float(struct.unpack(self.scale_format,
-                                               header_data)[0])
-            if scale_factor != 0:
-                if scale_factor < 0 :
-                    scale_factor = -1.0/scale_factor
-                x_val *= scale_factor
-                y_val *= scale_factor
-            else:
-                scale_factor = 1.0
+        if trace_count == 0:
+            return empty(0, self.trace_dtype)
 
-        # Read the trace data.
-        raw_data = self.file_handle.read(self.samples)
+        return memmap(self.filename, dtype=self.trace_dtype, mode='r',
+                      offset=Segy.CARD_IMAGE_HEADER_LEN +
+                             Segy.BINARY_HEADER_LEN,
+                      shape=(trace_count,))
 
-        if self.data_type == 'IBM':
-            trace = ibm2ieee(array(struct.unpack(self.data_format, raw_data)))
+    def _read_headers(self, chunk):
+        """ Return the x, y, inline, crossline and scale_factor values of a
+            chunk of traces of the memory-mapped file, converting all the
+            traces at once.
+        """
+
+        x_val = chunk['x'].astype(float64)
+        y_val = chunk['y'].astype(float64)
+
+        if 'scale_factor' in chunk.dtype.names:
+            scale_factor = chunk['scale_factor'].astype(float64)
+            negative = scale_factor < 0
+            scale_factor[negative] = -1.0/scale_factor[negative]
+            scale_factor[scale_factor == 0] = 1.0
+            x_val *= scale_factor
+            y_val *= scale_factor
         else:
-            trace = array(struct.unpack(self.data_format, raw_data))
+            scale_factor = ones(len(chunk))
 
-        return x_val, y_val, inline_val, crossline_val, scale_factor, trace
+        return {'x': x_val.astype(float32),
+                'y': y_val.astype(float32),
+                'inline': chunk['inline'].astype(float32),
+                'crossline': chunk['crossline'].astype(float32),
+                'scale_factor': scale_factor.astype(float32)}
 
+    def _read_samples(self, chunk):
+        """ Return the samples of a chunk of traces of the memory-mapped file
+            as an array of float32.
+        """
+
+        if self.data_type == 'IBM':
+            return ibm2ieee(chunk['trace'])
+        else:
+            return chunk['trace'].astype(float32)
 
     ### public methods ---------------------------------------------------------
 
+    def find_traces(self, inline=None, crossline=None):
+        """ Return the numbers of the traces at some inline and/or crossline
+            values.
+
+            The traces are looked up in an index of the inline and crossline
+            values of all the traces, built on the first call.
+
+            Parameters:
+            -----------
+            inline: int or sequence of ints
+              inline values of the traces, or None for any inline
+            crossline: int or sequence of ints
+              crossline values of the traces, or None for any crossline.
+              When both inline and crossline are sequences, they are paired.
+
+            Returns:
+            --------
+            trace_numbers: array
+              sorted numbers of the traces, starting at 1
+        """
+
+        if self._line_index is None:
+            self._build_line_index()
+        order, keys, crossline_order, crosslines = self._line_index
+
+        if inline is None and crossline is None:
+            return arange(1, len(order)+1)
+
+        if inline is None:
+            crossline = atleast_1d(asarray(crossline, int64))
+            low = crosslines.searchsorted(crossline, 'left')
+            high = crosslines.searchsorted(crossline, 'right')
+            positions = crossline_order
+        else:
+            inline = atleast_1d(asarray(inline, int64))
+            if crossline is None:
+                inline = inline[_in_key_range(inline)]
+                low = keys.searchsorted(_line_keys(inline, 0), 'left')
+                high = keys.searchsorted(_line_keys(inline, 0xFFFFFFFF),
+                                         'right')
+            else:
+                crossline = atleast_1d(asarray(crossline, int64))
+                inline, crossline = broadcast_arrays(inline, crossline)
+                valid = _in_key_range(inline) & _in_key_range(crossline)
+                pairs = _line_keys(inline[valid], crossline[valid])
+                low = keys.searchsorted(pairs, 'left')
+                high = keys.searchsorted(pairs, 'right')
+            positions = order
+
+        found = [positions[l:h] for l, h in zip(low, high) if h > l]
+        if not found:
+            return empty(0, int64)
+        return sort(concatenate(found)) + 1
+
+    def trace_header(self, trace_number):
+        """ Return the TraceHeader of a trace, numbered from 1.
+
+            The most recently used headers are cached, and the others read
+            directly at the offset of their trace.
+        """
+
+        header = self._trace_headers.pop(trace_number, None)
+        if header is None:
+            if self.file_handle.closed:
+                self.file_handle = file(self.filename, 'rb')
+            offset = Segy.CARD_IMAGE_HEADER_LEN + Segy.BINARY_HEADER_LEN + \
+                     (trace_number-1)*(Segy.TRACE_HEADER_LEN+self.samples)
+            self.file_handle.seek(offset)
+            header_data = self.file_handle.read(Segy.TRACE_HEADER_LEN)
+            byte_format = getattr(Segy,
+                                  self.byte_order.replace(' ', '_').upper())
+            header = TraceHeader(header_data, byte_format)
+
+            while len(self._trace_headers) >= self.header_cache_size > 0:
+                self._trace_headers.popitem(last=False)
+
+        # Re-insert to mark the header as the most recently used.
+        if self.header_cache_size > 0:
+            self._trace_headers[trace_number] = header
+        return header
+
+    def trace_headers(self, trace_numbers):
+        """ Return the TraceHeaders of several traces, numbered from 1.
+        """
+        return [self.trace_header(number) for number in trace_numbers]
+
+    def iter_chunks(self, chunk_size=None):
+        """ Read the traces of the file a chunk at a time, so that files
+            larger than the memory can be processed.
+
+            Parameters:
+            -----------
+            chunk_size: int
+              number of traces in a chunk, chunk_size trait by default
+
+            Yields:
+            -------
+            start, stop: int
+              range of the traces in the chunk
+            data: dict
+              arrays of the x, y, inline, crossline, scale_factor and trace
+              values of the chunk
+        """
+
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+
+        traces = self._map_traces()
+        if traces is None:
+            return
+
+        for start in xrange(0, len(traces), chunk_size):
+            chunk = traces[start:start+chunk_size]
+            data = self._read_headers(chunk)
+            data['trace'] = self._read_samples(chunk)
+            yield start, start+len(chunk), data
+
     def read_data(self):
         """ Obtain x_locations, y_locations, data_locations, traces in a context
 
@@ -287,85 +451,87 @@ class SegyReader(HasTraits):
         if self.file_handle.closed:
             self.file_handle = file(self.filename, 'rb')
 
+        # Map the traces on the file, after the card_image_header and binary
+        # header.
+        traces = self._map_traces()
+        if traces is None:
+            self.file_handle.close()
+            return None
+        trace_count = len(traces)
+
         # Setup a progress dialog
         progress = ProgressDialog(title='Reading Segy Files',
                                   message='Reading Segy Files',
                                   max=100, show_time=True, can_cancel=True)
         progress.open()
-
-        # Skip the card_image_header and binary header
-        self.file_handle.seek(Segy.CARD_IMAGE_HEADER_LEN +
-                              Segy.BINARY_HEADER_LEN)
         progress.update(1)
 
-        # Check if data lengths are correct.
-        x_data_len = struct.calcsize(self.x_format)
-        y_data_len = struct.calcsize(self.y_format)
-        inline_data_len = struct.calcsize(self.inline_format)
-        crossline_data_len = struct.calcsize(self.crossline_format)
-
-        if not (x_data_len == y_data_len and
-                y_data_len == inline_data_len and
-                inline_data_len == crossline_data_len):
-            logger.error('SegyReader: Mismatch in format lengths')
-            return None
-
-        if self.scale_format != '':
-            scale_data_len = struct.calcsize(self.scale_format)
-            if scale_data_len != x_data_len:
-                logger.error('SegyReader: Mismatch in format lengths')
+        data = dict((name, empty(trace_count, float32))
+                    for name in ('x', 'y', 'inline', 'crossline',
+                                 'scale_factor'))
+
+        # In lazy mode, the samples stay on disk: IEEE samples are bound
+        # to the file itself, and IBM ones converted to a temporary file.
+        bind_file = self.lazy and self.data_type == 'IEEE'
+        if bind_file:
+            data['trace'] = traces['trace']
+        elif self.lazy and trace_count > 0:
+            data['trace'] = memmap(TemporaryFile(), dtype=float32, mode='w+',
+                                   shape=(trace_count, self.samples/4))
+        else:
+            data['trace'] = empty((trace_count, self.samples/4), float32)
+
+        for start in xrange(0, trace_count, self.chunk_size):
+            stop = min(start + self.chunk_size, trace_count)
+            chunk = traces[start:stop]
+            for key, values in self._read_headers(chunk).iteritems():
+                data[key][start:stop] = values
+            if not bind_file:
+                data['trace'][start:stop] = self._read_samples(chunk)
+
+            progress_pc = 1 + int(98.0*float(stop)/float(trace_count))
+            cont_val, skip_val = progress.update(progress_pc)
+
+            # If the user has cancelled the action then stop the import
+            # immediately
+            if skip_val or not cont_val:
+                del traces, data
+                self.file_handle.close()
                 return None
 
-        # Get trace header data of 240 bytes.
-        header_data = self.file_handle.read(Segy.TRACE_HEADER_LEN)
-        traces, read_error = [], False
-        previous_update = 1
-        while header_data != '' and not read_error:
-            trace = self._read_trace(header_data, x_data_len)
-            if trace is None:
-                logger.error('SegyReader: Error in reading a trace')
-                read_error = True
-            else:
-                traces.append(trace)
-                header_data = self.file_handle.read(Segy.TRACE_HEADER_LEN)
-
-            progress_pc = 1 + int(98.0*float(len(traces))/
-                                  float(self.trace_count))
-            if progress_pc - previous_update > 1:
-                cont_val, skip_val = progress.update(progress_pc)
-                previous_update = progress_pc
-
-                # If the user has cancelled the action then stop the import
-                # immediately
-                if skip_val or not cont_val:
-                    del traces
-                    self.file_handle.close()
-                    return None
-
+        del traces
         self.file_handle.close()
         progress.update(100)
 
-        if read_error:
-            del traces
-            return None
-        else:
-            arr_descriptor = {'names': ('x','y','inline','crossline',
-                                        'scale_factor', 'trace'),
-                              'formats': ('f4', 'f4', 'f4', 'f4', 'f4',
-                                          str(self.samples_per_trace)+'f4')
-                              }
-            traces = array(traces, dtype=arr_descriptor)
-            filesplit = os.path.split(self.filename)
-            name = str(os.path.splitext(filesplit[1])[0]).translate(trans_table)
-            return DataContext(
-                name=name,
-                _bindings={'traces':traces['trace'],
-                           'x_locations':traces['x'],
-                           'y_locations':traces['y'],
-                           'inline_values':traces['inline'],
-                           'crossline_values':traces['crossline'],
-                           'scale_factors':traces['scale_factor']})
-        return
+        filesplit = os.path.split(self.filename)
+        name = str(os.path.splitext(filesplit[1])[0]).translate(trans_table)
+        return DataContext(
+            name=name,
+            _bindings={'traces':data['trace'],
+                       'x_locations':data['x'],
+                       'y_locations':data['y'],
+                       'inline_values':data['inline'],
+                       'crossline_values':data['crossline'],
+                       'scale_factors':data['scale_factor']})
+
+
+#------------------------------------------------------------------------------
+#  Helper functions
+#------------------------------------------------------------------------------
+
+def _in_key_range(values):
+    """ Return whether inline or crossline values are in the unsigned 32 bits
+        range of the values read from the trace headers.
+    """
+    return (values >= 0) & (values <= 0xFFFFFFFF)
+
+def _line_keys(inlines, crosslines):
+    """ Return the index keys of (inline, crossline) pairs.  Both values
+        must be in the unsigned 32 bits range.
+    """
+    inlines = asarray(inlines).astype(uint64)
+    crosslines = asarray(crosslines).astype(uint64)
+    return (inlines << uint64(32)) | crosslines
 
 
 # Local test
@@ -68,6 +68,7 @@ segy_reader_view = View(
                  #        the header data.
                  #Item('view_data_bytes', enabled_when = 'False'),
                  Item('byte_order', style = 'readonly'),
+                 Item('lazy', label = 'Keep traces on disk'),
                  label = 'Data format',
                  show_border = True,
               ),
@@ -1,17 +1,30 @@
 """ Helper functions for segy reader
 """
 
+# Standard imports
+from numpy import asarray, float32, float64, ldexp, uint32, where
+
 
 def ibm2ieee(ibm):
-    """ Converts an IBM floating number to IEEE format
+    """ Converts IBM floating numbers to IEEE format
+
+        ibm is an integer or an array of integers holding the 32 bits of IBM
+        floats.  The sign, exponent and mantissa are extracted with bit
+        operations on the whole array at once, and an array of float32 is
+        returned.
     """
 
-    sign, exponent = ibm >> 31 & 0x01, ibm >> 24 & 0x7f
+    ibm = asarray(ibm).astype(uint32)
+
+    sign = (ibm >> 31).astype(bool)
+    exponent = ((ibm >> 24) & 0x7f).astype(int)
+    mantissa = (ibm & 0x00ffffff).astype(float64)
 
-    mantissa = ibm & 0x00ffffff
-    mantissa = (mantissa*1.0)/pow(2, 24)
+    # mantissa/2**24 * 16**(exponent-64) == mantissa * 2**(4*exponent-280)
+    result = ldexp(mantissa, 4*exponent - 280)
+    result = where(sign, -result, result)
 
-    return (1-2*sign)*mantissa*pow(16.0, exponent-64)
+    return result.astype(float32)
 
 
 ### EOF -----------------------------------------------------------------------
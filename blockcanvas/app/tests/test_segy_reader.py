@@ -0,0 +1,238 @@
+""" Tests for the segy reader, on a small segy file written by the tests.
+"""
+
+# Standard library imports
+import os, shutil, struct, tempfile, unittest
+
+# Numeric library imports
+from numpy import arange, array, concatenate, float32, memmap
+from numpy.testing import assert_array_equal
+
+# Local imports
+from blockcanvas.app.segy_reader import segy_reader
+from blockcanvas.app.segy_reader.segy_reader import SegyReader
+
+
+# The (inline, crossline) values of the traces of the test file.  The last
+# inline does not fit in a signed 32 bits integer.
+LINES = [(10, 20), (11, 20), (10, 21), (12, 21), (11, 21), (10, 20),
+         (2**31 + 1, 20)]
+
+# Number of samples of the traces.
+SAMPLES = 4
+
+
+def write_segy(filename, data_type='IEEE', scale=None):
+    """ Write a big endian segy file of the LINES traces.  The samples of the
+        trace i are 10*i + arange(SAMPLES), or 1.0 and -118.625 in IBM format.
+        The x and y values are multiplied by the scale factor, written at
+        byte 181, if given.
+    """
+    f = open(filename, 'wb')
+    f.write(' ' * 3200)
+
+    binary_header = bytearray(400)
+    struct.pack_into('>hh', binary_header, 16, 4000, 4000)
+    struct.pack_into('>hh', binary_header, 20, SAMPLES, SAMPLES)
+    struct.pack_into('>h', binary_header, 24, data_type == 'IBM' and 1 or 5)
+    f.write(str(binary_header))
+
+    for i, (inline, crossline) in enumerate(LINES):
+        header = bytearray(240)
+        struct.pack_into('>I', header, 0, i + 1)
+        struct.pack_into('>II', header, 16, inline, crossline)
+        struct.pack_into('>II', header, 72, 1000 + i, 2000 + i)
+        if scale is not None:
+            struct.pack_into('>I', header, 180, scale)
+        struct.pack_into('>HH', header, 114, SAMPLES, 4000)
+        f.write(str(header))
+
+        if data_type == 'IBM':
+            f.write(struct.pack('>%dI' % SAMPLES,
+                                *([0x41100000, 0xC276A000] * (SAMPLES/2))))
+        else:
+            f.write(struct.pack('>%df' % SAMPLES,
+                                *(10*i + arange(SAMPLES))))
+    f.close()
+
+
+class QuietProgressDialog(object):
+    """ Stands for the progress dialog of read_data, which needs a GUI.
+    """
+
+    def __init__(self, **traits):
+        pass
+
+    def open(self):
+        pass
+
+    def update(self, value):
+        return True, False
+
+
+class SegyReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'survey.segy')
+        write_segy(self.filename)
+
+        self.progress_dialog = segy_reader.ProgressDialog
+        segy_reader.ProgressDialog = QuietProgressDialog
+
+    def tearDown(self):
+        segy_reader.ProgressDialog = self.progress_dialog
+        shutil.rmtree(self.dir)
+
+    def reader(self, **traits):
+        traits.setdefault('data_type', 'IEEE')
+        traits.setdefault('xy_scale_bytes', 0)
+        reader = SegyReader(**traits)
+        reader.filename = self.filename
+        return reader
+
+    def test_binary_header(self):
+        reader = self.reader()
+        self.assertEqual(reader.samples, 4*SAMPLES)
+        self.assertEqual(reader.trace_count, len(LINES))
+        self.assertEqual(reader.samples_per_trace, SAMPLES)
+
+    def test_trace_dtype(self):
+        reader = self.reader()
+        dtype = reader.trace_dtype
+        self.assertEqual(dtype.names, ('x', 'y', 'inline', 'crossline',
+                                       'trace'))
+        self.assertEqual(dtype.itemsize, 240 + 4*SAMPLES)
+        self.assertEqual(dtype.fields['inline'][1], 16)
+        self.assertEqual(dtype.fields['crossline'][1], 20)
+        self.assertEqual(dtype.fields['x'][1], 72)
+        self.assertEqual(dtype.fields['y'][1], 76)
+        self.assertEqual(dtype.fields['trace'][1], 240)
+        self.assertEqual(dtype.fields['trace'][0].shape, (SAMPLES,))
+        self.assertEqual(dtype.fields['trace'][0].base, '>f4')
+
+        reader.data_type = 'IBM'
+        reader.xy_scale_bytes = 181
+        dtype = reader.trace_dtype
+        self.assertEqual(dtype.fields['scale_factor'][1], 180)
+        self.assertEqual(dtype.fields['trace'][0].base, '>u4')
+
+    def test_read_data(self):
+        context = self.reader().read_data()
+        assert_array_equal(context['inline_values'],
+                           array([l[0] for l in LINES], float32))
+        assert_array_equal(context['crossline_values'],
+                           [l[1] for l in LINES])
+        assert_array_equal(context['x_locations'], 1000 + arange(len(LINES)))
+        assert_array_equal(context['y_locations'], 2000 + arange(len(LINES)))
+        assert_array_equal(context['scale_factors'], 1.0)
+        assert_array_equal(context['traces'],
+                           10*arange(len(LINES))[:, None] + arange(SAMPLES))
+
+    def test_scale_factor(self):
+        write_segy(self.filename, scale=100)
+        context = self.reader(xy_scale_bytes=181).read_data()
+        assert_array_equal(context['scale_factors'], 100.0)
+        assert_array_equal(context['x_locations'],
+                           100.0*(1000 + arange(len(LINES))))
+
+    def test_ibm(self):
+        write_segy(self.filename, data_type='IBM')
+        reader = self.reader()
+        reader.data_type = 'IBM'
+        context = reader.read_data()
+        assert_array_equal(context['traces'][:, 0], 1.0)
+        assert_array_equal(context['traces'][:, 1], -118.625)
+
+    def test_lazy(self):
+        eager = self.reader().read_data()
+        context = self.reader(lazy=True).read_data()
+        self.assertTrue(isinstance(context['traces'], memmap))
+        assert_array_equal(context['traces'], eager['traces'])
+        assert_array_equal(context['x_locations'], eager['x_locations'])
+
+    def test_lazy_ibm(self):
+        write_segy(self.filename, data_type='IBM')
+        reader = self.reader(lazy=True)
+        reader.data_type = 'IBM'
+        context = reader.read_data()
+        self.assertTrue(isinstance(context['traces'], memmap))
+        assert_array_equal(context['traces'][:, 0], 1.0)
+        assert_array_equal(context['traces'][:, 1], -118.625)
+
+    def test_iter_chunks(self):
+        reader = self.reader()
+        context = reader.read_data()
+
+        chunks = list(reader.iter_chunks(chunk_size=3))
+        self.assertEqual([(start, stop) for start, stop, data in chunks],
+                         [(0, 3), (3, 6), (6, 7)])
+        for name, key in [('trace', 'traces'), ('x', 'x_locations'),
+                          ('inline', 'inline_values')]:
+            assert_array_equal(concatenate([data[name]
+                                            for start, stop, data in chunks]),
+                               context[key])
+
+    def test_find_traces(self):
+        reader = self.reader()
+        assert_array_equal(reader.find_traces(), arange(1, len(LINES) + 1))
+        assert_array_equal(reader.find_traces(inline=10), [1, 3, 6])
+        assert_array_equal(reader.find_traces(crossline=21), [3, 4, 5])
+        assert_array_equal(reader.find_traces(inline=10, crossline=20),
+                           [1, 6])
+        assert_array_equal(reader.find_traces(inline=[11, 12]), [2, 4, 5])
+        assert_array_equal(reader.find_traces(inline=[10, 11],
+                                              crossline=[21, 20]), [2, 3])
+        assert_array_equal(reader.find_traces(inline=13), [])
+        assert_array_equal(reader.find_traces(inline=-1), [])
+
+    def test_find_large_inline(self):
+        reader = self.reader()
+        assert_array_equal(reader.find_traces(inline=2**31 + 1), [7])
+        assert_array_equal(reader.find_traces(inline=2**31 + 1,
+                                              crossline=20), [7])
+        assert_array_equal(reader.find_traces(inline=2**31 + 1,
+                                              crossline=21), [])
+        assert_array_equal(reader.find_traces(inline=2**32 + 10), [])
+
+    def test_find_traces_after_change(self):
+        reader = self.reader()
+        reader.find_traces(inline=10)
+        reader.inline_bytes = 21
+        reader.crossline_bytes = 17
+        assert_array_equal(reader.find_traces(inline=21), [3, 4, 5])
+
+    def test_trace_header(self):
+        reader = self.reader()
+        header = reader.trace_header(3)
+        self.assertEqual(header.samplesInTrace, SAMPLES)
+        self.assertTrue(reader.trace_header(3) is header)
+        self.assertEqual([h.samplesInTrace
+                          for h in reader.trace_headers([1, 2, 7])],
+                         [SAMPLES]*3)
+
+    def test_trace_header_cache(self):
+        reader = self.reader(header_cache_size=2)
+        first = reader.trace_header(1)
+        second = reader.trace_header(2)
+        reader.trace_header(3)
+        self.assertEqual(reader._trace_headers.keys(), [2, 3])
+
+        # A cached header is reused, and becomes the most recently used.
+        self.assertTrue(reader.trace_header(2) is second)
+        self.assertEqual(reader._trace_headers.keys(), [3, 2])
+
+        # An evicted header is read again.
+        self.assertFalse(reader.trace_header(1) is first)
+        self.assertEqual(reader._trace_headers.keys(), [2, 1])
+
+    def test_trace_header_cache_cleared(self):
+        reader = self.reader()
+        header = reader.trace_header(2)
+        reader.byte_order = 'Little Endian'
+        reader.byte_order = 'Big Endian'
+        self.assertFalse(reader.trace_header(2) is header)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+""" Tests for the helper functions of the segy reader.
+"""
+
+# Standard library imports
+import unittest
+
+# Numeric library imports
+from numpy import array, float32, uint32
+from numpy.testing import assert_array_equal
+
+# Local imports
+from blockcanvas.app.segy_reader.utils import ibm2ieee
+
+
+class Ibm2IeeeTestCase(unittest.TestCase):
+
+    def test_values(self):
+        ibm = array([0xC276A000, 0x41100000, 0x00000000, 0x3F800000],
+                    dtype=uint32)
+        result = ibm2ieee(ibm)
+        self.assertEqual(result.dtype, float32)
+        assert_array_equal(result, [-118.625, 1.0, 0.0, 0.03125])
+
+    def test_signed_integers(self):
+        # Traces read as signed integers convert the same.
+        ibm = array([0xC276A000, 0x41100000], dtype=uint32)
+        assert_array_equal(ibm2ieee(ibm.view('i4')), ibm2ieee(ibm))
+
+    def test_shape(self):
+        ibm = array([[0x41100000]*3]*2, dtype='>u4')
+        result = ibm2ieee(ibm)
+        self.assertEqual(result.shape, (2, 3))
+        assert_array_equal(result, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
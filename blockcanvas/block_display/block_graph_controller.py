@@ -56,8 +56,12 @@ class BlockGraphController(HasTraits):
     # FIXME:  Will also have to handle Groups and Expressions
     _nodes = Dict(Any, Component)
 
-    # The lines between boxes
-    _edges = List(Component)
+    # The graph nodes with a box on the canvas, indexed by uuid
+    _nodes_by_uuid = Dict
+
+    # The lines between boxes, indexed by the (source, dest) graph nodes they
+    # connect
+    _edges = Dict
 
     # Do we need to rebuild the graph?
     _rebuild_graph = Bool(True)
@@ -197,55 +201,95 @@ class BlockGraphController(HasTraits):
 
     def update_nodes(self, added=[], removed=[], modified=[]):
         """ Update the nodes in the canvas based on changes in the graph.
-        """
 
+            The nodes are given by uuid. Only the boxes of the added, removed
+            or modified nodes, and the lines between boxes whose connections
+            changed or which touch these nodes, are created or removed.
+        """
         graph = self.execution_model.dep_graph
+        if self._rebuild_graph:
+            # Destroy all the old nodes and lines
+            self.canvas.remove(*self._nodes.values())
+            self._nodes = {}
+            self._nodes_by_uuid = {}
+            self._remove_edges(self._edges.keys())
+            added = graph.keys()
+            removed = modified = []
+
+        added = _uuids(added)
+        removed = _uuids(removed)
+        modified = _uuids(modified)
+
+        # The graph nodes by uuid, only computed if one is needed
+        graph_nodes = {}
+        def graph_node(uuid, node=None):
+            if node is not None and node in graph:
+                return node
+            if not graph_nodes:
+                graph_nodes.update((n.uuid, n) for n in graph)
+            return graph_nodes.get(uuid)
+
+        touched = set()
+
         # Destroy old nodes
-        for node, box in self._nodes.items():
-            uuid = node.uuid
-            if (uuid in removed) or self._rebuild_graph:
+        for uuid in removed:
+            node = self._nodes_by_uuid.pop(uuid, None)
+            if node is not None:
                 # Remove and delete box
-                self.canvas.remove(box)
-                del self._nodes[node]
-            elif uuid in modified:
-                # Keep the box, change the graph_node
-                for n in graph:
-                    if uuid == n.uuid:
-                        manually_update = (box.graph_node is n)
-                        box.graph_node = n
-                        if manually_update:
-                            # The contents may have changed, but the object
-                            # identity didn't.
-                            box._graph_node_changed()
-                        box.request_redraw()
-                        break
-
-        for node in graph:
-            uuid = node.uuid
-            if uuid in added or self._rebuild_graph:
-                box = self.factory.make_component(node)
-                self._nodes[node] = box
-                self.position_in_viewport(box)
-                self.canvas.add(self._nodes[node])
-
-        # Replace old edges with new edges
-        # fixme: This could be done "intelligently", but would the speed
-        #        benefit (if there even was one) be worth it?
-        self.canvas.remove(*self._edges)
-        self._edges = []
-        for dest, sources in graph.items():
-            for source in sources:
-                if self._nodes.has_key(source) and self._nodes.has_key(dest):
-                    matchs =self._match_variables(dest,source) 
-                    for (end_var,start_var) in matchs:
-                        line = EnableLine(start_node=self._nodes[source],start_var=start_var,
-                                          end_node=self._nodes[dest],end_var=end_var)
-                        self._edges.append(line)
-        self.canvas.add(*self._edges)
+                self.canvas.remove(self._nodes.pop(node))
+                touched.add(node)
+
+        # Keep the box of modified nodes, change the graph_node
+        for uuid in modified:
+            node = self._nodes_by_uuid.get(uuid)
+            n = graph_node(uuid, node)
+            if node is None or n is None:
+                continue
+            box = self._nodes.pop(node)
+            manually_update = (box.graph_node is n)
+            box.graph_node = n
+            if manually_update:
+                # The contents may have changed, but the object
+                # identity didn't.
+                box._graph_node_changed()
+            box.request_redraw()
+            self._nodes[n] = box
+            self._nodes_by_uuid[uuid] = n
+            touched.update((node, n))
+
+        # Create new nodes
+        new_boxes = []
+        for uuid in added:
+            node = graph_node(uuid)
+            if node is None or node in self._nodes:
+                continue
+            box = self.factory.make_component(node)
+            self._nodes[node] = box
+            self._nodes_by_uuid[uuid] = node
+            self.position_in_viewport(box)
+            new_boxes.append(box)
+            touched.add(node)
+        if new_boxes:
+            self.canvas.add(*new_boxes)
+
+        # Replace the lines whose connection no longer exists or which touch a
+        # changed node, and add the lines of the new connections
+        wanted = set()
+        nodes = self._nodes
+        for dest, sources in graph.iteritems():
+            if dest in nodes:
+                for source in sources:
+                    if source in nodes:
+                        wanted.add((source, dest))
+
+        self._remove_edges([key for key in self._edges
+                            if (key not in wanted or key[0] in touched or
+                                key[1] in touched)])
+        self._add_edges([key for key in wanted if key not in self._edges])
 
         # We've (possibly) rebuilt the graph, so we don't need to again
         self._rebuild_graph = False
-        
+
     #    def rebuild_nodes_connections(self):
     #        # This methods recreate the connections dictionary of each box using the
     #        # self.execution_model.dep_graph and checking for binded variables. 
@@ -265,6 +309,33 @@ class BlockGraphController(HasTraits):
     #                matchs = self._match_variables(node, d_n)
     #                box.connections[d_n.uuid] = matchs
         
+    def _add_edges(self, keys):
+        """ Create the lines between the (source, dest) graph nodes of each
+            key.
+        """
+        lines = []
+        for source, dest in keys:
+            edges = []
+            for (end_var,start_var) in self._match_variables(dest,source):
+                edges.append(EnableLine(start_node=self._nodes[source],
+                                        start_var=start_var,
+                                        end_node=self._nodes[dest],
+                                        end_var=end_var))
+            self._edges[(source, dest)] = edges
+            lines.extend(edges)
+        if lines:
+            self.canvas.add(*lines)
+
+    def _remove_edges(self, keys):
+        """ Remove the lines between the (source, dest) graph nodes of each
+            key.
+        """
+        lines = []
+        for key in keys:
+            lines.extend(self._edges.pop(key))
+        if lines:
+            self.canvas.remove(*lines)
+
     def _match_variables(self,ingoing,outgoing):
         # This function finds match between input variables of the ingoing objects 
         # and output variables of the outgoing object.  
@@ -322,19 +393,20 @@ class BlockGraphController(HasTraits):
             else:
                 x = 0
 
-            # Initial positions
+            # Initial positions. Only move the boxes whose position changed,
+            # so that the lines of the other boxes are left alone.
             for graph_node in col:
                 n = self._nodes[graph_node]
                 uuid = graph_node.uuid
                 saved = self.saved_node_positions
                 if uuid in saved:
-                    n.x = saved[uuid][0]
-                    n.y = saved[uuid][1]
+                    position = [saved[uuid][0], saved[uuid][1]]
                 else:
                     x_pos = x + (max_width[i] - n.bounds[0])
-                    n.x = x_pos
-                    n.y = y_pos
+                    position = [x_pos, y_pos]
                     y_pos = y_pos + n.bounds[1] + y_gap
+                if list(n.position) != position:
+                    n.position = position
                     
         self.scale_and_center()
 
@@ -444,4 +516,21 @@ class BlockGraphController(HasTraits):
             removed = [func.uuid for func in event.removed]
             self.update_nodes(added, removed)
 
+
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
+
+def _uuids(items):
+    """ Return the set of uuids of the given graph nodes, which may also be
+        given by uuid or in nested lists.
+    """
+    uuids = set()
+    for item in items:
+        if isinstance(item, (list, tuple)):
+            uuids.update(_uuids(item))
+        else:
+            uuids.add(getattr(item, 'uuid', item))
+    return uuids
+
 # EOF
@@ -0,0 +1,64 @@
+""" A cache of compiled code objects keyed by their source.
+
+The ExecutionModel compiles each statement's call signature separately and
+chains the resulting code objects when it executes, so unchanged statements
+are never recompiled. Since the cache is keyed by source text, models
+restricted from one another share their code objects.
+"""
+
+# Standard imports
+from collections import OrderedDict
+
+
+class CodeCache(object):
+    """ Least recently used cache mapping source text to code objects.
+    """
+
+    def __init__(self, max_size=1000, filename='<string>'):
+        # Maximum number of code objects kept in the cache.
+        self.max_size = max_size
+
+        # File name given to the compiled code objects, shown in tracebacks.
+        self.filename = filename
+
+        # Number of lookups served from the cache and compiled, respectively.
+        self.hits = 0
+        self.misses = 0
+
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, source):
+        return source in self._cache
+
+    def compile(self, source):
+        """ Return the code object compiled from *source* in 'exec' mode,
+        compiling it only if it is not in the cache already.
+        """
+        try:
+            code = self._cache.pop(source)
+            self.hits += 1
+        except KeyError:
+            code = compile(source, self.filename, 'exec')
+            self.misses += 1
+            while self._cache and len(self._cache) >= self.max_size:
+                self._cache.popitem(last=False)
+
+        # Re-insert to mark the entry as the most recently used.
+        self._cache[source] = code
+        return code
+
+    def clear(self):
+        """ Empty the cache and reset its counters.
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# The cache shared by all the execution models.
+code_cache = CodeCache()
+
+# EOF
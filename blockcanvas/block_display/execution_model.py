@@ -20,8 +20,12 @@ from blockcanvas.function_tools.parse_code import retrieve_inputs_and_outputs
 from codetools.blocks.analysis import walk, is_const
 from codetools.blocks.api import (Block, unparse)
 from traits.api import \
-    (Any, cached_property, HasTraits, List, Property, implements, Instance, Bool, List)
+    (Any, cached_property, HasTraits, List, Property, implements, Instance, Bool,
+     Dict, Int, on_trait_change)
 from codetools.util import graph
+from blockcanvas.block_display.code_cache import code_cache
+from blockcanvas.block_display.parallel_execution import execute_statements
+from blockcanvas.block_display.statement_graph import StatementGraph
 
 
 python_name = re.compile('^[a-zA-Z_][a-zA-Z0-9_]*$')
@@ -204,10 +208,14 @@ class ExecutionModel(HasTraits):
     dep_graph = Property(depends_on=['statements', 'statements_items'])
 
     # The imports and local definitions
-    imports_and_locals = Property(depends_on=['statements', 'statements_items'])
+    imports_and_locals = Property(depends_on=['statements', 'statements_items',
+        'statements.call_signature', 'statements.inputs.binding',
+        'statements.outputs.binding'])
 
     # The body of the code corresponding to the statements
-    body = Property(depends_on=['statements', 'statements_items'])
+    body = Property(depends_on=['statements', 'statements_items',
+        'statements.call_signature', 'statements.inputs.binding',
+        'statements.outputs.binding'])
 
     # All the code put together = imports + local_defs + body
     code = Property(depends_on=['statements', 'statements_items',
@@ -221,6 +229,39 @@ class ExecutionModel(HasTraits):
     # It is needed to speed up the use of the canvas when we are adding new 
     # blocks instead of executing the code. 
     allow_execute = Bool(True)
+
+    # Flag to execute incrementally. Only the statements downstream of the
+    # changed inputs, or whose code changed since they last ran, are executed
+    # again.
+    incremental = Bool(False)
+
+    # Number of workers executing independent function calls at the same
+    # time. Statements are executed one after the other when it is 0.
+    workers = Int(0)
+
+    # Use processes rather than threads as workers. Function calls whose
+    # inputs cannot be pickled are still executed by threads.
+    use_processes = Bool(False)
+
+    #---------------------------------------------------------------------------
+    #  Protected traits
+    #---------------------------------------------------------------------------
+
+    # Statements which still have to be executed by the next incremental
+    # execution, whatever the inputs given to execute() are.
+    _dirty = Instance(set, ())
+
+    # Maps each statement to the source it was last successfully executed
+    # from by an incremental execution.
+    _executed = Dict
+
+    # A cache for restrictions, keyed by the (inputs, outputs) frozensets.
+    # Invalidates when the statements or their bindings change.
+    _restrictions = Dict
+
+    # The StatementGraph of the statements, updated as they change. It is
+    # built again from scratch when the list of statements is replaced.
+    _graph = Instance(StatementGraph)
         
     #---------------------------------------------------------------------------
     #  object interface:
@@ -301,40 +342,19 @@ class ExecutionModel(HasTraits):
         if globals is None:
             globals = {}
 
-        if inputs is not None or outputs is not None:
-            # Only do this if we have to.
-            restricted = self.restricted(inputs=inputs, outputs=outputs)
-        else:
-            restricted = self
-
-        # Only execute the portions of the code which can be executed given the
-        # names in the context.
-        available_names = set(context.keys())
-        required_names, _ = restricted.mark_unsatisfied_inputs(
-            available_names)
-        if required_names:
-            bad = restricted.restricted(inputs=required_names)
-            good_statements = [stmt for stmt in restricted.statements if stmt not in bad.statements]
-            restricted = self.__class__(statements=good_statements)
-
-        # Big optimization with small effort! The exec command works 
-        # really bad when the passed context contains "big" object like
-        # that produced by our computations. We remove all of them that are 
-        # going to be overwritten. 
-        restricted._clean_old_results_from_context(context)
-
+        # Contexts which can defer their events post all the changes made by
+        # the execution as a single event, so their listeners update once.
+        defer = getattr(context, 'defer_events', None) is False
+        if defer:
+            context.defer_events = True
         try:
-            t_in = time.time()
-            # This is likely the most important line in block canvas
-            exec restricted.code in globals, context
-            t_out = time.time()
-            print '%f seconds: Execution time' % (t_out-t_in)
-            
-        except Exception, _:
-            print 'Got exception from code:'
-            print restricted.code
-            print
-            traceback.print_exc()
+            if self.incremental:
+                self._execute_incremental(context, globals, inputs, outputs)
+            else:
+                self._execute(context, globals, inputs, outputs)
+        finally:
+            if defer:
+                context.defer_events = False
 
     #---------------------------------------------------------------------------
     # ExecutionModel interface
@@ -432,9 +452,14 @@ class ExecutionModel(HasTraits):
         model : ExecutionModel
         """
         if inputs is not None:
-            inputs = set(inputs)
+            inputs = frozenset(inputs)
         if outputs is not None:
-            outputs = set(outputs)
+            outputs = frozenset(outputs)
+
+        # Look for results in the cache
+        cache_key = (inputs, outputs)
+        if cache_key in self._restrictions:
+            return self._restrictions[cache_key]
 
         # Convert the names to the nodes which are directly related to them.
         input_nodes = set()
@@ -470,6 +495,10 @@ class ExecutionModel(HasTraits):
         em = self.__class__(
             statements=list(intersection),
         )
+
+        # Cache result
+        self._restrictions[cache_key] = em
+
         return em
 
     def mark_unsatisfied_inputs(self, available_names):
@@ -521,7 +550,135 @@ class ExecutionModel(HasTraits):
 
 
     # Private methods ########################################################
-    
+
+    def _execute(self, context, globals, inputs, outputs):
+        """ Execute the statements needed for the *outputs* which depend on
+        the *inputs*, given the names available in the context.
+        """
+        if inputs is not None or outputs is not None:
+            # Only do this if we have to.
+            restricted = self.restricted(inputs=inputs, outputs=outputs)
+        else:
+            restricted = self
+
+        # Only execute the portions of the code which can be executed given the
+        # names in the context.
+        available_names = set(context.keys())
+        required_names, _ = restricted.mark_unsatisfied_inputs(
+            available_names)
+        if required_names:
+            bad = restricted.restricted(inputs=required_names)
+            good_statements = [stmt for stmt in restricted.statements if stmt not in bad.statements]
+            restricted = self.__class__(statements=good_statements)
+
+        # Big optimization with small effort! The exec command works 
+        # really bad when the passed context contains "big" object like
+        # that produced by our computations. We remove all of them that are 
+        # going to be overwritten. 
+        restricted._clean_old_results_from_context(context)
+
+        try:
+            t_in = time.time()
+            # This is likely the most important line in block canvas.
+            # Statements are compiled one by one and their code objects are
+            # cached, so only the statements which changed get recompiled.
+            exec code_cache.compile(restricted.imports_and_locals) \
+                in globals, context
+            for stmt in execute_statements(restricted.sorted_statements,
+                                           restricted.dep_graph, globals,
+                                           context, self.workers,
+                                           self.use_processes):
+                pass
+            t_out = time.time()
+            print '%f seconds: Execution time' % (t_out-t_in)
+            
+        except Exception, _:
+            print 'Got exception from code:'
+            print restricted.code
+            print
+            traceback.print_exc()
+
+    def _execute_incremental(self, context, globals, inputs, outputs):
+        """ Execute only the statements which are out of date.
+
+        A statement is out of date if it has never been executed, if its code
+        changed since it was last executed, if one of its outputs is missing
+        from the context, or if it is downstream of one of the *inputs*. When
+        *inputs* is None every statement is considered out of date.
+        Statements which are not needed for the *outputs*, or whose inputs are
+        not available, are remembered and executed by a later call.
+        """
+        statements = set(self.statements)
+
+        # Forget about the statements which have been removed from the model.
+        for stmt in self._executed.keys():
+            if stmt not in statements:
+                del self._executed[stmt]
+        self._dirty.intersection_update(statements)
+
+        available_names = set(context.keys())
+        if inputs is None:
+            dirty = set(statements)
+        else:
+            inputs = set(inputs)
+            dirty = set(self._dirty)
+            for stmt in self.statements:
+                if (self._executed.get(stmt) != stmt.call_signature or
+                    inputs.intersection(iv.binding for iv in stmt.inputs) or
+                    not available_names.issuperset(ov.binding
+                                                   for ov in stmt.outputs)):
+                    dirty.add(stmt)
+
+        dep_graph = self.dep_graph
+        dirty = downstream_statements(dep_graph, dirty)
+
+        to_run = set(dirty)
+        if outputs is not None:
+            outputs = set(outputs)
+            output_nodes = [stmt for stmt in self.statements
+                            if outputs.intersection(ov.binding
+                                                    for ov in stmt.outputs)]
+            to_run.intersection_update(
+                upstream_statements(dep_graph, output_nodes))
+
+        # Leave out the statements which cannot be executed given the names in
+        # the context.
+        required_names, _ = self.mark_unsatisfied_inputs(available_names)
+        if required_names:
+            bad = [stmt for stmt in to_run
+                   if required_names.intersection(iv.binding
+                                                  for iv in stmt.inputs)]
+            to_run.difference_update(downstream_statements(dep_graph, bad))
+
+        # Statements are executed in topological order.
+        to_run = [stmt for stmt in self.sorted_statements if stmt in to_run]
+        for stmt in to_run:
+            for ov in stmt.outputs:
+                if ov.binding in context:
+                    del context[ov.binding]
+
+        executed = 0
+        try:
+            t_in = time.time()
+            exec code_cache.compile(self.imports_and_locals) in globals, context
+            for stmt in execute_statements(to_run, dep_graph, globals, context,
+                                           self.workers, self.use_processes):
+                self._executed[stmt] = stmt.call_signature
+                dirty.discard(stmt)
+                executed += 1
+            t_out = time.time()
+            print '%f seconds: Execution time (%d of %d statements)' % \
+                (t_out-t_in, executed, len(statements))
+
+        except Exception, _:
+            print 'Got exception from code:'
+            print '\n'.join(stmt.call_signature for stmt in to_run
+                            if stmt in dirty)
+            print
+            traceback.print_exc()
+
+        self._dirty = dirty
+
     def _clear_merged(self,ids):
         """ Cleans merged statements.
         
@@ -569,11 +726,44 @@ class ExecutionModel(HasTraits):
 
     #-- Trait Event Handlers --------------------------------------------------
 
+    @on_trait_change('statements, statements_items, statements.call_signature,'
+                     'statements.inputs.binding, statements.outputs.binding')
+    def _invalidate_restrictions(self):
+        """ The restrictions depend on the statements and their bindings. """
+        self._restrictions.clear()
+
+    def _statements_changed(self):
+        """ Build the graph again for the new list of statements. """
+        self._graph = None
+
+    def _statements_items_changed(self, event):
+        """ Add and remove the statements to and from the graph. """
+        if self._graph is not None:
+            for stmt in event.removed:
+                self._graph.remove(stmt)
+            for stmt in event.added:
+                self._graph.add(stmt)
+
+    @on_trait_change('statements.inputs.binding, statements.outputs.binding')
+    def _update_graph(self, object, name, old, new):
+        """ Update the graph for a statement whose bindings changed. """
+        if self._graph is None or object is self:
+            return
+        if name == 'binding':
+            object = self._graph.owner(object)
+        if object is not None:
+            self._graph.update(object)
+
+    def _get_statement_graph(self):
+        """ Return the StatementGraph of the statements, building it if
+        needed. """
+        if self._graph is None:
+            self._graph = StatementGraph(self.statements)
+        return self._graph
+
     def _get_sorted_statements(self):
         """ self.statements in topologically sorted order. """
-        succ_graph = graph.reverse(self.dep_graph)
-        sorted = graph.topological_sort(succ_graph)
-        return sorted
+        return self._get_statement_graph().sorted_statements()
 
     def _get_groups(self):
         """ Generate and return the list of groups (i.e. uuids). """
@@ -582,6 +772,7 @@ class ExecutionModel(HasTraits):
                 self._groups.append(stmt.uuid)        
         return self._groups
 
+    @cached_property
     def _get_imports_and_locals(self):
         """ Generate the import statements and local definitions  
             Should we worry about the order of the imports?
@@ -638,6 +829,7 @@ class ExecutionModel(HasTraits):
 
         return ''.join(unique_lines) + '\n' + ''.join(local_funcs)
 
+    @cached_property
     def _get_body(self):
         """ Generate the body of code not including imports and local definitions """
         return '\n'.join(statement.call_signature
@@ -654,29 +846,10 @@ class ExecutionModel(HasTraits):
         return Block(self.code)
 
     def _get_dep_graph(self):
-        """ Returns the function dependency graph for self.statements.
-            This just walks the dependencies for each function in self.statements. """
-
-        dep_graph = {}
-        outputs = {}
-        # First pass to set up outputs
-        for s in self.statements:
-            for output in s.outputs:
-                outputs[output.binding] = s
-
-        # Second pass to set up the dependency graph
-        for s in self.statements:
-            depends = []
-            for input in s.inputs:
-                try:
-                    depends.append(outputs[input.binding])
-                except KeyError:
-                    # Not all inputs will depend on the output from a previous function
-                    # so this is okay
-                    pass
-            dep_graph[s] = depends
-
-        return dep_graph
+        """ Returns the function dependency graph for self.statements, which
+            maps each statement to the statements providing its inputs. It is
+            maintained incrementally and should not be modified. """
+        return self._get_statement_graph().dep_graph
 
 #-------------------------------------------------------------------------
 # Helping functions
@@ -711,6 +884,25 @@ def explode_model_func_calls(stmt):
             
     return function_calls
 
+def downstream_statements(dep_graph, statements):
+    """ Return the set of statements which depend, directly or not, on the
+    given statements, including them.
+    """
+    return upstream_statements(graph.reverse(dep_graph), statements)
+
+def upstream_statements(dep_graph, statements):
+    """ Return the set of statements which the given statements depend on,
+    directly or not, including them.
+    """
+    reached = set(statements)
+    stack = list(reached)
+    while stack:
+        for dep in dep_graph.get(stack.pop(), []):
+            if dep not in reached:
+                reached.add(dep)
+                stack.append(dep)
+    return reached
+
 def available_names_retrive(stmt):
     """ Return the list of available_names in the model.
     
@@ -0,0 +1,209 @@
+""" Execution of independent statements of an ExecutionModel across a pool of
+workers.
+
+The statements are grouped in topological levels: the statements of a level
+only depend on the statements of the previous levels, so they can all run at
+the same time. The function calls of a level are dispatched to a pool of
+threads, or of processes when their inputs can be pickled, each one in its own
+namespace holding the names it reads from the context. Their outputs are
+merged back into the context by the calling thread, so the context itself is
+never touched by the workers.
+"""
+
+# System library imports
+import atexit
+import cPickle
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import sys
+
+# Local imports
+from blockcanvas.block_display.code_cache import code_cache
+from blockcanvas.function_tools.function_call import FunctionCall
+from blockcanvas.function_tools.function_call_group import FunctionCallGroup
+
+
+# Pools shared by all the execution models, keyed by (workers, processes).
+_pools = {}
+
+
+def get_pool(workers, processes=False):
+    """ Return the shared pool of *workers* threads, or processes.
+    """
+    key = (workers, processes)
+    pool = _pools.get(key)
+    if pool is None:
+        if processes:
+            pool = multiprocessing.Pool(workers)
+        else:
+            pool = ThreadPool(workers)
+        _pools[key] = pool
+    return pool
+
+
+def close_pools():
+    """ Terminate all the shared pools.
+    """
+    for pool in _pools.values():
+        pool.terminate()
+    _pools.clear()
+
+atexit.register(close_pools)
+
+
+def statement_levels(statements, dep_graph):
+    """ Group topologically sorted statements by level.
+
+    A statement is one level after the highest of the statements it depends
+    on. Dependencies on statements which are not in *statements* are ignored.
+
+    Returns
+    -------
+    levels : list of list of statements
+        The statements of each level, in the order they were given.
+    """
+    level_of = {}
+    levels = []
+    for stmt in statements:
+        level = 0
+        for dep in dep_graph.get(stmt, []):
+            if dep in level_of:
+                level = max(level, level_of[dep] + 1)
+        level_of[stmt] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(stmt)
+    return levels
+
+
+def execute_statements(statements, dep_graph, globals, context, workers=0,
+                       processes=False):
+    """ Execute topologically sorted statements in the context.
+
+    Parameters
+    ----------
+    statements : list of statements
+        The statements to execute, in topological order.
+    dep_graph : dict
+        The dependency graph of the statements.
+    globals : dict
+        The global namespace for the code.
+    context : sufficiently dict-like object
+        The namespace to execute the code in.
+    workers : int
+        The number of workers executing independent function calls at the
+        same time. The statements are executed one after the other if it is 0.
+    processes : bool
+        Whether to send the function calls to a pool of processes rather than
+        threads. The calls whose inputs cannot be pickled still go to threads.
+
+    Yields each statement once it has been executed and its outputs are in the
+    context, in the order they were given within a level. If a statement
+    raises an exception, the statements of its level which are not executed
+    yet are skipped, but the calls already sent to the workers are still
+    waited for, and their outputs merged, before the exception is re-raised.
+    """
+    if workers < 1:
+        for stmt in statements:
+            exec code_cache.compile(stmt.call_signature) in globals, context
+            yield stmt
+        return
+
+    for level in statement_levels(statements, dep_graph):
+        calls = [stmt for stmt in level if _is_dispatchable(stmt)]
+        if len(calls) < 2:
+            # Not worth the round trip to the pool.
+            calls = []
+        pending = dict((stmt, _dispatch(stmt, globals, context, workers,
+                                        processes))
+                       for stmt in calls)
+
+        # Execute the rest of the level in this thread meanwhile.  The
+        # outputs of the calls are merged in the order of the level, as
+        # statements of a level may bind the same name, and the last one
+        # must win as when they are executed one after the other.
+        error = None
+        for stmt in level:
+            if stmt in pending:
+                try:
+                    outputs = pending[stmt].get()
+                except Exception:
+                    if error is None:
+                        error = sys.exc_info()
+                    continue
+                for name, value in outputs.iteritems():
+                    context[name] = value
+            elif error is None:
+                try:
+                    exec code_cache.compile(stmt.call_signature) \
+                        in globals, context
+                except Exception:
+                    error = sys.exc_info()
+                    continue
+            else:
+                continue
+            yield stmt
+
+        if error is not None:
+            raise error[0], error[1], error[2]
+
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
+
+def _is_dispatchable(stmt):
+    """ Can the statement be executed by a worker?
+
+    Only plain function calls are dispatched: their outputs are known, unlike
+    those of groups and general expressions.
+    """
+    return (isinstance(stmt, FunctionCall) and
+            not isinstance(stmt, FunctionCallGroup))
+
+def _dispatch(stmt, globals, context, workers, processes):
+    """ Send a function call to a pool and return its AsyncResult.
+    """
+    source = stmt.call_signature
+    code = code_cache.compile(source)
+    namespace = {}
+    for name in _code_names(code):
+        if name in context:
+            namespace[name] = context[name]
+    outputs = [ov.binding for ov in stmt.outputs]
+
+    if processes:
+        try:
+            payload = cPickle.dumps((source, namespace, outputs),
+                                    cPickle.HIGHEST_PROTOCOL)
+        except (cPickle.PicklingError, TypeError, AttributeError):
+            pass
+        else:
+            return get_pool(workers, processes=True).apply_async(
+                _execute_pickled, (payload,))
+
+    return get_pool(workers).apply_async(_execute,
+                                         (code, globals, namespace, outputs))
+
+def _code_names(code):
+    """ Return the names used by a code object and the code nested in it.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, 'co_names'):
+            names.update(_code_names(const))
+    return names
+
+def _execute(code, globals, namespace, outputs):
+    """ Execute the code in the namespace and return its outputs.
+    """
+    exec code in globals, namespace
+    return dict((name, namespace[name]) for name in outputs
+                if name in namespace)
+
+def _execute_pickled(payload):
+    """ Execute a pickled (source, namespace, outputs) in a worker process.
+    """
+    source, namespace, outputs = cPickle.loads(payload)
+    return _execute(code_cache.compile(source), {}, namespace, outputs)
+
+# EOF
@@ -1,18 +1,26 @@
 """ Provides a row based layout algorithm for an acyclic directed graph.
+
+    The layout is a layered (Sugiyama style) one.  Nodes are assigned to rows
+    by the longest path from the nodes without dependencies, edges spanning
+    several rows are split by virtual nodes, and the order of the nodes in
+    each row is improved by sweeping the rows down and up, sorting each row
+    by the barycenter of the positions of the neighbours of its nodes in the
+    previous row.  None of the steps recurse, so long chains of nodes don't
+    hit the recursion limit.
 """
 
 # Standard library imports
 import warnings
 
 # Enthought library imports
-from traits.api import HasTraits
+from traits.api import Dict, HasTraits, Int
 
 
 class RowLayoutEngine(HasTraits):
     """ Layout a visual representation of a graph such that the nodes
         are organized into consecutive rows based on their dependencies. The
-        algorithm is only suitable for acyclic graphs (and currently will hang
-        if given a cyclic one).
+        algorithm is only suitable for acyclic graphs, and warns if given a
+        cyclic one.
     """
 
     #########################################################################
@@ -22,6 +30,16 @@ class RowLayoutEngine(HasTraits):
     # Should nodes be centered (most common) or aligned to the left or right
     #justify = Enum('left', 'center', 'right')
 
+    # Maximum number of down and up barycenter sweeps used to reduce the
+    # number of edge crossings.
+    iterations = Int(8)
+
+    # The (row, index in the row, neighbours) of each node, virtual ones
+    # included, in the last layout.  The next layout keeps this order and
+    # only moves the nodes whose row or neighbours changed, so that an edit
+    # to the graph only moves the nodes it affects.
+    _previous = Dict
+
     #########################################################################
     # RowLayout Interface
     #########################################################################
@@ -50,24 +68,31 @@ class RowLayoutEngine(HasTraits):
                 ...      'zoo': ['zi','za', 'ze'],
                 ...     }
                 >>> layout_engine = RowLayoutEngine()
-                >>> layout_engine._organize_rows(g)
-                [['foo'], ['bar', 'baz'], ['zi', 'ze', 'za'], ['zoo']]
+                >>> rows = layout_engine.organize_rows(g)
+                >>> [sorted(row) for row in rows]
+                [['foo'], ['bar', 'baz'], ['za', 'ze', 'zi'], ['zoo']]
 
             Note: This only works for graphs that don't have any cycles
-                  in them.  A cycle will currently cause this to fail
-                  and print a warning on the status bar.
+                  in them.  A cycle will cause this to fail and print a
+                  warning on the status bar.
         """
         # Initialize the rows to avoid returning None
         rows = []
 
         # Check to see if there are any nodes to arrange
         if dep_graph:
-            if self._acyclic(dep_graph):
-                rows = self._create_hierarchy(dep_graph)
+            order = self._topological_order(dep_graph)
+            if order is not None:
+                rows = self._create_hierarchy(dep_graph, order)
             else:
                 warnings.warn("Cycle detected in graph.  Layout algorithm failed.")
         return rows
 
+    def clear_history(self):
+        """ Forget the last layout, so that the next one starts afresh.
+        """
+        self._previous = {}
+
     #########################################################################
     # RowLayoutEngine Protected Interface
     #########################################################################
@@ -94,151 +119,265 @@ class RowLayoutEngine(HasTraits):
 
 
     def _acyclic(self, dep_graph):
-        """ Given a dependency graph, determine whether or not there is a cycle
-            by performing a recursive depth-first search.
-            Returns False if there is a cycle present, True otherwise.
+        """ Given a dependency graph, determine whether or not there is a
+            cycle.  Returns False if there is a cycle present, True otherwise.
         """
+        return self._topological_order(dep_graph) is not None
 
-        seen = {}
-        explored = []
 
-        # Reorganize the dependency graph to view children of each node.
+    def _topological_order(self, dep_graph):
+        """ Returns the nodes of the graph ordered so that every node comes
+            after its dependencies, or None if the graph has a cycle.
+        """
         successors = self._successor_graph(dep_graph)
-
-        def _depth_first(graph, seen, explored, v):
-            seen[v] = 1
-            for w in graph[v]:
-                if w not in seen:
-                    if not _depth_first(graph, seen, explored, w):
-                        return
-                elif w in seen and w not in explored:
-                    #cycle found
-                    return False
-            explored.insert(0,v)
-            return v
-
-        for v in successors:
-            if v not in explored:
-                if not _depth_first(successors, seen, explored, v):
-                    return
-        return True
-
-
-    def _create_hierarchy(self, dep_graph):
+        pending = dict((node, len(dep_graph.get(node, ())))
+                       for node in successors)
+        ready = [node for node in successors if pending[node] == 0]
+
+        order = []
+        while ready:
+            node = ready.pop()
+            order.append(node)
+            for child in successors[node]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(successors):
+            return None
+        return order
+
+
+    def _create_hierarchy(self, dep_graph, order):
+        """ Assign the nodes to rows and order each row to reduce the number
+            of edge crossings.  **order** is a topological order of the
+            nodes.
         """
-            Before calling create_hierarchy, make sure that the graph is acyclic.
-            Building from the bottom-up.
-            To Do:  Clean up code in depth-first search and combine with the search
-                for cycles.
-
+        successors = self._successor_graph(dep_graph)
+        rank = self._rank(dep_graph, successors, order)
+        layers, up, down = self._layers(successors, rank, order)
+        self._reduce_crossings(layers, up, down,
+                               self._changed(layers, up, down))
+
+        previous = {}
+        for r, layer in enumerate(layers):
+            for index, node in enumerate(layer):
+                previous[node] = (r, index, frozenset(up[node]),
+                                  frozenset(down[node]))
+        self._previous = previous
+
+        # Construct the rows from the layers, without the virtual nodes.
+        return [[node for node in layer if not _is_virtual(node)]
+                for layer in layers]
+
+
+    def _rank(self, dep_graph, successors, order):
+        """ Returns the row of each node: the length of the longest path to
+            it from a node without dependencies.  These nodes are then moved
+            down to the row just above their highest child.
         """
-        height = {}
+        rank = {}
+        for node in order:
+            parents = dep_graph.get(node, ())
+            if parents:
+                rank[node] = max([rank[parent] for parent in parents]) + 1
+            else:
+                rank[node] = 0
 
-        # Get the roots of the graph (with no dependencies)
-        # Going to build graph top-down
-        successors = self._successor_graph(dep_graph)
-        roots = [node for node in dep_graph if dep_graph[node] == []]
+        for node in order:
+            children = successors[node]
+            if children and not dep_graph.get(node):
+                rank[node] = min([rank[child] for child in children]) - 1
 
-        def _depth_first(graph, height, current_rank, v):
-            if v in height:
-                # Push children down
-                if current_rank > height[v]:
-                    height[v] = current_rank
+        return rank
+
+
+    def _layers(self, successors, rank, order):
+        """ Split the graph in layers, inserting a virtual node in each layer
+            an edge crosses.  Returns the layers and the neighbours of each
+            node in the layer above and below it.
+        """
+        layers = [[] for i in range(max(rank.values()) + 1)]
+        up = {}
+        down = {}
+
+        for node in order:
+            layers[rank[node]].append(node)
+            up[node] = []
+            down[node] = []
+
+        for node in order:
+            for child in _unique(successors[node]):
+                source = node
+                for r in range(rank[node] + 1, rank[child]):
+                    virtual = (_virtual, node, child, r)
+                    layers[r].append(virtual)
+                    up[virtual] = [source]
+                    down[virtual] = []
+                    down[source].append(virtual)
+                    source = virtual
+                down[source].append(child)
+                up[child].append(source)
+
+        # Start from the order of the last layout.  The new nodes come last,
+        # in topological order.
+        previous = self._previous
+        if previous:
+            last = len(previous)
+            for layer in layers:
+                keys = dict((node, (previous[node][1], 0) if node in previous
+                                   else (last, i))
+                            for i, node in enumerate(layer))
+                layer.sort(key=keys.get)
+
+        return layers, up, down
+
+
+    def _changed(self, layers, up, down):
+        """ Returns the set of the nodes whose row or neighbours changed
+            since the last layout, or None if there is no last layout.
+        """
+        previous = self._previous
+        if not previous:
+            return None
+
+        changed = set()
+        for r, layer in enumerate(layers):
+            for node in layer:
+                old = previous.get(node)
+                if (old is None or old[0] != r or
+                    old[2] != frozenset(up[node]) or
+                    old[3] != frozenset(down[node])):
+                    changed.add(node)
+        return changed
+
+
+    def _reduce_crossings(self, layers, up, down, movable=None):
+        """ Reorder the nodes of the layers in place by barycenter sweeps,
+            keeping the order with the fewest crossings found.  If a set of
+            **movable** nodes is given, only they are moved, and the other
+            nodes keep their order.
+        """
+        indices = range(len(layers))
+        if movable is not None:
+            indices = [i for i in indices
+                       if not movable.isdisjoint(layers[i])]
+        down_sweep = [i for i in indices if i > 0]
+        up_sweep = [i for i in reversed(indices) if i < len(layers) - 1]
+
+        best = [list(layer) for layer in layers]
+        best_crossings = _count_all_crossings(layers, down)
+
+        for i in range(self.iterations):
+            if best_crossings == 0:
+                break
+
+            # Sweep down, sorting by the parents, then up, by the children.
+            for index in down_sweep:
+                _sort_by_barycenter(layers, index, index - 1, up, movable)
+            for index in up_sweep:
+                _sort_by_barycenter(layers, index, index + 1, down, movable)
+
+            crossings = _count_all_crossings(layers, down)
+            if crossings < best_crossings:
+                best = [list(layer) for layer in layers]
+                best_crossings = crossings
             else:
-                height[v] = current_rank
-            if v in graph:
-                for w in graph[v]:
-                    _depth_first(graph, height, current_rank + 1, w)
-            return v
-
-        # Get the recursion started
-        for v in roots:
-            _depth_first(successors, height, 1, v)
-
-        # Check for optimal height for leave nodes since they're
-        # used to get the recursion started
-        max_rank = max(height.values())
-        for v in roots:
-            children = successors[v]
-            leaf_height = height[v]
-            if len(children) > 0:
-                min_child = min([height[c] for c in children])
-                if leaf_height < min_child:
-                    height[v] = min_child - 1
-
-        # Construct the rows from the rank assigned in search.
-        # The root nodes will start with a rank of 1
-        rows = []
-        row_rank = 1
-        while row_rank <= max_rank:
-            row = [node for node in height if height[node] == row_rank]
-            rows.append(row)
-            row_rank = row_rank + 1
+                break
 
-        # First turn the dependency list into successors
-        successors = self._successor_graph(dep_graph)
+        layers[:] = best
 
-        # First pass move down the tree - assume fixed root nodes
-        index = 1
-        num_rows = len(rows)
-
-        while index < num_rows:
-            row = rows[index]
-            previous_row = rows[index - 1]
-            new_order = []
-            for r in row:
-                parents = dep_graph[r]
-                if len(parents) > 0:
-                    total = 0.0
-                    for parent in parents:
-                        try:
-                            total += previous_row.index(parent)
-                        except:
-                            pass
-                    avg = total / len(parents)
-                    new_order.append((avg, r))
-                else:
-                    # This is a root node - will get reordered on the next pass
-                    new_order.append((0.0, r))
-
-            new_order.sort()
-            new_row = []
-            for each in new_order:
-                new_row.append(each[1])
-            rows[index] = new_row
-            index = index + 1
-
-
-        # Second pass - move back up the tree, chance to rearrange root nodes
-        index = len(rows) - 2
-
-        while index > -1:
-            row = rows[index]
-            next_row = rows[index + 1]
-            new_order = []
-            for r in row:
-                children = successors[r]
-                if len(children) > 0:
-                    total = 0.0
-                    for child in children:
-                        try:
-                            total += next_row.index(child)
-                        except:
-                            pass
-                    avg = total / len(children)
-                    new_order.append((avg, r))
-                else:
-                    # This is a leaf node
-                    new_order.append((row.index(r), r))
 
-            new_order.sort()
-            new_row = []
-            for each in new_order:
-                new_row.append(each[1])
-            rows[index] = new_row
-            index = index - 1
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
 
-        return rows
+# Marks the virtual nodes inserted where an edge crosses a layer.
+_virtual = object()
 
-#EOF
+def _is_virtual(node):
+    return type(node) is tuple and len(node) == 4 and node[0] is _virtual
 
+def _unique(nodes):
+    """ The nodes, in order, without duplicates.
+    """
+    seen = set()
+    result = []
+    for node in nodes:
+        if node not in seen:
+            seen.add(node)
+            result.append(node)
+    return result
+
+def _sort_by_barycenter(layers, index, fixed, neighbours, movable=None):
+    """ Sort the layer **index** by the average position of the neighbours of
+        its nodes in the layer **fixed**.  Nodes without neighbours keep their
+        position.  If a set of **movable** nodes is given, the other nodes
+        keep their order and the movable ones are merged in between them.
+    """
+    position = dict((node, i) for i, node in enumerate(layers[fixed]))
+    keys = {}
+    for i, node in enumerate(layers[index]):
+        linked = neighbours[node]
+        if linked:
+            total = 0.0
+            for other in linked:
+                total += position[other]
+            keys[node] = (total / len(linked), i)
+        else:
+            keys[node] = (float(i), i)
+
+    if movable is None:
+        layers[index].sort(key=keys.get)
+        return
+
+    layer = layers[index]
+    staying = [node for node in layer if node not in movable]
+    moving = sorted([node for node in layer if node in movable], key=keys.get)
+    merged = []
+    i = 0
+    for node in moving:
+        while i < len(staying) and keys[staying[i]] <= keys[node]:
+            merged.append(staying[i])
+            i += 1
+        merged.append(node)
+    merged.extend(staying[i:])
+    layers[index] = merged
+
+def _count_all_crossings(layers, down):
+    """ The total number of edge crossings between consecutive layers.
+    """
+    total = 0
+    for index in range(len(layers) - 1):
+        total += _count_crossings(layers[index], layers[index + 1], down)
+    return total
+
+def _count_crossings(upper, lower, down):
+    """ The number of crossings of the edges between two layers, counted as
+        the inversions of the lower ends of the edges sorted by their upper
+        end, with a binary indexed tree.
+    """
+    position = dict((node, i) for i, node in enumerate(lower))
+    ends = []
+    for node in upper:
+        ends.extend(sorted([position[child] for child in down[node]]))
+
+    size = len(lower)
+    tree = [0] * (size + 1)
+    crossings = 0
+    for count, end in enumerate(ends):
+        # The number of previous edges ending right of this one.
+        i = end + 1
+        before = 0
+        while i > 0:
+            before += tree[i]
+            i -= i & -i
+        crossings += count - before
+
+        i = end + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+    return crossings
+
+#EOF
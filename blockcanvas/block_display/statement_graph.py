@@ -0,0 +1,174 @@
+""" The dependency graph of the statements of an ExecutionModel, maintained
+incrementally.
+
+A statement depends on the statements providing its inputs, the provider of a
+name being the last statement of the model writing it. The graph indexes the
+readers and writers of each name, so adding, removing or rebinding a
+statement only updates the statements reading the names it writes. The
+topological order of the statements is cached until the graph changes.
+"""
+
+# ETS imports
+from codetools.util import graph
+
+
+class StatementGraph(object):
+    """ Dependency graph of a list of statements, kept up to date as
+    statements are added, removed or rebound.
+    """
+
+    def __init__(self, statements):
+        # The statements of the model. When several statements write the
+        # same name, the last one in this list provides it.
+        self.statements = statements
+
+        # Maps each statement to the list of statements it depends on. It
+        # should not be modified outside of this class.
+        self.dep_graph = {}
+
+        # Maps each name to the set of statements reading it and writing it,
+        # respectively.
+        self._readers = {}
+        self._writers = {}
+
+        # Maps each variable to its statement, and each statement to the
+        # (input names, output names, variables) it is indexed under.
+        self._owners = {}
+        self._bindings = {}
+
+        # Position of each statement in the model, computed when a name has
+        # several writers, and the cached topological order.
+        self._positions = None
+        self._sorted = None
+
+        for statement in statements:
+            self._index(statement)
+        for statement in statements:
+            self._link(statement)
+
+    def sorted_statements(self):
+        """ Return the statements in topological order.
+        """
+        if self._sorted is None:
+            self._sorted = graph.topological_sort(graph.reverse(self.dep_graph))
+        return list(self._sorted)
+
+    def owner(self, variable):
+        """ Return the statement an input or output variable belongs to, or
+        None.
+        """
+        return self._owners.get(variable)
+
+    def add(self, statement):
+        """ Add a statement to the graph.
+        """
+        self._positions = None
+        self._index(statement)
+        self._link(statement)
+        self._relink(self._bindings[statement][1])
+
+    def remove(self, statement):
+        """ Remove a statement from the graph.
+        """
+        if statement not in self._bindings:
+            return
+        self._positions = None
+        outputs = self._bindings[statement][1]
+        self._unindex(statement)
+        del self.dep_graph[statement]
+        self._sorted = None
+        self._relink(outputs)
+
+    def update(self, statement):
+        """ Update the graph for a statement whose bindings changed.
+        """
+        if statement not in self._bindings:
+            return
+        old_outputs = self._bindings[statement][1]
+        self._unindex(statement)
+        self._index(statement)
+        self._link(statement)
+        self._relink(old_outputs | self._bindings[statement][1])
+
+    #---------------------------------------------------------------------------
+    # Protected interface
+    #---------------------------------------------------------------------------
+
+    def _index(self, statement):
+        """ Index a statement under the names it reads and writes.
+        """
+        inputs = set(iv.binding for iv in statement.inputs)
+        outputs = set(ov.binding for ov in statement.outputs)
+        variables = list(statement.inputs) + list(statement.outputs)
+
+        for name in inputs:
+            self._readers.setdefault(name, set()).add(statement)
+        for name in outputs:
+            self._writers.setdefault(name, set()).add(statement)
+        for variable in variables:
+            self._owners[variable] = statement
+        self._bindings[statement] = (inputs, outputs, variables)
+
+    def _unindex(self, statement):
+        """ Remove a statement from the indices.
+        """
+        inputs, outputs, variables = self._bindings.pop(statement)
+        for name in inputs:
+            _discard(self._readers, name, statement)
+        for name in outputs:
+            _discard(self._writers, name, statement)
+        for variable in variables:
+            if self._owners.get(variable) is statement:
+                del self._owners[variable]
+
+    def _link(self, statement):
+        """ Compute the statements a statement depends on.
+        """
+        depends = []
+        for iv in statement.inputs:
+            provider = self._provider(iv.binding)
+            if provider is not None:
+                depends.append(provider)
+
+        if self.dep_graph.get(statement) != depends:
+            self.dep_graph[statement] = depends
+            self._sorted = None
+
+    def _relink(self, names):
+        """ Compute again the dependencies of the statements reading names.
+        """
+        readers = set()
+        for name in names:
+            readers.update(self._readers.get(name, ()))
+        for statement in readers:
+            self._link(statement)
+
+    def _provider(self, name):
+        """ Return the last statement writing a name, or None.
+        """
+        writers = self._writers.get(name)
+        if not writers:
+            return None
+        if len(writers) == 1:
+            return iter(writers).next()
+
+        if self._positions is None:
+            self._positions = dict((statement, index) for index, statement
+                                   in enumerate(self.statements))
+        return max(writers, key=lambda statement:
+                   self._positions.get(statement, -1))
+
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
+
+def _discard(index, name, statement):
+    """ Remove a statement from the set indexed by a name.
+    """
+    statements = index.get(name)
+    if statements is not None:
+        statements.discard(statement)
+        if not statements:
+            del index[name]
+
+# EOF
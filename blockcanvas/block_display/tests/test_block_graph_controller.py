@@ -0,0 +1,70 @@
+# Standard imports
+import unittest
+
+# Enthought library imports
+from enable.api import Container
+
+# Application imports
+from blockcanvas.block_display.execution_model import ExecutionModel
+from blockcanvas.block_display.block_graph_controller import BlockGraphController
+from blockcanvas.function_tools.general_expression import GeneralExpression
+
+
+class BlockGraphControllerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.code = 'from blockcanvas.debug.my_operator import mul, add\n' \
+                    'a = mul(1,2)\n' \
+                    'b = mul(5,6)\n' \
+                    'c = add(a,b)'
+        self.model = ExecutionModel.from_code(self.code)
+        self.controller = BlockGraphController(execution_model=self.model,
+                                               canvas=Container())
+        self.controller.update_nodes()
+        self.astmt, self.bstmt, self.cstmt = self.model.statements
+
+    def lines(self):
+        return [line for lines in self.controller._edges.values()
+                for line in lines]
+
+    def test_build(self):
+        controller = self.controller
+        self.assertEqual(set(controller._nodes), set(self.model.statements))
+        self.assertEqual(set(controller._edges),
+                         set([(self.astmt, self.cstmt),
+                              (self.bstmt, self.cstmt)]))
+        self.assertEqual(len(controller.canvas.components), 5)
+
+    def test_add_keeps_lines(self):
+        lines = self.lines()
+        boxes = dict(self.controller._nodes)
+        ge = GeneralExpression()
+        ge.code = 'd = c + 1'
+        self.model.statements.append(ge)
+
+        self.assertTrue(ge in self.controller._nodes)
+        for node, box in boxes.items():
+            self.assertTrue(self.controller._nodes[node] is box)
+        new_lines = self.lines()
+        self.assertEqual(len(new_lines), 3)
+        for line in lines:
+            self.assertTrue(line in new_lines)
+        self.assertEqual(len(self.controller.canvas.components), 7)
+
+    def test_remove(self):
+        self.model.statements.remove(self.bstmt)
+        self.assertEqual(set(self.controller._nodes),
+                         set([self.astmt, self.cstmt]))
+        self.assertEqual(self.controller._edges.keys(),
+                         [(self.astmt, self.cstmt)])
+        self.assertEqual(len(self.controller.canvas.components), 3)
+
+    def test_modified_by_node(self):
+        line = self.controller._edges[(self.bstmt, self.cstmt)][0]
+        self.controller.update_nodes([], [], [self.cstmt])
+        self.assertFalse(line in self.lines())
+        self.assertEqual(len(self.lines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# System library imports
+import unittest
+
+# Local imports
+from blockcanvas.block_display.code_cache import CodeCache
+
+
+class CodeCacheTestCase(unittest.TestCase):
+
+    def test_compile(self):
+        cache = CodeCache()
+        code = cache.compile("a = b + 1")
+        context = dict(b=1)
+        exec code in {}, context
+        self.assertEqual(context['a'], 2)
+
+    def test_same_source_is_compiled_once(self):
+        cache = CodeCache()
+        code = cache.compile("a = b + 1")
+        self.assertTrue(cache.compile("a = b + 1") is code)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = CodeCache(max_size=2)
+        cache.compile("a = 1")
+        cache.compile("b = 2")
+        # Touch the first entry so that the second one is the oldest.
+        cache.compile("a = 1")
+        cache.compile("c = 3")
+        self.assertEqual(len(cache), 2)
+        self.assertTrue("a = 1" in cache)
+        self.assertFalse("b = 2" in cache)
+        self.assertTrue("c = 3" in cache)
+
+    def test_syntax_error(self):
+        cache = CodeCache()
+        self.assertRaises(SyntaxError, cache.compile, "a = (")
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+        cache = CodeCache()
+        cache.compile("a = 1")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -197,6 +197,23 @@ class ExecutionModelTestCase(unittest.TestCase):
         self.assertEqual(model.restricted(inputs=['b'], outputs=['c']).sorted_statements,
             [cstmt])
 
+    def test_restricted_cache(self):
+        model = self.exec_model
+        cstmt, dstmt, fstmt = model.statements
+        restricted = model.restricted(inputs=['e'])
+        self.assertTrue(model.restricted(inputs=('e',)) is restricted)
+        self.assertFalse(model.restricted(outputs=['e']) is restricted)
+
+        # Changing a binding invalidates the cache.
+        cstmt.inputs[0].binding = 'e'
+        restricted = model.restricted(inputs=['e'])
+        self.assertEqual(restricted.sorted_statements, [cstmt, dstmt, fstmt])
+
+        # So does removing a statement.
+        model.remove_function(fstmt)
+        self.assertEqual(model.restricted(inputs=['e']).sorted_statements,
+            [cstmt, dstmt])
+
     def test_execution(self):
         # These imports need to be inside these test functions in order to
         # preserve identity for some weird reason I haven't had time to
@@ -242,6 +259,82 @@ class ExecutionModelTestCase(unittest.TestCase):
         self.exec_model.execute(context, inputs=['b'], outputs=['c'])
         self.assertEqual(context, dict(a=2, b=3, e=10, c=6, d=12, f=60, add=add, mul=mul))
 
+    def test_incremental_execution(self):
+        from blockcanvas.debug.my_operator import add, mul
+        self.exec_model.incremental = True
+        context = self.simple_context
+        self.exec_model.execute(context)
+        self.assertEqual(context, dict(a=2, b=4, e=5, c=8, d=12, f=60, add=add, mul=mul))
+
+        # Only the statements downstream of `e` are executed again, so the
+        # tampered value of `c` is left alone.
+        context['c'] = -1
+        context['e'] = 4
+        self.exec_model.execute(context, inputs=['e'])
+        self.assertEqual(context, dict(a=2, b=4, e=4, c=-1, d=12, f=48, add=add, mul=mul))
+
+        context['b'] = 3
+        self.exec_model.execute(context, inputs=['b'])
+        self.assertEqual(context, dict(a=2, b=3, e=4, c=6, d=9, f=36, add=add, mul=mul))
+
+    def test_incremental_execution_restrict_outputs(self):
+        from blockcanvas.debug.my_operator import add, mul
+        self.exec_model.incremental = True
+        context = self.simple_context
+        self.exec_model.execute(context)
+        context['e'] = 10
+        self.exec_model.execute(context, inputs=['e'], outputs=['d'])
+        self.assertEqual(context['f'], 60)
+
+        # The statement left out is still out of date.
+        self.exec_model.execute(context, inputs=[])
+        self.assertEqual(context, dict(a=2, b=4, e=10, c=8, d=12, f=120, add=add, mul=mul))
+
+    def test_incremental_execution_changed_binding(self):
+        from blockcanvas.debug.my_operator import add, mul
+        self.exec_model.incremental = True
+        context = self.simple_context
+        self.exec_model.execute(context)
+        cstmt = self.exec_model.statements[0]
+        cstmt.inputs[1].binding = 'e'
+        self.exec_model.execute(context, inputs=[])
+        self.assertEqual(context, dict(a=2, b=4, e=5, c=10, d=14, f=70, add=add, mul=mul))
+
+    def test_parallel_execution(self):
+        code = "from blockcanvas.debug.my_operator import add, mul\n" \
+               "c = mul(a,b)\n" \
+               "d = add(a,b)\n" \
+               "f = mul(c,d)\n"
+        model = ExecutionModel.from_code(code)
+        for use_processes in (False, True):
+            model.trait_set(workers=2, use_processes=use_processes)
+            context = dict(a=2, b=4)
+            model.execute(context)
+            del context['add'], context['mul']
+            self.assertEqual(context, dict(a=2, b=4, c=8, d=6, f=48))
+
+    def test_parallel_incremental_execution(self):
+        from blockcanvas.debug.my_operator import add, mul
+        self.exec_model.trait_set(workers=2, incremental=True)
+        context = self.simple_context
+        self.exec_model.execute(context)
+        context['b'] = 3
+        self.exec_model.execute(context, inputs=['b'])
+        self.assertEqual(context, dict(a=2, b=3, e=5, c=6, d=9, f=45, add=add, mul=mul))
+
+    def test_execution_posts_single_event(self):
+        from blockcanvas.numerical_modeling.numeric_context.api import \
+            NumericContext
+        context = NumericContext()
+        context.update(self.simple_context)
+        events = []
+        context.on_trait_change(lambda event: events.append(event),
+                                'context_modified')
+        self.exec_model.execute(context)
+        self.assertEqual(len(events), 1)
+        self.assertTrue(set(['c', 'd', 'f']).issubset(events[0].changed))
+        self.assertFalse(context.defer_events)
+
     def test_mark_unsatisfied_inputs(self):
         inout = [
             (['a', 'b', 'e'], []),
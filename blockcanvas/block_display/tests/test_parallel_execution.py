@@ -0,0 +1,150 @@
+# System library imports
+import unittest
+
+# Local imports
+from blockcanvas.block_display.execution_model import ExecutionModel
+from blockcanvas.block_display.parallel_execution import (execute_statements,
+                                                          statement_levels)
+
+
+class StatementLevelsTestCase(unittest.TestCase):
+
+    def test_levels(self):
+        dep_graph = {'a': [], 'b': [], 'c': ['a'], 'd': ['a', 'c'], 'e': ['b']}
+        levels = statement_levels(['a', 'b', 'c', 'e', 'd'], dep_graph)
+        self.assertEqual(levels, [['a', 'b'], ['c', 'e'], ['d']])
+
+    def test_missing_dependencies_are_ignored(self):
+        dep_graph = {'c': ['a'], 'd': ['c']}
+        self.assertEqual(statement_levels(['c', 'd'], dep_graph),
+                         [['c'], ['d']])
+
+
+class Unpicklable(object):
+    """ A value which cannot be sent to a worker process, and which is its
+        own sum with anything.
+    """
+
+    def __add__(self, other):
+        return self
+
+    def __reduce__(self):
+        raise TypeError('Unpicklable cannot be pickled')
+
+
+class ExecuteStatementsTestCase(unittest.TestCase):
+
+    imports = "from blockcanvas.debug.my_operator import add, div, mul\n"
+
+    def model(self, code):
+        return ExecutionModel.from_code(self.imports + code)
+
+    def statements(self, model, *signatures):
+        """ The statements of the model with the given call signatures, in
+            that order.
+        """
+        by_signature = dict((stmt.call_signature.replace(' ', ''), stmt)
+                            for stmt in model.statements)
+        return [by_signature[signature.replace(' ', '')]
+                for signature in signatures]
+
+    def execute(self, model, statements, dep_graph, context, workers,
+                processes=False, executed=None):
+        """ Execute the statements in the context, and return the list of
+            the statements executed, which are also appended to executed.
+        """
+        if executed is None:
+            executed = []
+        globals = {}
+        exec model.imports_and_locals in globals, context
+        try:
+            for stmt in execute_statements(statements, dep_graph, globals,
+                                           context, workers, processes):
+                executed.append(stmt)
+        finally:
+            for name in ('add', 'div', 'mul'):
+                context.pop(name, None)
+        return executed
+
+    def test_same_as_serial(self):
+        model = self.model("c = mul(a, b)\n"
+                           "d = add(a, b)\n"
+                           "e = a - b\n"
+                           "f = mul(c, d)\n")
+        for workers, processes in [(2, False), (2, True)]:
+            context = dict(a=2, b=4)
+            executed = self.execute(model, model.sorted_statements,
+                                    model.dep_graph, context, workers,
+                                    processes)
+            self.assertEqual(context, dict(a=2, b=4, c=8, d=6, e=-2, f=48))
+            self.assertEqual(sorted(executed), sorted(model.statements))
+
+    def test_same_output_in_level(self):
+        # No statement reads c between the two which bind it, so they are
+        # in the same level, and the last one wins as in serial execution.
+        model = self.model("c = mul(a, b)\n"
+                           "d = add(a, b)\n"
+                           "c = a - b\n")
+        statements = self.statements(model, 'c = mul(a, b)', 'd = add(a, b)',
+                                     'c = a - b')
+        for workers, processes in [(0, False), (2, False), (2, True)]:
+            context = dict(a=5, b=3)
+            executed = self.execute(model, statements, {}, context, workers,
+                                    processes)
+            self.assertEqual(context, dict(a=5, b=3, c=2, d=8))
+            self.assertEqual(executed, statements)
+
+    def test_unpicklable_inputs(self):
+        # The calls whose inputs cannot be pickled are executed by threads.
+        model = self.model("c = add(u, a)\n"
+                           "d = add(a, b)\n")
+        unpicklable = Unpicklable()
+        context = dict(a=5, b=3, u=unpicklable)
+        self.execute(model, model.sorted_statements, model.dep_graph,
+                     context, 2, processes=True)
+        self.assertTrue(context['c'] is unpicklable)
+        self.assertEqual(context['d'], 8)
+
+    def test_dispatched_call_error(self):
+        # The calls of the level sent to the workers are still merged before
+        # the exception is raised, and the rest of the level is skipped.
+        model = self.model("c = div(a, z)\n"
+                           "d = add(a, b)\n"
+                           "e = a - b\n")
+        statements = self.statements(model, 'c = div(a, z)', 'd = add(a, b)',
+                                     'e = a - b')
+        for processes in (False, True):
+            context = dict(a=5, b=3, z=0)
+            executed = []
+            self.assertRaises(ZeroDivisionError, self.execute, model,
+                              statements, {}, context, 2, processes, executed)
+            self.assertEqual(executed, statements[1:2])
+            self.assertEqual(context, dict(a=5, b=3, z=0, d=8))
+
+    def test_statement_error(self):
+        model = self.model("c = mul(a, b)\n"
+                           "d = add(a, b)\n"
+                           "e = a / z\n")
+        statements = self.statements(model, 'e = a / z', 'c = mul(a, b)',
+                                     'd = add(a, b)')
+        for processes in (False, True):
+            context = dict(a=5, b=3, z=0)
+            executed = []
+            self.assertRaises(ZeroDivisionError, self.execute, model,
+                              statements, {}, context, 2, processes, executed)
+            self.assertEqual(executed, statements[1:])
+            self.assertEqual((context['c'], context['d']), (15, 8))
+            self.assertFalse('e' in context)
+
+    def test_serial_error(self):
+        model = self.model("c = mul(a, b)\n"
+                           "e = a / z\n")
+        statements = self.statements(model, 'e = a / z', 'c = mul(a, b)')
+        context = dict(a=5, b=3, z=0)
+        self.assertRaises(ZeroDivisionError, self.execute, model, statements,
+                          {}, context, 0)
+        self.assertEqual(context, dict(a=5, b=3, z=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
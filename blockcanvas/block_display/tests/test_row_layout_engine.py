@@ -1,5 +1,5 @@
 # Standard imports
-import unittest, os
+import unittest, os, warnings
 from random import randint
 
 # Enthought library imports
@@ -8,6 +8,7 @@ from traits.api import push_exception_handler, pop_exception_handler
 # Application imports
 from blockcanvas.block_display.execution_model import ExecutionModel
 from blockcanvas.block_display.block_graph_controller import BlockGraphController
+from blockcanvas.block_display.row_layout_engine import RowLayoutEngine
 
 
 # Module-level setup and teardown.
@@ -85,6 +86,75 @@ class RowLayoutEngineTestCase(unittest.TestCase):
         rows = self.controller.layout_engine.organize_rows({})
         assert rows == []
 
+    def test_cycle(self):
+        """ Is a cyclic graph rejected with a warning? """
+
+        warnings.simplefilter('ignore')
+        try:
+            rows = RowLayoutEngine().organize_rows({'a': ['b'], 'b': ['a']})
+        finally:
+            warnings.resetwarnings()
+        assert rows == []
+
+    def test_long_chain(self):
+        """ Is a chain longer than the recursion limit laid out? """
+
+        graph = {0: []}
+        for i in range(1, 5000):
+            graph[i] = [i - 1]
+        rows = RowLayoutEngine().organize_rows(graph)
+        self.assertEqual(rows, [[i] for i in range(5000)])
+
+    def test_roots_next_to_children(self):
+        """ Are nodes without dependencies put just above their children? """
+
+        graph = {'a': [], 'b': ['a'], 'c': ['b'], 'd': [], 'e': ['c', 'd']}
+        rows = RowLayoutEngine().organize_rows(graph)
+        self.assertEqual([sorted(row) for row in rows],
+                         [['a'], ['b'], ['c', 'd'], ['e']])
+
+    def test_crossings_removed(self):
+        """ Are the rows ordered so that the edges don't cross? """
+
+        graph = {'a': [], 'b': [], 'c': [], 'd': [],
+                 'e': ['a'], 'f': ['b'], 'g': ['c'], 'h': ['d'],
+                 'i': ['e', 'h'], 'j': ['f', 'g']}
+        rows = RowLayoutEngine().organize_rows(graph)
+        self.assertEqual(self._crossings(graph, rows), 0)
+
+    def test_incremental_layout(self):
+        """ Does a layout after an edit only move the nodes it affects? """
+
+        graph = {'a': [], 'b': [], 'c': ['a'], 'd': ['b'], 'e': ['a'],
+                 'f': ['c', 'd'], 'g': ['e']}
+        engine = RowLayoutEngine()
+        rows = engine.organize_rows(graph)
+        self.assertEqual(engine.organize_rows(graph), rows)
+
+        graph['h'] = ['b']
+        new_rows = engine.organize_rows(graph)
+        self.assertEqual(len(new_rows), len(rows))
+        for row, new_row in zip(rows, new_rows):
+            self.assertEqual([n for n in new_row if n != 'h'], row)
+        assert 'h' in new_rows[1]
+
+    #---------------------------------------------------------------------------
+    # Private interface
+    #---------------------------------------------------------------------------
+
+    def _crossings(self, graph, rows):
+        """ The number of crossings of the edges between consecutive rows.
+        """
+        crossings = 0
+        for upper, lower in zip(rows[:-1], rows[1:]):
+            edges = [(upper.index(parent), lower.index(child))
+                     for child in lower for parent in graph[child]]
+            for p1, c1 in edges:
+                for p2, c2 in edges:
+                    if p1 < p2 and c1 > c2:
+                        crossings += 1
+        return crossings
+
 if __name__ == '__main__':
     #import nose
     #nose.main()
@@ -0,0 +1,82 @@
+# System library imports
+import unittest
+
+# ETS imports
+from blockcanvas.block_display.execution_model import ExecutionModel
+from blockcanvas.block_display.statement_graph import StatementGraph
+from blockcanvas.function_tools.general_expression import GeneralExpression
+
+
+def expression(code):
+    ge = GeneralExpression()
+    ge.code = code
+    return ge
+
+
+class StatementGraphTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = ExecutionModel(statements=[expression('c = a + b'),
+                                                expression('d = c + b'),
+                                                expression('f = d * e')])
+
+    def assertGraphUpToDate(self):
+        """ The incrementally maintained graph is the one built from scratch.
+        """
+        model = self.model
+        rebuilt = StatementGraph(model.statements)
+        self.assertEqual(model.dep_graph, rebuilt.dep_graph)
+        self.assertEqual(set(model.sorted_statements),
+                         set(rebuilt.sorted_statements()))
+
+    def test_dependencies(self):
+        cstmt, dstmt, fstmt = self.model.statements
+        self.assertEqual(self.model.dep_graph,
+                         {cstmt: [], dstmt: [cstmt], fstmt: [dstmt]})
+        self.assertEqual(self.model.sorted_statements, [cstmt, dstmt, fstmt])
+
+    def test_add_and_remove(self):
+        cstmt, dstmt, fstmt = self.model.statements
+        self.model.dep_graph
+        estmt = expression('e = c * 2')
+        self.model.statements.insert(0, estmt)
+        self.assertEqual(set(self.model.dep_graph[fstmt]), set([dstmt, estmt]))
+        self.assertGraphUpToDate()
+
+        self.model.statements.remove(cstmt)
+        self.assertEqual(self.model.dep_graph[dstmt], [])
+        self.assertEqual(self.model.dep_graph[estmt], [])
+        self.assertGraphUpToDate()
+
+    def test_change_binding(self):
+        cstmt, dstmt, fstmt = self.model.statements
+        self.model.dep_graph
+        [iv] = [iv for iv in fstmt.inputs if iv.binding == 'd']
+        iv.binding = 'c'
+        self.assertEqual(self.model.dep_graph[fstmt], [cstmt])
+        self.assertGraphUpToDate()
+
+        dstmt.code = 'e = c + b'
+        self.assertEqual(set(self.model.dep_graph[fstmt]), set([cstmt, dstmt]))
+        self.assertGraphUpToDate()
+
+    def test_last_writer_provides(self):
+        cstmt, dstmt, fstmt = self.model.statements
+        self.model.dep_graph
+        dstmt2 = expression('d = a')
+        self.model.statements.append(dstmt2)
+        self.assertEqual(self.model.dep_graph[fstmt], [dstmt2])
+        self.model.statements.remove(dstmt2)
+        self.assertEqual(self.model.dep_graph[fstmt], [dstmt])
+        self.assertGraphUpToDate()
+
+    def test_sorted_statements_are_cached(self):
+        graph = StatementGraph(self.model.statements)
+        graph.sorted_statements()
+        sorted = graph._sorted
+        graph.update(self.model.statements[0])
+        self.assertTrue(graph._sorted is sorted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,8 @@ import pickle
 import warnings
 
 # Enthought library imports
-from traits.api import Any, Bool, Float, Instance
+from traits.api import Any, Bool, Dict, Float, Instance, \
+                       on_trait_change
 from enable.api import Canvas
 
 # Local imports
@@ -14,6 +15,7 @@ from selection_manager import SelectionManager
 from canvas_grid import CanvasGrid
 from canvas_box import CanvasBox
 from enable_line import EnableLine
+from spatial_index import SpatialIndex
 from canvas_selection_tool import CanvasSelectionTool
 from wiring_tool import WiringTool
 
@@ -57,6 +59,18 @@ class BlockCanvas(Canvas):
 
     _initial_layout_needed = Bool(True)
 
+    # Spatial index of the outer rectangles of the components, used to skip
+    # the components outside of the view when drawing.
+    _index = Instance(SpatialIndex, ())
+
+    # Components which moved or were resized since they were last indexed.
+    _moved = Dict
+
+    # Rank of each component in the draw order (lines, boxes, selected boxes,
+    # others).  Recomputed only when components are added or removed or a
+    # box's selection changes.
+    _draw_rank = Dict
+
     def __init__(self, *args, **kw):
         super(BlockCanvas, self).__init__(*args, **kw)
         # FIXME: Removing selection tool until we have better handle on
@@ -114,21 +128,8 @@ class BlockCanvas(Canvas):
         if self._initial_layout_needed and self.graph_controller is not None:
             self.graph_controller.position_nodes()
             self._initial_layout_needed = False
-        selected = []
-        boxes = []
-        lines = []
-        other = []
-        for c in self.components:
-            if isinstance(c, CanvasBox):
-                if c.selection_state in ['selected', 'coselected']:
-                    selected.append(c)
-                else:
-                    boxes.append(c)
-            elif isinstance(c, EnableLine):
-                lines.append(c)
-            else:
-                other.append(c)
-        self._components = lines + boxes + selected + other
+        if not self._draw_rank:
+            self._update_draw_order()
         super(BlockCanvas, self).draw(gc, view_bounds, mode)
 
     def remove(self, *components):
@@ -140,6 +141,41 @@ class BlockCanvas(Canvas):
         if len(components) == 1:
             self.request_redraw()
 
+    def components_at(self, x, y):
+        """ Overridden to hit test only the components whose rectangle, in
+            the spatial index, contains the point.  The components are
+            returned top-most first, as in the draw order.
+        """
+        if not self.is_in(x, y):
+            return []
+
+        if not self._draw_rank:
+            self._update_draw_order()
+        self._update_index()
+        x -= self.position[0]
+        y -= self.position[1]
+        rank = self._draw_rank
+        result = [c for c in self._index.query_point(x, y)
+                  if c in rank and c.is_in(x, y)]
+        result.sort(key=rank.get, reverse=True)
+        return result
+
+    def _get_visible_components(self, bounds):
+        """ Overridden to look up the components in the view in the spatial
+            index instead of testing every component, keeping the draw order.
+        """
+        if bounds is None:
+            return super(BlockCanvas, self)._get_visible_components(bounds)
+
+        if not self._draw_rank:
+            self._update_draw_order()
+        self._update_index()
+        rank = self._draw_rank
+        visible = [c for c in self._index.query(bounds)
+                   if c.visible and c in rank]
+        visible.sort(key=rank.get)
+        return visible
+
     def _container_handle_mouse_event(self, event, suffix):
         """ Overridden to enable drag/drop events.
             fixme: Should I mark events as handled?
@@ -166,8 +202,88 @@ class BlockCanvas(Canvas):
             self.overlays.remove(self.wiring_tool)
             self.wiring_tool_enabled = False
 
+    ### Private methods #####################################################
+
+    def _update_draw_order(self):
+        """ Sort the components in draw order: lines, boxes, selected boxes
+            and then any other component.
+        """
+        selected = []
+        boxes = []
+        lines = []
+        other = []
+        for c in self.components:
+            if isinstance(c, CanvasBox):
+                if c.selection_state in ['selected', 'coselected']:
+                    selected.append(c)
+                else:
+                    boxes.append(c)
+            elif isinstance(c, EnableLine):
+                lines.append(c)
+            else:
+                other.append(c)
+        order = lines + boxes + selected + other
+        if order != self._components:
+            self._components = order
+        self._draw_rank = dict((c, i) for i, c in enumerate(order))
+
+    def _update_index(self):
+        """ Index again the components which moved since the last draw.
+        """
+        if self._moved:
+            for c in self._moved:
+                self._index.insert(c, _outer_rect(c))
+            self._moved = {}
+
+    def _add_to_index(self, components):
+        for c in components:
+            if c not in self._index:
+                self._index.insert(c, _outer_rect(c))
+                c.on_trait_change(self._component_moved,
+                    'position,position_items,bounds,bounds_items')
+                if isinstance(c, CanvasBox):
+                    c.on_trait_change(self._component_selected,
+                                      'selection_state')
+
+    def _remove_from_index(self, components):
+        for c in components:
+            if c in self._index:
+                self._index.remove(c)
+                self._moved.pop(c, None)
+                c.on_trait_change(self._component_moved,
+                    'position,position_items,bounds,bounds_items',
+                    remove=True)
+                if isinstance(c, CanvasBox):
+                    c.on_trait_change(self._component_selected,
+                                      'selection_state', remove=True)
+
+    def _component_moved(self, object, name, new):
+        self._moved[object] = True
+
+    def _component_selected(self):
+        self._draw_rank = {}
+
     ### Trait listeners #####################################################
 
+    @on_trait_change('_components, _components_items')
+    def _update_components(self, object, name, old, new):
+        """ Keep the spatial index up to date with the components, and
+            recompute the draw order on the next draw when they change.
+        """
+        if name == '_components_items':
+            removed, added = new.removed, new.added
+        else:
+            current = set(new)
+            previous = set(old)
+            removed = [c for c in old if c not in current]
+            added = [c for c in new if c not in previous]
+
+        self._remove_from_index(removed)
+        self._add_to_index(added)
+        # The components may also have been reordered, e.g. by
+        # raise_component(), so compute the draw order again from them.
+        self._draw_rank = {}
+
     def _graph_controller_changed(self, old, new):
         if old is not None:
             old.container = None
@@ -175,4 +291,16 @@ class BlockCanvas(Canvas):
         if new is not None:
             new.container = self
 
+
+def _outer_rect(component):
+    """ The (x, y, width, height) rectangle a component draws within and
+        can be hit in.  Lines can be hit slightly outside of their bounds.
+    """
+    x, y = component.outer_position
+    width, height = component.outer_bounds
+    if isinstance(component, EnableLine):
+        t = component.tolerance
+        return (x - t, y - t, width + 2 * t, height + 2 * t)
+    return (x, y, width, height)
+
 # EOF
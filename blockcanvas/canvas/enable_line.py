@@ -36,6 +36,9 @@ class EnableLine(Component):
     # Whether to draw as a straight line or a bezier curve
     curve_type = Enum('line','curve')
 
+    # How close to the line do we have to be to hit it?
+    tolerance = Float(3)
+
     #########################################################################
     # Component traits
     #########################################################################
@@ -50,15 +53,14 @@ class EnableLine(Component):
         """ Hit test the line.  This method test whether we
             are within some distance (tolerance) of the line
             segment.
+
+            The BlockCanvas only calls this for the lines whose bounds,
+            expanded by the tolerance, contain the point.
         """
-        # fixme: This is likely to get slow for large numbers
-        #        of lines.
         pt1 = self.start_node.bottom_center
         pt2 = self.end_node.top_center
         mouse = [x,y]
-
-        # How close to the line do we have to be?
-        tolerance = 3
+        tolerance = self.tolerance
 
         # If the length of the enable_line is 0, returning False
         xdiff, ydiff = pt1[0]-pt2[0], pt1[1]-pt2[1]
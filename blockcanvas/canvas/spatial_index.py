@@ -0,0 +1,122 @@
+""" A uniform grid spatial index of rectangles on the canvas.
+
+    Each item is stored in every grid cell its rectangle overlaps, so the
+    items which may intersect a rectangle or contain a point are found by
+    looking at the few cells they cover instead of at every item.  Queries
+    return candidates whose rectangle intersects the query; exact hit tests
+    (e.g. on the line segment of an EnableLine) are left to the caller.
+"""
+
+from math import floor
+
+
+class SpatialIndex(object):
+    """ Grid index of items by their (x, y, width, height) rectangle.
+    """
+
+    #---------------------------------------------------------------------
+    # Public methods
+    #---------------------------------------------------------------------
+
+    def __init__(self, cell_size=256):
+        # Width and height of a grid cell, in canvas coordinates.
+        self.cell_size = float(cell_size)
+
+        # Maps each (column, row) cell to the set of items overlapping it.
+        self._cells = {}
+
+        # Maps each item to its rectangle and the cells it is stored in.
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def insert(self, item, rect):
+        """ Add an item with the given rectangle, or move it if it is already
+            in the index.
+        """
+        cells = self._cells_of(rect)
+        old = self._items.get(item)
+        if old is not None:
+            if old[1] == cells:
+                self._items[item] = (tuple(rect), cells)
+                return
+            self.remove(item)
+
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(item)
+        self._items[item] = (tuple(rect), cells)
+
+    def remove(self, item):
+        """ Remove an item from the index, if it is in it.
+        """
+        old = self._items.pop(item, None)
+        if old is None:
+            return
+        for cell in old[1]:
+            items = self._cells[cell]
+            items.discard(item)
+            if not items:
+                del self._cells[cell]
+
+    def clear(self):
+        """ Remove all the items from the index.
+        """
+        self._cells.clear()
+        self._items.clear()
+
+    def rect(self, item):
+        """ Returns the rectangle an item was indexed with.
+        """
+        return self._items[item][0]
+
+    def query(self, rect):
+        """ Returns the set of items whose rectangle intersects the given
+            (x, y, width, height) rectangle.
+        """
+        x, y, width, height = rect
+        x2 = x + width
+        y2 = y + height
+        result = set()
+        seen = set()
+        for cell in self._cells_of(rect):
+            for item in self._cells.get(cell, ()):
+                if item in seen:
+                    continue
+                seen.add(item)
+                ix, iy, iwidth, iheight = self._items[item][0]
+                if (ix <= x2 and x <= ix + iwidth and
+                    iy <= y2 and y <= iy + iheight):
+                    result.add(item)
+        return result
+
+    def query_point(self, x, y):
+        """ Returns the set of items whose rectangle contains the point.
+        """
+        cell = (int(floor(x / self.cell_size)),
+                int(floor(y / self.cell_size)))
+        result = set()
+        for item in self._cells.get(cell, ()):
+            ix, iy, width, height = self._items[item][0]
+            if ix <= x <= ix + width and iy <= y <= iy + height:
+                result.add(item)
+        return result
+
+    #---------------------------------------------------------------------
+    # Private methods
+    #---------------------------------------------------------------------
+
+    def _cells_of(self, rect):
+        """ Returns the tuple of the cells a rectangle overlaps.
+        """
+        x, y, width, height = rect
+        size = self.cell_size
+        col1 = int(floor(x / size))
+        col2 = int(floor((x + width) / size))
+        row1 = int(floor(y / size))
+        row2 = int(floor((y + height) / size))
+        return tuple([(col, row) for col in range(col1, col2 + 1)
+                                 for row in range(row1, row2 + 1)])
@@ -0,0 +1,156 @@
+import unittest
+
+from enable.api import Component
+
+from blockcanvas.canvas.block_canvas import BlockCanvas
+from blockcanvas.canvas.canvas_box import CanvasBox
+from blockcanvas.canvas.enable_line import EnableLine
+from blockcanvas.canvas.spatial_index import SpatialIndex
+
+
+class SpatialIndexTestCase(unittest.TestCase):
+
+    ###########################################################################
+    # TestCase Interface
+    ###########################################################################
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.index = SpatialIndex(cell_size=100)
+
+    ###########################################################################
+    # Tests
+    ###########################################################################
+
+    def test_query(self):
+        self.index.insert('a', (10, 10, 50, 50))
+        self.index.insert('b', (250, 250, 300, 20))
+        self.assertEqual(self.index.query((0, 0, 20, 20)), set(['a']))
+        self.assertEqual(self.index.query((500, 260, 10, 10)), set(['b']))
+        self.assertEqual(self.index.query((0, 0, 1000, 1000)),
+                         set(['a', 'b']))
+        self.assertEqual(self.index.query((70, 70, 100, 100)), set())
+
+    def test_query_point(self):
+        self.index.insert('a', (10, 10, 50, 50))
+        self.index.insert('b', (40, 40, 50, 50))
+        self.assertEqual(self.index.query_point(45, 45), set(['a', 'b']))
+        self.assertEqual(self.index.query_point(80, 80), set(['b']))
+        self.assertEqual(self.index.query_point(-5, 5), set())
+
+    def test_move_and_remove(self):
+        self.index.insert('a', (10, 10, 50, 50))
+        self.index.insert('a', (510, 10, 50, 50))
+        self.assertEqual(self.index.query_point(20, 20), set())
+        self.assertEqual(self.index.query_point(520, 20), set(['a']))
+        self.assertEqual(self.index.rect('a'), (510, 10, 50, 50))
+
+        self.index.remove('a')
+        self.index.remove('a')
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index._cells, {})
+
+    def test_negative_coordinates(self):
+        self.index.insert('a', (-150, -150, 20, 20))
+        self.assertEqual(self.index.query((-200, -200, 60, 60)), set(['a']))
+        self.assertEqual(self.index.query_point(-140, -140), set(['a']))
+
+
+class BlockCanvasCullingTestCase(unittest.TestCase):
+
+    ###########################################################################
+    # TestCase Interface
+    ###########################################################################
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.canvas = BlockCanvas(bounds=[1000, 1000])
+
+    ###########################################################################
+    # Tests
+    ###########################################################################
+
+    def test_visible_components_are_culled(self):
+        near = Component(position=[10, 10], bounds=[50, 50])
+        far = Component(position=[600, 600], bounds=[50, 50])
+        self.canvas.add(near, far)
+        self.assertEqual(self.canvas._get_visible_components((0, 0, 100, 100)),
+                         [near])
+
+    def test_moved_components_are_indexed_again(self):
+        component = Component(position=[600, 600], bounds=[50, 50])
+        self.canvas.add(component)
+        self.assertEqual(self.canvas._get_visible_components((0, 0, 100, 100)),
+                         [])
+        component.position = [20, 20]
+        self.assertEqual(self.canvas._get_visible_components((0, 0, 100, 100)),
+                         [component])
+        component.x = 700
+        self.assertEqual(self.canvas._get_visible_components((0, 0, 100, 100)),
+                         [])
+
+    def test_draw_order(self):
+        selected = CanvasBox(position=[10, 10], bounds=[30, 30])
+        box = CanvasBox(position=[20, 20], bounds=[30, 30])
+        other = Component(position=[0, 0], bounds=[60, 60])
+        self.canvas.add(other, selected, box)
+        selected.selection_state = 'selected'
+        self.assertEqual(self.canvas._get_visible_components((0, 0, 100, 100)),
+                         [box, selected, other])
+
+        # Boxes keep their relative order once unselected.
+        selected.selection_state = 'unselected'
+        self.assertEqual(self.canvas._get_visible_components((0, 0, 100, 100)),
+                         [box, selected, other])
+        self.assertEqual(self.canvas.components, [box, selected, other])
+
+
+class BlockCanvasHitTestCase(unittest.TestCase):
+
+    ###########################################################################
+    # TestCase Interface
+    ###########################################################################
+
+    def setUp(self):
+        unittest.TestCase.setUp(self)
+        self.canvas = BlockCanvas(bounds=[1000, 1000])
+
+    ###########################################################################
+    # Tests
+    ###########################################################################
+
+    def test_components_at_top_most_first(self):
+        bottom = CanvasBox(position=[10, 10], bounds=[50, 50])
+        top = CanvasBox(position=[30, 30], bounds=[50, 50])
+        self.canvas.add(bottom, top)
+        self.assertEqual(self.canvas.components_at(40, 40), [top, bottom])
+        self.assertEqual(self.canvas.components_at(20, 20), [bottom])
+        self.assertEqual(self.canvas.components_at(500, 500), [])
+
+        bottom.selection_state = 'selected'
+        self.assertEqual(self.canvas.components_at(40, 40), [bottom, top])
+
+    def test_components_at_moved_box(self):
+        box = CanvasBox(position=[10, 10], bounds=[50, 50])
+        self.canvas.add(box)
+        box.position = [500, 500]
+        self.assertEqual(self.canvas.components_at(20, 20), [])
+        self.assertEqual(self.canvas.components_at(520, 520), [box])
+
+    def test_components_at_line(self):
+        start = CanvasBox(position=[300, 300], bounds=[50, 50])
+        end = CanvasBox(position=[100, 100], bounds=[50, 50])
+        line = EnableLine(start_node=start, end_node=end)
+        self.canvas.add(start, end, line)
+        self.assertEqual(self.canvas.components_at(225, 225), [line])
+        # Inside the bounds of the line, but not on it.
+        self.assertEqual(self.canvas.components_at(140, 280), [])
+
+        # The line follows the box it ends at.
+        end.position = [0, 100]
+        self.assertEqual(self.canvas.components_at(225, 225), [])
+        self.assertEqual(self.canvas.components_at(175, 225), [line])
+
+
+if __name__ == '__main__':
+    unittest.main()
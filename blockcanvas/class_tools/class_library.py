@@ -2,12 +2,13 @@
 import os
 
 # Enthought library imports
-from traits.api import (HasTraits, Str, List, Dict,
+from traits.api import (HasTraits, Str, List, Dict, Int,
                                   Callable, implements)
 
 # Local imports
 from search_package import find_classes
 from blockcanvas.function_tools.search_package import get_module_path
+from blockcanvas.function_tools.scan_cache import get_scan_cache
 from i_minimal_class_info import MinimalClassInfo
 
 class ClassLibrary(HasTraits):
@@ -29,10 +30,10 @@ class ClassLibrary(HasTraits):
     """
 
         #fixme: I'm not sure this will handle zip files imports correctly.
-        #fixme: We do not do anything to try and update a cache if a module
-        #       on disk changes.
-        #fixme: If we cached module file names, their time stamp, and
-        #       the functions included in them, startup would be much faster.
+        #fixme: We do not do anything to try and update _module_cache if a
+        #       module on disk changes.  The files themselves are parsed
+        #       through the persistent scan cache, which only parses again
+        #       the files whose time stamp or size changed.
 
     ##########################################################################
     # FunctionLibrary traits
@@ -51,6 +52,10 @@ class ClassLibrary(HasTraits):
     # fixme: If someone assigns a function into this, will pickling break?
     class_factory = Callable(MinimalClassInfo)
 
+    # Number of worker processes parsing the files of a package when it is
+    # scanned.  The files are parsed in this process if it is 0.
+    scan_processes = Int(0)
+
     # Keep class list for modules cached so that we don't have search
     # for them each time there is an update.
     # fixme: Be careful about this so that we don't end up caching things
@@ -118,7 +123,7 @@ class ClassLibrary(HasTraits):
             # Use import to handle it.
             import_method = True
 
-        mod_and_name = find_classes(module, import_method)
+        mod_and_name = find_classes(module, import_method, self.scan_processes)
         clss = [self.class_factory(module=module,name=name)
                     for module, name in mod_and_name]
         return clss
@@ -138,6 +143,9 @@ class ClassLibrary(HasTraits):
                 self._module_cache[module] = clss
             classes.extend(clss)
 
+        # Keep the files scanned for the next session.
+        get_scan_cache().save()
+
         self.classes = classes
 
     ### trait listeners ######################################################
@@ -19,6 +19,7 @@ from blockcanvas.function_tools import _pkgutil
 from blockcanvas.function_tools.search_package import get_module_path, \
     find_package_sub_modules, find_path_sub_modules, python_path_from_file_path, \
     is_package, is_module
+from blockcanvas.function_tools.scan_cache import get_scan_cache
 
 # Globals
 logger = logging.getLogger(__name__)
@@ -28,7 +29,7 @@ logger = logging.getLogger(__name__)
 # Main function - this is probably the one you are interested in
 ##############################################################################
 
-def find_classes(package, import_method=False):
+def find_classes(package, import_method=False, processes=0):
     """ Recursively find all the classes in a package or module.
 
         By default, find_classes searches for classes by "scanning"
@@ -46,6 +47,10 @@ def find_classes(package, import_method=False):
         import_method: bool
             Default is False.   When True, modules are imported when
             searching for classes.
+        processes: int
+            Default is 0.  When more than 1, the files of a package are
+            parsed across that many worker processes.  Ignored when
+            import_method is True.
 
         Returns
         -------
@@ -58,7 +63,7 @@ def find_classes(package, import_method=False):
     if import_method:
         classes = find_classes_import(package)
     else:
-        classes = find_classes_ast(package)
+        classes = find_classes_ast(package, processes)
 
     return classes
 
@@ -66,43 +71,37 @@ def find_classes(package, import_method=False):
 # Search helper functions/classes
 ##############################################################################
 
-def find_classes_ast(package):
+def find_classes_ast(package, processes=0):
     """ Find classes by traversing an abstract syntax tree generated by the
         compiler module.
         fixme: expand docstring, possibly provide response about non-existant
         modules/packages
+
+        The files are parsed through the shared scan cache, so only those
+        which changed since they were last scanned are parsed again.  If
+        processes is more than 1, they are parsed across that many worker
+        processes.
     """
+    scan_cache = get_scan_cache()
     classes = []
     # It is a package (ie a directory)
     if is_package(package):
         package_path = get_module_path(package)
         file_paths = find_package_sub_modules(package)
-        for file_path in file_paths:
-            try:
-                file = open(file_path)
-                # Adding a new line to the source, so that compile wouldn't
-                # throw a SyntaxError on EOF comment
-                source = file.read().replace('\r\n','\n')+'\n'
-                ast = compile(source, file_path,'exec', _ast.PyCF_ONLY_AST)
-                file.close()
-                python_path = python_path_from_file_path(package, file_path, package_path=package_path)
-                classes.extend(visit_ast_node(ast, file_path, python_path))
-            except SyntaxError:
+        results = scan_cache.scan_files(file_paths, processes)
+        for file_path, names in zip(file_paths, results):
+            if names is None:
                 msg = 'SyntaxError in parsing file %s'% file_path
                 logger.error(msg)
+                continue
+            python_path = python_path_from_file_path(package, file_path, package_path=package_path)
+            classes.extend((python_path, name) for name in names[1])
 
     # It is a module (ie a .py file)
     elif is_module(package):
         file_path = get_module_path(package)
-        file = open(file_path)
-
-        # Adding a new line to the source, so that compile wouldn't
-        # throw a SyntaxError on EOF comment
-        source = file.read().replace('\r\n','\n')+'\n'
-
-        ast = compile(source, file_path, 'exec', _ast.PyCF_ONLY_AST)
-        file.close()
-        classes.extend(visit_ast_node(ast, file_path, package))
+        names = scan_cache.scan(file_path)[1]
+        classes.extend((package, name) for name in names)
 
     return classes
 
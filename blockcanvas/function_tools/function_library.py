@@ -2,11 +2,12 @@
 import os
 
 # Enthought library imports
-from traits.api import (HasTraits, Str, List, Dict,
+from traits.api import (HasTraits, Str, List, Dict, Int,
                                   Callable, implements)
 
 # Local imports
 from search_package import find_functions, get_module_path
+from scan_cache import get_scan_cache
 from i_minimal_function_info import MinimalFunctionInfo
 
 class FunctionLibrary(HasTraits):
@@ -28,10 +29,10 @@ class FunctionLibrary(HasTraits):
     """
 
         #fixme: I'm not sure this will handle zip files imports correctly.
-        #fixme: We do not do anything to try and update a cache if a module
-        #       on disk changes.
-        #fixme: If we cached module file names, their time stamp, and
-        #       the functions included in them, startup would be much faster.
+        #fixme: We do not do anything to try and update _module_cache if a
+        #       module on disk changes.  The files themselves are parsed
+        #       through the persistent scan cache, which only parses again
+        #       the files whose time stamp or size changed.
 
     ##########################################################################
     # FunctionLibrary traits
@@ -50,6 +51,10 @@ class FunctionLibrary(HasTraits):
     # fixme: If someone assigns a function into this, will pickling break?
     function_factory = Callable(MinimalFunctionInfo)
 
+    # Number of worker processes parsing the files of a package when it is
+    # scanned.  The files are parsed in this process if it is 0.
+    scan_processes = Int(0)
+
     # Keep function list for modules cached so that we don't have search
     # for them each time there is an update.
     # fixme: Be careful about this so that we don't end up caching things
@@ -117,7 +122,7 @@ class FunctionLibrary(HasTraits):
             # Use import to handle it.
             import_method = True
 
-        mod_and_name = find_functions(module, import_method)
+        mod_and_name = find_functions(module, import_method, self.scan_processes)
         funcs = [self.function_factory(module=module,name=name)
                     for module, name in mod_and_name]
         return funcs
@@ -137,6 +142,9 @@ class FunctionLibrary(HasTraits):
                 self._module_cache[module] = funcs
             functions.extend(funcs)
 
+        # Keep the files scanned for the next session.
+        get_scan_cache().save()
+
         self.functions = functions
 
     ### trait listeners ######################################################
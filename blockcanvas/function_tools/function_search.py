@@ -5,13 +5,108 @@
 import re
 
 # Enthought library imports.
-from traits.api import HasTraits, List, Str, on_trait_change, Bool
+from traits.api import (HasTraits, List, Str, on_trait_change, Bool, Any,
+    Instance)
 
 # Local imports
 
 # Global variables
 #NEW_FUNC_NAME = 'Add new function'
 
+# Search terms made only of these characters are plain text with '*' and '.'
+# wildcards. Every other piece of such a term has to appear in the searched
+# text, so they can be looked up in the index.
+simple_term = re.compile(r'^[\w\s.*,]*$')
+
+
+class FunctionSearchIndex(object):
+    """ Trigram index over the lower case names and modules of functions.
+
+        The index gives the functions whose name and/or module contain every
+        literal piece of a search term.  The candidates it returns still have
+        to be checked against the search patterns, but only a small fraction
+        of the functions usually are.
+    """
+
+    def __init__(self, functions):
+        # The indexed functions.  Functions are referred to by their position
+        # in this list.
+        self.functions = list(functions)
+
+        # Lower case names and modules of the functions.
+        self.names = [function.name.lower() for function in self.functions]
+        self.modules = [function.module.lower() for function in self.functions]
+
+        # Position of each function when they are sorted by name, ignoring
+        # case.  Sorting positions is much cheaper than sorting names.
+        order = sorted(xrange(len(self.functions)),
+                       key=self.names.__getitem__)
+        self.rank = [0] * len(order)
+        for rank, position in enumerate(order):
+            self.rank[position] = rank
+
+        self._name_trigrams = self._build_trigrams(self.names)
+        self._module_trigrams = self._build_trigrams(self.modules)
+
+        # Positions excluded by the (name_filters, module_filters) pairs.
+        self._excluded = {}
+
+    def candidates(self, term, search_name=True, search_module=True):
+        """ Return the positions of the functions which may match the term,
+            or None if the term cannot be looked up in the index.
+        """
+        if not simple_term.match(term):
+            return None
+
+        result = set()
+        for pattern in term.split(','):
+            pieces = [piece for piece in re.split(r'[\W]+', pattern.lower())
+                      if len(piece) >= 3]
+            if not pieces:
+                # Short pieces are too common to be worth looking up.
+                return None
+            if search_name:
+                result.update(self._lookup(self._name_trigrams, pieces))
+            if search_module:
+                result.update(self._lookup(self._module_trigrams, pieces))
+        return result
+
+    def excluded(self, name_filters, module_filters):
+        """ Return the set of positions of the functions which match the
+            filters.
+        """
+        key = (name_filters, module_filters)
+        if key not in self._excluded:
+            excluded = set()
+            for filter in regex_from_str(name_filters, match_anywhere=False):
+                excluded.update(i for i, function in enumerate(self.functions)
+                                if filter.match(function.name) is not None)
+            for filter in regex_from_str(module_filters, match_anywhere=False):
+                excluded.update(i for i, function in enumerate(self.functions)
+                                if filter.match(function.module) is not None)
+            self._excluded[key] = excluded
+        return self._excluded[key]
+
+    def _build_trigrams(self, strings):
+        trigrams = {}
+        for position, string in enumerate(strings):
+            for i in xrange(len(string) - 2):
+                trigrams.setdefault(string[i:i+3], set()).add(position)
+        return trigrams
+
+    def _lookup(self, trigrams, pieces):
+        """ Positions of the strings containing every trigram of the pieces.
+        """
+        keys = set(piece[i:i+3] for piece in pieces
+                   for i in xrange(len(piece) - 2))
+        postings = sorted((trigrams.get(key, set()) for key in keys), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
 
 class FunctionSearch(HasTraits):
     """ Very simple function searching.
@@ -55,6 +150,14 @@ class FunctionSearch(HasTraits):
     # List of objects that have module and name as string attributes.
     all_functions = List
 
+    # The index over all_functions.  It is built on the first search after
+    # all_functions changes.
+    _index = Instance(FunctionSearchIndex)
+
+    # The term, search flags and matching positions of the last search.  A
+    # search for a longer term only needs to look at these matches.
+    _last_search = Any
+
 
     #########################################################################
     # object interface
@@ -75,77 +178,101 @@ class FunctionSearch(HasTraits):
     ##########################################################################
 
     @on_trait_change('search_term', 'name_filters', 'module_filters',
-                     'search_name', 'search_module', 'all_functions')
+                     'search_name', 'search_module', 'all_functions',
+                     'all_functions_items')
     def do_search(self):
         """ Perform search using the current search term
         """
+        if self._index is None:
+            self._index = FunctionSearchIndex(self.all_functions)
 
-        items = self._match_anywhere()
-        items = self._move_leading_matches_to_front(items)
-        items = self._filter_unwanted_functions(items)
+        positions = self._match_anywhere()
+        positions = self._move_leading_matches_to_front(positions)
+        positions = self._filter_unwanted_functions(positions)
 
-        self.search_results = items
+        functions = self._index.functions
+        self.search_results = [functions[i] for i in positions]
 
     def _match_anywhere(self):
         """ Match search term to function name and/or module name, by
             matching the search patterns anywhere within the strings.
+
+            Returns the positions of the matching functions in the index.
         """
-        items = []
-        # First, match filters anywhere within function name and module.
-        filters = regex_from_str(self.search_term, match_anywhere=True)
-        for function in self.all_functions:
+        index = self._index
+        term = self.search_term
+        flags = (self.search_name, self.search_module)
+
+        # Only look at the functions which may match: the matches of the
+        # last search if the term just grew, or the candidates from the index.
+        positions = index.candidates(term, *flags)
+        if self._last_search is not None:
+            last_term, last_flags, last_matches = self._last_search
+            if (flags == last_flags and simple_term.match(last_term) and
+                term.startswith(last_term) and
+                ',' not in term[len(last_term):]):
+                if positions is None:
+                    positions = last_matches
+                else:
+                    positions = positions.intersection(last_matches)
+        if positions is None:
+            positions = xrange(len(index.functions))
+
+        matches = set()
+        filters = regex_from_str(term, match_anywhere=True)
+        for i in positions:
             for filter in filters:
                 if (self.search_name and
-                    filter.match(function.name) is not None):
-                    items.append(function)
+                    filter.match(index.names[i]) is not None):
+                    matches.add(i)
                     break
                 elif (self.search_module and
-                      filter.match(function.module) is not None):
-                    items.append(function)
+                      filter.match(index.modules[i]) is not None):
+                    matches.add(i)
                     break
 
-        return items
+        self._last_search = (term, flags, matches)
+        return matches
 
-    def _move_leading_matches_to_front(self, items):
+    def _move_leading_matches_to_front(self, positions):
         """ Move functions that match at the beginning of the function name
             to the front of the list.  The returned list is sorted
             alphabetically otherwise.
         """
-        # leading will hold these functions anditems will hold all the others.
+        index = self._index
+        # leading will hold these functions and others all the others.
         leading = []
+        others = []
         filters = regex_from_str(self.search_term, match_anywhere=False)
-
-        # iterate over a copy of the list because we are going to modify
-        # the original in the loop.
-        for function in items[:]:
-            for filter in filters:
-                if (self.search_name and
-                    filter.match(function.name) is not None):
-                    items.remove(function)
-                    leading.append(function)
-                    break
-
-        # Sort the individual list.
-        def cmp_name(x,y):
-            """ Compare the name of the functions, ignoring case
-            """
-            return cmp(x.name.lower(), y.name.lower())
+        for i in positions:
+            if self.search_name and any(filter.match(index.names[i])
+                                        for filter in filters):
+                leading.append(i)
+            else:
+                others.append(i)
 
         # Now, reconstruct the list with leading functions first.
-        result = sorted(leading, cmp=cmp_name) + sorted(items, cmp=cmp_name)
-        return result
+        key = index.rank.__getitem__
+        return sorted(leading, key=key) + sorted(others, key=key)
 
-    def _filter_unwanted_functions(self, items):
+    def _filter_unwanted_functions(self, positions):
         """ And remove out any functions that match the filters.
         """
-        for filter in regex_from_str(self.name_filters, match_anywhere=False):
-            items = [ function for function in items
-                          if filter.match(function.name) is None ]
-        for filter in regex_from_str(self.module_filters, match_anywhere=False):
-            items = [ function for function in items
-                          if filter.match(function.module) is None ]
-
-        return items
+        excluded = self._index.excluded(self.name_filters,
+                                        self.module_filters)
+        return [i for i in positions if i not in excluded]
+
+    ##########################################################################
+    # Trait Event Handlers
+    ##########################################################################
+
+    def _all_functions_changed(self):
+        self._index = None
+        self._last_search = None
+
+    def _all_functions_items_changed(self):
+        self._index = None
+        self._last_search = None
 
 ##############################################################################
 # Utilitiy functions
@@ -0,0 +1,208 @@
+""" Persistent cache of the functions and classes defined in python files.
+
+    Scanning a package for functions or classes parses every one of its
+    files.  The names found in each file are cached, keyed by the file's path
+    and checked against its modification time and size, so that only the
+    files which changed since the last scan are parsed again.  The cache is
+    shared by function_tools.search_package and class_tools.search_package,
+    and saved to disk between sessions.
+"""
+
+# Standard library imports
+import atexit
+import cPickle
+import multiprocessing
+import os
+import _ast
+import logging
+
+# Enthought library imports
+from traits.etsconfig.api import ETSConfig
+
+# Globals
+logger = logging.getLogger(__name__)
+
+# Bump this when the format of the cache entries changes.
+CACHE_VERSION = 1
+
+
+class ScanCache(object):
+    """ Cache of the top level function and class names of python files.
+    """
+
+    def __init__(self, filename=None):
+        # The file the cache is loaded from and saved to.  If None, the cache
+        # only lives in memory.
+        self.filename = filename
+
+        # Maps file paths to (mtime, size, function_names, class_names).
+        # The names are None when the file has a syntax error.
+        self._entries = {}
+
+        # Whether the entries changed since the cache was loaded or saved.
+        self._modified = False
+
+        if filename is not None:
+            self.load()
+
+    def scan(self, file_path):
+        """ Return the lists of top level function names and class names
+            defined in a python file.
+
+            The file is only parsed if it changed since it was last scanned.
+            Raises a SyntaxError if the file cannot be parsed.
+        """
+        names = self.scan_files([file_path])[0]
+        if names is None:
+            raise SyntaxError('invalid syntax in %s' % file_path)
+        return names
+
+    def scan_files(self, file_paths, processes=0):
+        """ Return the (function_names, class_names) pairs of several files,
+            or None for the files which cannot be parsed.
+
+            The files which changed since they were last scanned are parsed
+            across a pool of *processes* worker processes, or in this process
+            if it is 0.
+        """
+        stale = []
+        for file_path in file_paths:
+            entry = self._entries.get(file_path)
+            if entry is None or entry[:2] != _file_key(file_path):
+                stale.append(file_path)
+
+        if stale:
+            if processes > 1 and len(stale) > 1:
+                pool = multiprocessing.Pool(processes)
+                try:
+                    chunksize = max(1, len(stale) // (4 * processes))
+                    entries = pool.map(_scan_entry, stale, chunksize)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                entries = map(_scan_entry, stale)
+            self._entries.update(zip(stale, entries))
+            self._modified = True
+
+        result = []
+        for file_path in file_paths:
+            entry = self._entries[file_path]
+            if entry[2] is None:
+                result.append(None)
+            else:
+                result.append(entry[2:])
+        return result
+
+    def clear(self):
+        """ Forget about all the files scanned.
+        """
+        self._entries.clear()
+        self._modified = True
+
+    def load(self):
+        """ Load the entries from the cache file, if it is usable.
+        """
+        try:
+            f = open(self.filename, 'rb')
+            try:
+                version, entries = cPickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            # A missing or corrupt cache is just an empty one.
+            return
+
+        if version == CACHE_VERSION:
+            self._entries = entries
+            self._modified = False
+
+    def save(self):
+        """ Save the entries to the cache file if they changed.
+        """
+        if self.filename is None or not self._modified:
+            return
+
+        try:
+            dirname = os.path.dirname(self.filename)
+            if dirname and not os.path.isdir(dirname):
+                os.makedirs(dirname)
+
+            # Write to a temporary file first so that an interrupted save
+            # never leaves a truncated cache behind.
+            tmp_filename = self.filename + '.tmp'
+            f = open(tmp_filename, 'wb')
+            try:
+                cPickle.dump((CACHE_VERSION, self._entries), f,
+                             cPickle.HIGHEST_PROTOCOL)
+            finally:
+                f.close()
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            os.rename(tmp_filename, self.filename)
+            self._modified = False
+        except (IOError, OSError):
+            logger.exception('Could not save the scan cache to %s',
+                             self.filename)
+
+
+##########################################################################
+# Utility functions
+##########################################################################
+
+def parse_file(file_path):
+    """ Return the lists of top level function names and class names
+        defined in a python file.
+    """
+    file = open(file_path)
+    try:
+        # Adding a new line to the source, so that compile wouldn't
+        # throw a SyntaxError on EOF comment
+        source = file.read().replace('\r\n','\n')+'\n'
+    finally:
+        file.close()
+    ast = compile(source, file_path, 'exec', _ast.PyCF_ONLY_AST)
+
+    function_names = []
+    class_names = []
+    for child in ast.body:
+        if isinstance(child, _ast.FunctionDef):
+            function_names.append(child.name)
+        elif isinstance(child, _ast.ClassDef):
+            class_names.append(child.name)
+
+    return function_names, class_names
+
+
+def _file_key(file_path):
+    """ The (mtime, size) of a file, which tells whether it changed.
+    """
+    stat = os.stat(file_path)
+    return (stat.st_mtime, stat.st_size)
+
+def _scan_entry(file_path):
+    """ Return the cache entry for a file, parsing it.  This runs in the
+        worker processes of ScanCache.scan_files.
+    """
+    key = _file_key(file_path)
+    try:
+        function_names, class_names = parse_file(file_path)
+    except SyntaxError:
+        function_names = class_names = None
+    return key + (function_names, class_names)
+
+
+# The cache shared by the searches, created on first use.
+_scan_cache = None
+
+def get_scan_cache():
+    """ Return the shared scan cache, saved in the application data
+        directory when the application exits.
+    """
+    global _scan_cache
+    if _scan_cache is None:
+        filename = os.path.join(ETSConfig.application_data, 'block_canvas',
+                                'scan_cache.pickle')
+        _scan_cache = ScanCache(filename)
+        atexit.register(_scan_cache.save)
+    return _scan_cache
@@ -25,6 +25,7 @@ import logging
 
 
 import _pkgutil # local copy of Python 2.5 pkgutil.py
+from scan_cache import get_scan_cache
 
 # Globals
 logger = logging.getLogger(__name__)
@@ -34,7 +35,7 @@ logger = logging.getLogger(__name__)
 # Main function - this is probably the one you are interested in
 ##############################################################################
 
-def find_functions(package, import_method=False):
+def find_functions(package, import_method=False, processes=0):
     """ Recursively find all the functions in a package or module.
 
         By default, find_functions searches for functions by "scanning"
@@ -52,6 +53,10 @@ def find_functions(package, import_method=False):
         import_method: bool
             Default is False.   When True, modules are imported when
             searching for functions.
+        processes: int
+            Default is 0.  When more than 1, the files of a package are
+            parsed across that many worker processes.  Ignored when
+            import_method is True.
 
         Returns
         -------
@@ -64,7 +69,7 @@ def find_functions(package, import_method=False):
     if import_method:
         functions = find_functions_import(package)
     else:
-        functions = find_functions_ast(package)
+        functions = find_functions_ast(package, processes)
 
     return functions
 
@@ -72,43 +77,37 @@ def find_functions(package, import_method=False):
 # Search helper functions/classes
 ##############################################################################
 
-def find_functions_ast(package):
+def find_functions_ast(package, processes=0):
     """ Find functions by traversing an abstract syntax tree generated by the
         compiler module.
         fixme: expand docstring, possibly provide response about non-existant
         modules/packages
+
+        The files are parsed through the shared scan cache, so only those
+        which changed since they were last scanned are parsed again.  If
+        processes is more than 1, they are parsed across that many worker
+        processes.
     """
+    scan_cache = get_scan_cache()
     functions = []
     # It is a package (ie a directory)
     if is_package(package):
         package_path = get_module_path(package)
         file_paths = find_package_sub_modules(package)
-        for file_path in file_paths:
-            try:
-                file = open(file_path)
-                # Adding a new line to the source, so that compile wouldn't
-                # throw a SyntaxError on EOF comment
-                source = file.read().replace('\r\n','\n')+'\n'
-                ast = compile(source, file_path,'exec', _ast.PyCF_ONLY_AST)
-                file.close()
-                python_path = python_path_from_file_path(package, file_path, package_path=package_path)
-                functions.extend(visit_ast_node(ast, file_path, python_path))
-            except SyntaxError:
+        results = scan_cache.scan_files(file_paths, processes)
+        for file_path, names in zip(file_paths, results):
+            if names is None:
                 msg = 'SyntaxError in parsing file %s'% file_path
                 logger.error(msg)
+                continue
+            python_path = python_path_from_file_path(package, file_path, package_path=package_path)
+            functions.extend((python_path, name) for name in names[0])
 
     # It is a module (ie a .py file)
     elif is_module(package):
         file_path = get_module_path(package)
-        file = open(file_path)
-
-        # Adding a new line to the source, so that compile wouldn't
-        # throw a SyntaxError on EOF comment
-        source = file.read().replace('\r\n','\n')+'\n'
-
-        ast = compile(source, file_path, 'exec', _ast.PyCF_ONLY_AST)
-        file.close()
-        functions.extend(visit_ast_node(ast, file_path, package))
+        names = scan_cache.scan(file_path)[0]
+        functions.extend((package, name) for name in names)
 
     return functions
 
@@ -6,7 +6,9 @@ import unittest
 
 # local imports
 from blockcanvas.function_tools.function_search import \
-    FunctionSearch
+    FunctionSearch, FunctionSearchIndex
+from blockcanvas.function_tools.i_minimal_function_info import \
+    MinimalFunctionInfo
 from blockcanvas.function_tools.function_library import \
     FunctionLibrary
 
@@ -130,6 +132,48 @@ class FunctionSearchTestCase(unittest.TestCase):
         fs.all_functions = library.functions
         self.assertNotEqual(len(fs.search_results), 0)
 
+    def test_leading_matches_first(self):
+        """ Are functions starting with the search term listed first?
+        """
+        functions = [MinimalFunctionInfo(module=module, name=name)
+                     for module, name in [('a', 'Rexec'), ('b', 'exec_b'),
+                                          ('c', 'aexec'), ('d', 'Exec_a')]]
+        fs = FunctionSearch(all_functions=functions)
+        fs.search_term = 'exec'
+        actual = [function.name for function in fs.search_results]
+        self.assertEqual(actual, ['Exec_a', 'exec_b', 'aexec', 'Rexec'])
+
+    def test_growing_search_term(self):
+        """ Does narrowing down the previous results give the same results as
+            a new search?
+        """
+        for term in ['e', 'ex', 'exe', 'exec', 'execl', 'execlp', 'exec',
+                     'execl*e', 'execl*e,spawn']:
+            self.fs.search_term = term
+            fresh = FunctionSearch(all_functions=self.fs.all_functions,
+                                   search_term=term)
+            self.assertEqual(self.fs.search_results, fresh.search_results)
+
+
+class FunctionSearchIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FunctionSearchIndex(
+            [MinimalFunctionInfo(module=module, name=name)
+             for module, name in [('os', 'execl'), ('os.path', 'join'),
+                                  ('numpy', 'exp')]])
+
+    def test_candidates(self):
+        self.assertEqual(self.index.candidates('EXEC'), set([0]))
+        self.assertEqual(self.index.candidates('os.*join'), set([1]))
+        self.assertEqual(self.index.candidates('exec, path'), set([0, 1]))
+        self.assertEqual(self.index.candidates('join', search_name=False),
+                         set())
+
+    def test_no_candidates_for_short_or_complex_terms(self):
+        self.assertEqual(self.index.candidates('ex'), None)
+        self.assertEqual(self.index.candidates('ex?ec'), None)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,96 @@
+# Standard library imports
+import os
+import shutil
+import tempfile
+import unittest
+
+# Local imports
+from blockcanvas.function_tools.scan_cache import ScanCache
+
+
+class ScanCacheTestCase(unittest.TestCase):
+
+    ##########################################################################
+    # TestCase interface
+    ##########################################################################
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.dir, 'module.py')
+        self.write("def foo():\n    pass\n\nclass Bar(object):\n    pass\n")
+        self.cache_path = os.path.join(self.dir, 'cache', 'scan.pickle')
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        unittest.TestCase.tearDown(self)
+
+    def write(self, source):
+        f = open(self.file_path, 'w')
+        f.write(source)
+        f.close()
+
+    ##########################################################################
+    # ScanCacheTestCase interface
+    ##########################################################################
+
+    def test_scan(self):
+        cache = ScanCache()
+        self.assertEqual(cache.scan(self.file_path), (['foo'], ['Bar']))
+
+    def test_changed_file_is_parsed_again(self):
+        cache = ScanCache()
+        cache.scan(self.file_path)
+        self.write("def foo():\n    pass\n\ndef baz():\n    pass\n")
+        self.assertEqual(cache.scan(self.file_path), (['foo', 'baz'], []))
+
+    def test_syntax_error(self):
+        cache = ScanCache()
+        self.write("def foo(:\n")
+        self.assertRaises(SyntaxError, cache.scan, self.file_path)
+        # The failure is cached as well.
+        self.assertRaises(SyntaxError, cache.scan, self.file_path)
+
+    def test_persistence(self):
+        cache = ScanCache(self.cache_path)
+        cache.scan(self.file_path)
+        cache.save()
+
+        # The entry is reused as long as the file does not change, so a
+        # tampered entry is returned as is.
+        cache = ScanCache(self.cache_path)
+        entry = cache._entries[self.file_path]
+        cache._entries[self.file_path] = entry[:2] + (['cached'], [])
+        self.assertEqual(cache.scan(self.file_path), (['cached'], []))
+
+    def test_corrupt_cache_file(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        f = open(self.cache_path, 'w')
+        f.write('garbage')
+        f.close()
+        cache = ScanCache(self.cache_path)
+        self.assertEqual(cache.scan(self.file_path), (['foo'], ['Bar']))
+
+    def test_scan_files_in_processes(self):
+        paths = [self.file_path]
+        for i in range(3):
+            path = os.path.join(self.dir, 'module%d.py' % i)
+            f = open(path, 'w')
+            f.write("def foo%d():\n    pass\n" % i)
+            f.close()
+            paths.append(path)
+        bad_path = os.path.join(self.dir, 'bad.py')
+        f = open(bad_path, 'w')
+        f.write("def foo(:\n")
+        f.close()
+        paths.append(bad_path)
+
+        results = ScanCache().scan_files(paths, processes=2)
+        self.assertEqual(results, ScanCache().scan_files(paths))
+        self.assertEqual(results[0], (['foo'], ['Bar']))
+        self.assertEqual(results[2], (['foo1'], []))
+        self.assertEqual(results[-1], None)
+
+
+if __name__ == '__main__':
+    unittest.main()
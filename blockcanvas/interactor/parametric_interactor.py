@@ -2,8 +2,8 @@
 
     1. It should display all keys of the context with a Low-High-Step to be
         filled up.
-    2. Changes in these boxes should create appropriate shadows in the
-        parametric context.
+    2. The block is then executed for all the combinations of the values
+        of these ranges by a ParametricSweep.
 
 """
 
@@ -11,17 +11,19 @@
 import logging
 
 # ETS imports
-from traits.api import Instance, Any, Button
+from traits.api import Instance, Any, Bool, Button, Int
 from traitsui.api import (Item, InstanceEditor, View, HGroup, Group,
                                      spring)
 
 # Application imports
+from codetools.blocks.api import Block
 from codetools.contexts.i_context import IListenableContext
+from blockcanvas.numerical_modeling.workflow.study.parametric.sweep import \
+     ParametricSweep, SweepResults
 
 # Local imports
 from parametric_item import ParametricItem
 from simple_interactor import SimpleInteractor
-from utils import add_list_to_listed_list
 
 # Logger
 logger = logging.getLogger(__name__)
@@ -32,9 +34,24 @@ logger = logging.getLogger(__name__)
 
 class ParametricInteractor(SimpleInteractor):
 
-    update_contexts_button = Button('Create shadow contexts')
+    update_contexts_button = Button('Run sweep')
     context = Instance(IListenableContext, adapt='yes')
 
+    # The block executed for the combinations of the inputs.
+    block = Instance(Block)
+
+    # Results of the last sweep over the combinations of the inputs.
+    sweep_results = Instance(SweepResults)
+
+    # Number of worker processes executing the combinations when the block
+    # cannot execute them all at once.
+    workers = Int(0)
+
+    # Whether to execute all the combinations at once, on the stacked inputs.
+    # Only set it for blocks whose functions compute each combination
+    # independently of the others.
+    vectorize = Bool(False)
+
     #---------------------------------------------------------------------------
     #  object interface
     #---------------------------------------------------------------------------
@@ -44,7 +61,8 @@ class ParametricInteractor(SimpleInteractor):
         """
 
         return View( Group(*self._view_items() +
-                           [HGroup(spring,
+                           [HGroup(Item('vectorize'),
+                                   spring,
                                    Item('update_contexts_button',
                                         show_label=False),
                                     )],
@@ -115,37 +133,25 @@ class ParametricInteractor(SimpleInteractor):
     def _update_contexts_button_changed(self):
         """ Batch updating of contexts.
         """
-        # XXX: this needs to be converted to a non-shadow based execution (or
-        # shadows need to be reinstated).
-        raise NotImplementedError
-
-        # Create all combinations possible for the context
-        list_of_lists = []
-        for i in range(len(self.inputs)):
-            trait = getattr(self, self._input_prefix+ self.inputs[i])
-            list_of_lists = add_list_to_listed_list(trait.output_list,
-                                                    list_of_lists)
-
-        # Make a shadow context for each of the combinations
-        for list in list_of_lists:
-            dict = {}
-            count = 0
-            for i in range(len(self.inputs)):
-                trait = getattr(self, self._input_prefix+self.inputs[i])
-                if len(trait.output_list):
-                    dict[self.inputs[i]] = list[count]
-                    count = count+1
-
-            if len(dict):
-                self.context.create_shadow(dict)
-
-                # Trigger event to draw plot
-                key = dict.keys()[0]
-                self.context.shadows[-1][key] = dict[key]
-
-        # Log a message on the number of shadows created.
-        logger.debug('ParametricInteractor: Created %d shadows' %
-                     len(list_of_lists))
+
+        # The values of each input to combine.
+        inputs = {}
+        for input in self.inputs:
+            trait = getattr(self, self._input_prefix+input)
+            if len(trait.output_list):
+                inputs[input] = trait.output_list
+
+        if not inputs:
+            return
+
+        sweep = ParametricSweep(block=self.block, context=self.context,
+                                inputs=inputs, workers=self.workers,
+                                vectorize=self.vectorize)
+        self.sweep_results = sweep.run()
+
+        # Log a message on the number of combinations executed.
+        logger.debug('ParametricInteractor: Executed %d combinations' %
+                     len(self.sweep_results))
         return
 
 
@@ -208,8 +214,10 @@ if __name__ == '__main__':
     interactor = ParametricInteractor(context=context, block = block)
     interactor.configure_traits()
 
-    for shadow in context.shadows:
-        block.execute(shadow)
-        print shadow['f'], 'Check with:', 5*(shadow['a']+shadow['b'])
+    results = interactor.sweep_results
+    if results is not None:
+        for index in range(len(results)):
+            case = results.case(index)
+            print case['f'], 'Check with:', 5*(case['a']+case['b'])
 
 ### EOF ------------------------------------------------------------------------
@@ -5,12 +5,17 @@
 import logging
 
 # Enthought library imports
-from traits.api import Button, Enum, Any
+from traits.api import Button, Bool, Enum, Any, Instance, Int
 from traitsui.api import (Item, View, HGroup, spring, InstanceEditor,
                                      Group)
 from enthought.util.distribution.distribution import \
      Distribution, Constant, Gaussian, Triangular, Uniform
 
+# Application imports
+from codetools.blocks.api import Block
+from blockcanvas.numerical_modeling.workflow.study.stochastic.monte_carlo \
+     import MonteCarloResults, MonteCarloStudy
+
 # Local imports
 from editors import int_eval_editor, float_eval_editor
 from simple_interactor import SimpleInteractor
@@ -28,6 +33,20 @@ class StochasticInteractor(SimpleInteractor):
     execute_button = Button('Execute')
     distribution = Enum('constant', 'gaussian', 'triangular', 'uniform')
 
+    # The block executed for the samples of the inputs.
+    block = Instance(Block)
+
+    # Statistics of the outputs of the block over the samples of the last
+    # execution.
+    results = Instance(MonteCarloResults)
+
+    # Number of worker processes drawing and executing the samples.
+    workers = Int(0)
+
+    # Whether to execute a batch of samples at once.  Only set it for blocks
+    # whose functions compute each sample independently of the others.
+    vectorize = Bool(False)
+
     #---------------------------------------------------------------------------
     # object interface
     #---------------------------------------------------------------------------
@@ -37,7 +56,8 @@ class StochasticInteractor(SimpleInteractor):
         """
 
         return View( Group(*self._view_items() +
-                           [HGroup(spring,
+                           [HGroup(Item('vectorize'),
+                                   spring,
                                    Item('execute_button',
                                         show_label=False),
                                    )],
@@ -139,34 +159,29 @@ class StochasticInteractor(SimpleInteractor):
         """ Execute stochastic process.
         """
 
-        # XXX: this needs to be converted to a non-shadow based execution (or
-        # shadows need to be reinstated).
-        raise NotImplementedError
-
-        # Obtain a list of tuple of shadows; and the input causing its creation
-        shadow_list = []
-
-        # Obtain seeds for running the stochastic process in a distributing
-        # computing environment in future.
-        seeds = {}
-        results = { '_seeds': seeds }
-
-        # Create shadow contexts
+        # The distribution of each input, sampled as many times as the
+        # largest number of samples asked for.
+        distributions = {}
+        samples = 0
         for input in self.inputs:
             trait_name = self._input_prefix + input
             if hasattr(self, trait_name):
-                distribution = getattr(self, trait_name).distribution
-                values = distribution.values
-                seeds[trait_name] = distribution.set_state(None)
-                for val in values:
-                    shadow = self.context.create_shadow(input, val)
-                    shadow_list.append((input, shadow))
-
-        # Restrict the block to the variable, and use the shadow context
-        for shadow in shadow_list:
-            self.block.restrict(inputs = [shadow[0]])
-            self.block.execute(shadow[1])
-
+                item = getattr(self, trait_name)
+                distributions[input] = item.distribution
+                samples = max(samples, item.samples)
+
+        if not distributions:
+            return
+
+        # The seeds of the streams are kept in the results, to reproduce
+        # the samples of a run spread over the workers.
+        study = MonteCarloStudy(block=self.block, context=self.context,
+                                distributions=distributions,
+                                samples=samples, workers=self.workers,
+                                vectorize=self.vectorize)
+        self.results = study.run()
+
+        logger.debug('StochasticInteractor: Executed %d samples' % samples)
         return
 
     ### public methods --------------------------------------------------------
@@ -4,11 +4,6 @@
 # Standard imports
 import unittest
 
-# Major library imports.
-import nose
-
-raise nose.SkipTest("ParametricInteractor not implemented")
-
 # ETS imports
 from codetools.blocks.api import Block
 
@@ -39,7 +34,9 @@ class ParametricInteractorTestCase(unittest.TestCase):
     def test_attributes(self):
         """ Test if creation of attributes is working correctly
         """
-        interactor = ParametricInteractor(context=self.context,block=self.block)
+        interactor = ParametricInteractor(context=self.context,
+                                          block=self.block,
+                                          inputs=['a', 'b'])
 
         self.assertTrue(hasattr(interactor, interactor._input_prefix + "a"))
         self.assertTrue(hasattr(interactor, interactor._input_prefix + "b"))
@@ -56,14 +53,13 @@ class ParametricInteractorTestCase(unittest.TestCase):
         self.assertEqual(attribute_b.low, 2)
         self.assertEqual(attribute_b.high, 2)
 
-        # Check if the inputs in the interactor are right
-        self.assertEqual(interactor.inputs, list(self.block.inputs))
 
-
-    def test_create_shadows(self):
-        """ Test if creating shadows is working correctly
+    def test_run_sweep(self):
+        """ Test if the sweep button fills the sweep results
         """
-        interactor = ParametricInteractor(context=self.context,block=self.block)
+        interactor = ParametricInteractor(context=self.context,
+                                          block=self.block,
+                                          inputs=['a', 'b'])
 
         # Change the parameters for the attributes
         attribute_a = getattr(interactor, interactor._input_prefix+'a')
@@ -75,17 +71,52 @@ class ParametricInteractorTestCase(unittest.TestCase):
         attribute_b.high = 3
         attribute_b.step = 1
 
-        # Create the shadows.
-        interactor._update_contexts_button_changed()
+        # Run the sweep.
+        interactor.update_contexts_button = True
 
-        # Check if the shadows were created correctly.
-        self.assertEqual(len(self.context.shadows),
+        # Check that all the combinations were executed.
+        results = interactor.sweep_results
+        self.assertEqual(len(results),
                 len(attribute_a.output_list)*len(attribute_b.output_list))
+        self.assertEqual(results.input_names, ['a', 'b'])
+
+        # Check the results of each combination.
+        for index in range(len(results)):
+            case = results.case(index)
+            self.assertEqual(case['f'], 5*(case['a']+case['b']))
+
+        # The combinations are executed one at a time by default.
+        self.assertFalse(results.vectorized)
+
+        # The context itself is left unchanged.
+        self.assertEqual(self.context['a'], 1)
+        self.assertEqual(self.context['b'], 2)
+
+
+    def test_run_sweep_vectorized(self):
+        """ Test if the sweep button executes all the combinations at once
+            when asked to
+        """
+        interactor = ParametricInteractor(context=self.context,
+                                          block=self.block,
+                                          inputs=['a', 'b'],
+                                          vectorize=True)
+
+        attribute_a = getattr(interactor, interactor._input_prefix+'a')
+        attribute_a.high = 4
+        attribute_a.step = 1
+
+        interactor.update_contexts_button = True
+
+        results = interactor.sweep_results
+        self.assertTrue(results.vectorized)
+        self.assertEqual(len(results), len(attribute_a.output_list))
+        for index in range(len(results)):
+            case = results.case(index)
+            self.assertEqual(case['f'], 5*(case['a']+case['b']))
 
-        # Check if the shadow context gives desired result.
-        self.block.execute(self.context.shadows[-1])
-        self.assertEqual(self.context.shadows[-1]['f'],
-               5*(self.context.shadows[-1]['a']+self.context.shadows[-1]['b']))
 
+if __name__ == '__main__':
+    unittest.main()
 
 ### EOF ------------------------------------------------------------------------
@@ -4,9 +4,6 @@
 # Standard imports
 import numpy, unittest
 
-# Major library imports.
-import nose
-
 # ETS imports
 from blockcanvas.numerical_modeling.workflow.api import Block
 
@@ -50,12 +47,10 @@ class StochasticInteractorTestCase(unittest.TestCase):
         self.assertTrue((desired == distribution_b.values).all())
 
 
-    def test_create_shadows(self):
-        """ Test if shadows are working correctly.
+    def test_execute(self):
+        """ Test if the Execute button computes the results.
         """
 
-        raise nose.SkipTest("shadows not implemented")
-
         interactor = StochasticInteractor(context = self.context,
                                           block = self.block,
                                           distribution = 'uniform',
@@ -68,16 +63,49 @@ class StochasticInteractorTestCase(unittest.TestCase):
         distribution_b.low = 20.0
         distribution_b.high = 30.0
 
-        # Create shadows
-        interactor._execute_button_changed()
+        # Execute the block for the samples.
+        interactor.execute_button = True
+
+        # Check that all the samples were executed.
+        results = interactor.results
+        self.assertEqual(results.samples, attribute_b.samples)
+        self.assertEqual(results.output_names, ['c'])
+        self.assertEqual(results.statistics['c'].count, attribute_b.samples)
+
+        # c = a + b, with a = 1 and b in [20, 30].
+        statistics = results.statistics['c']
+        self.assertTrue(21.0 <= statistics.min <= statistics.max <= 31.0)
+        self.assertTrue(21.0 < results.mean('c') < 31.0)
+
+        # The samples are executed one at a time by default.
+        self.assertFalse(results.vectorized)
+
+        # The context itself is left unchanged.
+        self.assertEqual(self.context['b'], 2)
+
+
+    def test_execute_vectorized(self):
+        """ Test if the Execute button executes batches of samples at once
+            when asked to.
+        """
+
+        interactor = StochasticInteractor(context = self.context,
+                                          block = self.block,
+                                          distribution = 'uniform',
+                                          inputs = ['b'],
+                                          vectorize = True)
+
+        attribute_b = getattr(interactor, interactor._input_prefix+'b')
+        attribute_b.distribution.low = 20.0
+        attribute_b.distribution.high = 30.0
 
-        # Check if the shadows were created correctly.
-        self.assertEqual(len(distribution_b.values), len(self.context.shadows))
+        interactor.execute_button = True
 
-        # Check if the shadow context gives desired effects.
-        self.block.execute(self.context.shadows[-1])
-        self.assertEqual(self.context.shadows[-1]['c'],
-                         self.context['a']+self.context.shadows[-1]['b'])
+        results = interactor.results
+        self.assertTrue(results.vectorized)
+        self.assertEqual(results.statistics['c'].count, attribute_b.samples)
+        statistics = results.statistics['c']
+        self.assertTrue(21.0 <= statistics.min <= statistics.max <= 31.0)
 
 
 ### EOF -----------------------------------------------------------------------
@@ -190,7 +190,8 @@ class ANumericContext ( HasPrivateTraits, DictMixin ):
 
                 self.dict_modified = event
             else:
-                merge_trait_dict_events( self._deferred_dict_modified, event )
+                merge_trait_dict_events( self._deferred_dict_modified, event,
+                                         self )
 
     def post_context_modified ( self, event ):
         """ Post a 'context_modified' event.
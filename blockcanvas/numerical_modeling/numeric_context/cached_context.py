@@ -17,14 +17,31 @@
     receives from its upstream numeric context through unchanged, and also
     caches the values to avoid having to constantly recalculate  upstream
     values.
+
+    The memory used by the cache can be bounded, in which case the least
+    recently used values are evicted first. Evicted arrays can optionally be
+    spilled to '.npy' files, which are then read back as memory maps rather
+    than recalculated. The spilled files of a context are removed when it is
+    garbage collected, or at the latest when the process exits.
 """
 
 #-------------------------------------------------------------------------------
 #  Imports:
 #-------------------------------------------------------------------------------
 
+import atexit
+import os
+import tempfile
+import weakref
+
+from collections \
+    import OrderedDict
+
+from numpy \
+    import load, ndarray, save
+
 from traits.api \
-    import Undefined
+    import Any, Int, Str, Undefined
 
 from termination_context \
     import TerminationContext
@@ -40,6 +57,80 @@ class CachedContext ( TerminationContext ):
         values.
     """
 
+    #---------------------------------------------------------------------------
+    #  Trait definitions:
+    #---------------------------------------------------------------------------
+
+    # Maximum number of bytes of array data kept in memory. If the value is
+    # less than or equal to zero, the cache is unbounded:
+    context_cache_size = Int( 0 )
+
+    # Directory the arrays evicted from memory are spilled to. If empty,
+    # evicted arrays are simply dropped:
+    context_spill_directory = Str
+
+    #-- Private Traits ---------------------------------------------------------
+
+    # The cached values, from the least to the most recently used:
+    _context_cache = Any( transient = True )
+
+    # The paths and memory maps of the spilled arrays:
+    _spilled = Any( transient = True )
+
+    # The set of the paths of the spilled files, also known to the function
+    # removing them once the context is collected:
+    _spill_files = Any( transient = True )
+
+    # Number of bytes of array data in '_context_cache':
+    _cache_nbytes = Int( 0, transient = True )
+
+    # Number of values found in memory, found spilled, computed, evicted from
+    # memory and spilled:
+    _hits       = Int( 0, transient = True )
+    _spill_hits = Int( 0, transient = True )
+    _misses     = Int( 0, transient = True )
+    _evictions  = Int( 0, transient = True )
+    _spills     = Int( 0, transient = True )
+
+    #-- 'CachedContext' Class Methods ------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Returns statistics about the use of the cache:
+    #---------------------------------------------------------------------------
+
+    def cache_statistics ( self ):
+        """ Returns a dictionary of the number of hits (in memory and spilled),
+            misses, evictions and spills since the cache was created, and of
+            the number of entries and bytes currently held in memory.
+        """
+        cache = self._context_cache or {}
+
+        return { 'hits':       self._hits,
+                 'spill_hits': self._spill_hits,
+                 'misses':     self._misses,
+                 'evictions':  self._evictions,
+                 'spills':     self._spills,
+                 'entries':    len( cache ),
+                 'nbytes':     self._cache_nbytes,
+                 'spilled':    len( self._spilled or {} ) }
+
+    #---------------------------------------------------------------------------
+    #  Empties the cache:
+    #---------------------------------------------------------------------------
+
+    def clear_cache ( self ):
+        """ Empties the cache, removing any spilled files.
+        """
+        self._context_cache = None
+        self._cache_nbytes  = 0
+
+        spilled = self._spilled
+        self._spilled = None
+        if spilled:
+            for path, value in spilled.itervalues():
+                self._spill_files.discard( path )
+                _remove( path )
+
     #-- 'ANumericContext' Class Methods Overrides ------------------------------
 
     #---------------------------------------------------------------------------
@@ -51,11 +142,27 @@ class CachedContext ( TerminationContext ):
         """
         cache = self._context_cache
         if cache is None:
-            self._context_cache = cache = {}
+            self._context_cache = cache = OrderedDict()
 
         result = cache.get( name, Undefined )
-        if result is Undefined:
-            cache[ name ] = result = self.context.get_context_data( name )
+        if result is not Undefined:
+            self._hits += 1
+
+            # Mark the value as the most recently used:
+            if self.context_cache_size > 0:
+                del cache[ name ]
+                cache[ name ] = result
+
+            return result
+
+        spilled = self._spilled
+        if spilled and (name in spilled):
+            self._spill_hits += 1
+            return spilled[ name ][1]
+
+        self._misses += 1
+        result = self.context.get_context_data( name )
+        self._store( name, result )
 
         return result
 
@@ -66,11 +173,91 @@ class CachedContext ( TerminationContext ):
     def set_context_data ( self, name, value ):
         """ Sets the value of a specified item.
         """
-        if self._context_cache is not None:
-            self._context_cache.pop( name, None )
+        self._forget( name )
 
         super( CachedContext, self ).set_context_data( name, value )
 
+    #-- Private Methods --------------------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Stores a value in the cache, evicting others to stay within budget:
+    #---------------------------------------------------------------------------
+
+    def _store ( self, name, value ):
+        """ Stores a value in the cache, evicting the least recently used
+            values as needed to stay within 'context_cache_size'.
+        """
+        budget = self.context_cache_size
+        nbytes = _nbytes( value )
+        if (budget > 0) and (nbytes > budget):
+            # Too large to ever be kept in memory:
+            self._spill( name, value )
+            return
+
+        cache = self._context_cache
+        cache[ name ] = value
+        self._cache_nbytes += nbytes
+
+        if budget > 0:
+            while self._cache_nbytes > budget:
+                old_name, old_value = cache.popitem( last = False )
+                self._cache_nbytes -= _nbytes( old_value )
+                self._evictions += 1
+                self._spill( old_name, old_value )
+
+    #---------------------------------------------------------------------------
+    #  Spills an array to disk, if there is a spill directory:
+    #---------------------------------------------------------------------------
+
+    def _spill ( self, name, value ):
+        """ Spills an array evicted from memory to a '.npy' file, if there is
+            a spill directory, and keeps a read-only memory map of it.
+        """
+        directory = self.context_spill_directory
+        if ((directory == '') or (not isinstance( value, ndarray )) or
+            value.dtype.hasobject):
+            return
+
+        # If the directory is missing or not writable, the value is dropped:
+        path = None
+        try:
+            fd, path = tempfile.mkstemp( suffix = '.npy', dir = directory )
+            os.close( fd )
+            save( path, value )
+            mapped = load( path, mmap_mode = 'r' )
+        except ( IOError, OSError ):
+            if path is not None:
+                _remove( path )
+            return
+
+        if self._spilled is None:
+            self._spilled = {}
+        if self._spill_files is None:
+            self._spill_files = _track_spill_files( self )
+        self._spilled[ name ] = ( path, mapped )
+        self._spill_files.add( path )
+        self._spills += 1
+
+    #---------------------------------------------------------------------------
+    #  Forgets the cached value of an item:
+    #---------------------------------------------------------------------------
+
+    def _forget ( self, name ):
+        """ Forgets the cached value of an item, in memory and on disk.
+        """
+        cache = self._context_cache
+        if cache is not None:
+            value = cache.pop( name, Undefined )
+            if value is not Undefined:
+                self._cache_nbytes -= _nbytes( value )
+
+        spilled = self._spilled
+        if spilled:
+            entry = spilled.pop( name, None )
+            if entry is not None:
+                self._spill_files.discard( entry[0] )
+                _remove( entry[0] )
+
     #-- Event Handlers ---------------------------------------------------------
 
     #---------------------------------------------------------------------------
@@ -81,16 +268,69 @@ class CachedContext ( TerminationContext ):
         """ Handles the context modified event.
         """
         if event.reset:
-            self._context_cache = {}
+            self.clear_cache()
 
         else:
-            cache = self._context_cache
-            if cache is not None:
-                for name in event.modified:
-                    cache.pop( name, None )
+            for name in event.modified:
+                self._forget( name )
 
-                for name in event.removed:
-                    cache.pop( name, None )
+            for name in event.removed:
+                self._forget( name )
 
         super( CachedContext, self )._context_is_modified( event )
 
+    #---------------------------------------------------------------------------
+    #  Handles the 'context_cache_size' trait being changed:
+    #---------------------------------------------------------------------------
+
+    def _context_cache_size_changed ( self ):
+        """ Handles the 'context_cache_size' trait being changed.
+        """
+        self.clear_cache()
+
+#-------------------------------------------------------------------------------
+#  Utilities:
+#-------------------------------------------------------------------------------
+
+def _nbytes ( value ):
+    """ Returns the number of bytes of data held by a value.
+    """
+    return getattr( value, 'nbytes', 0 )
+
+def _remove ( path ):
+    """ Removes a spilled file, ignoring errors.
+    """
+    try:
+        os.remove( path )
+    except OSError:
+        pass
+
+#-------------------------------------------------------------------------------
+#  Removal of the spilled files of the contexts no longer used:
+#-------------------------------------------------------------------------------
+
+# Maps a weak reference to each context which spilled values to the set of
+# the paths of its spilled files:
+_spill_files = {}
+
+def _track_spill_files ( context ):
+    """ Returns the set of the paths of the spilled files of a context, whose
+        files are removed when the context is garbage collected.
+    """
+    paths = set()
+    _spill_files[ weakref.ref( context, _remove_spill_files ) ] = paths
+
+    return paths
+
+def _remove_spill_files ( ref ):
+    """ Removes the spilled files of a context which was garbage collected.
+    """
+    for path in _spill_files.pop( ref, () ):
+        _remove( path )
+
+@atexit.register
+def _remove_all_spill_files ( ):
+    """ Removes the spilled files of the contexts still alive at exit.
+    """
+    for ref in _spill_files.keys():
+        _remove_spill_files( ref )
@@ -0,0 +1,236 @@
+#-------------------------------------------------------------------------------
+#
+#  Defines the compiled form of the Python expressions used by filters and
+#  evaluated items, and a cache of them shared by all filters and items.
+#
+#  (c) Copyright 2007 by Enthought, Inc.
+#
+#-------------------------------------------------------------------------------
+
+""" Defines the compiled form of the Python expressions used by filters and
+    evaluated items, and a cache of them shared by all filters and items.
+
+    An expression is compiled once per distinct expression text. Element-wise
+    expressions on large arrays can also be evaluated a chunk of elements at a
+    time, which avoids allocating a full size temporary array for each
+    intermediate result. The 'numexpr' package is used for this when it is
+    installed and supports the expression, and plain NumPy otherwise.
+
+    An expression is only considered element-wise if it is made of
+    arithmetic, comparisons, names, constants and calls of NumPy ufuncs (or
+    'abs'). Anything else, such as the attribute in 'a - a.mean()' or a
+    subscript, may mix elements, so the expression is evaluated on whole
+    arrays.
+"""
+
+#-------------------------------------------------------------------------------
+#  Imports:
+#-------------------------------------------------------------------------------
+
+import ast
+
+from collections \
+    import OrderedDict
+
+from numpy \
+    import asarray, empty, ndarray, ufunc
+
+from codetools.blocks.api \
+    import Expression as ExpressionBlock
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+#-------------------------------------------------------------------------------
+#  Constants:
+#-------------------------------------------------------------------------------
+
+# Maximum number of compiled expressions kept in the cache:
+MaxCompiledExpressions = 1000
+
+# The AST node types an element-wise expression may contain, besides calls:
+ElementWiseNodes = ( ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare,
+                     ast.Name, ast.Num, ast.Load, ast.operator,
+                     ast.unaryop, ast.cmpop )
+
+# Functions which are element-wise without being NumPy ufuncs:
+ElementWiseFunctions = frozenset( [ 'abs' ] )
+
+#-------------------------------------------------------------------------------
+#  'CompiledExpression' class:
+#-------------------------------------------------------------------------------
+
+class CompiledExpression ( object ):
+    """ Defines the compiled form of a Python expression.
+    """
+
+    #---------------------------------------------------------------------------
+    #  Initializes the object:
+    #---------------------------------------------------------------------------
+
+    def __init__ ( self, expression ):
+        """ Initializes the object.
+        """
+        # The text of the expression:
+        self.expression = expression = expression.strip()
+
+        # The code object evaluating the expression:
+        self.code = compile( expression, '<expression>', 'eval' )
+
+        # The names the expression reads:
+        self.inputs = frozenset(
+                          ExpressionBlock.from_string( expression ).inputs )
+
+        # The names of the functions the expression calls, or None if the
+        # expression is not element-wise whatever they are:
+        self._calls = _element_wise_calls( expression )
+
+        # Whether 'numexpr' may be able to evaluate the expression:
+        self._numexpr = (numexpr is not None)
+
+    #---------------------------------------------------------------------------
+    #  Returns whether any of a set of names is an input of the expression:
+    #---------------------------------------------------------------------------
+
+    def depends_on ( self, names ):
+        """ Returns whether any of a set of names is an input of the
+            expression.
+        """
+        return (not self.inputs.isdisjoint( names ))
+
+    #---------------------------------------------------------------------------
+    #  Evaluates the expression in a context:
+    #---------------------------------------------------------------------------
+
+    def evaluate ( self, context, chunk_size = 0 ):
+        """ Evaluates the expression in a context. If 'chunk_size' is greater
+            than zero and the expression is element-wise, it is evaluated at
+            most 'chunk_size' elements of its array inputs at a time.
+        """
+        if (chunk_size > 0) and (self._calls is not None):
+            values = dict( [ ( name, context[ name ] )
+                             for name in self.inputs if name in context ] )
+            length = _common_length( values )
+            if (length > chunk_size) and self._element_wise( values ):
+                if self._numexpr:
+                    try:
+                        return numexpr.evaluate( self.expression,
+                                                 local_dict  = values,
+                                                 global_dict = {} )
+                    except ( KeyError, NotImplementedError, SyntaxError,
+                             TypeError, ValueError ):
+                        # Not an expression 'numexpr' understands:
+                        self._numexpr = False
+
+                result = self._evaluate_chunks( values, length, chunk_size )
+                if result is not None:
+                    return result
+
+        return eval( self.code, {}, context )
+
+    #-- Private Methods --------------------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Returns whether the functions the expression calls are element-wise:
+    #---------------------------------------------------------------------------
+
+    def _element_wise ( self, values ):
+        """ Returns whether all the functions the expression calls are
+            element-wise, given the values of its inputs.
+        """
+        for name in self._calls:
+            function = values.get( name )
+            if not (isinstance( function, ufunc ) or
+                    ((function is None) and (name in ElementWiseFunctions))):
+                return False
+
+        return True
+
+    #---------------------------------------------------------------------------
+    #  Evaluates the expression a chunk of elements at a time:
+    #---------------------------------------------------------------------------
+
+    def _evaluate_chunks ( self, values, length, chunk_size ):
+        """ Evaluates the expression a chunk of elements at a time. Returns
+            None if the result of the first chunk does not have one element
+            per element of the chunk.
+        """
+        result = None
+        for start in xrange( 0, length, chunk_size ):
+            end   = min( start + chunk_size, length )
+            chunk = {}
+            for name, value in values.iteritems():
+                if isinstance( value, ndarray ) and (value.ndim > 0):
+                    value = value[ start: end ]
+                chunk[ name ] = value
+
+            data = asarray( eval( self.code, {}, chunk ) )
+            if result is None:
+                if data.shape[:1] != ( end - start, ):
+                    return None
+                result = empty( ( length, ) + data.shape[1:], data.dtype )
+
+            result[ start: end ] = data
+
+        return result
+
+#-------------------------------------------------------------------------------
+#  Returns the compiled form of an expression:
+#-------------------------------------------------------------------------------
+
+_compiled = OrderedDict()
+
+def compile_expression ( expression ):
+    """ Returns the compiled form of an expression, compiling it only if it is
+        not in the shared cache already.
+    """
+    compiled = _compiled.pop( expression, None )
+    if compiled is None:
+        compiled = CompiledExpression( expression )
+        while len( _compiled ) >= MaxCompiledExpressions:
+            _compiled.popitem( last = False )
+
+    # Re-insert to mark the entry as the most recently used:
+    _compiled[ expression ] = compiled
+
+    return compiled
+
+#-------------------------------------------------------------------------------
+#  Returns the names of the functions an element-wise expression calls:
+#-------------------------------------------------------------------------------
+
+def _element_wise_calls ( expression ):
+    """ Returns the set of the names of the functions an expression calls if
+        it is element-wise provided they are, or None if it is not.
+    """
+    calls = set()
+    for node in ast.walk( ast.parse( expression, mode = 'eval' ) ):
+        if isinstance( node, ast.Call ):
+            if (not isinstance( node.func, ast.Name ) or node.keywords or
+                node.starargs or node.kwargs):
+                return None
+            calls.add( node.func.id )
+        elif not isinstance( node, ElementWiseNodes ):
+            return None
+
+    return calls
+
+#-------------------------------------------------------------------------------
+#  Returns the common length of the array values of a dictionary:
+#-------------------------------------------------------------------------------
+
+def _common_length ( values ):
+    """ Returns the common length of the array values of a dictionary, or 0 if
+        there are none or their lengths differ.
+    """
+    length = 0
+    for value in values.itervalues():
+        if isinstance( value, ndarray ) and (value.ndim > 0):
+            if length == 0:
+                length = len( value )
+            elif len( value ) != length:
+                return 0
+
+    return length
@@ -216,6 +216,15 @@ class DerivativeContext ( ANumericContext ):
         """
         self.context.set_context_undefined( name, value )
 
+    #---------------------------------------------------------------------------
+    #  Returns the substitution 'value' associated with a particular trait:
+    #---------------------------------------------------------------------------
+
+    def context_value_for ( self, name ):
+        """ Returns the substitution 'value' associated with a particular trait.
+        """
+        return self.context_base.context_value_for( name )
+
     #---------------------------------------------------------------------------
     #  Returns the context base any upstream contexts should use:
     #---------------------------------------------------------------------------
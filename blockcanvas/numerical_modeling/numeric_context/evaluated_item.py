@@ -20,14 +20,14 @@
 #-------------------------------------------------------------------------------
 
 from traits.api \
-    import Property, Expression
-
-from codetools.blocks.api \
-    import Expression as ExpressionBlock
+    import Int, Property, Expression
 
 from a_numeric_item \
     import ANumericItem
 
+from compiled_expression \
+    import compile_expression
+
 from context_modified \
     import ContextModified
 
@@ -53,6 +53,11 @@ class EvaluatedItem ( ANumericItem ):
     # Expression used to compute the numeric value:
     evaluate = Expression
 
+    # Number of elements of the context arrays evaluated at a time, or 0 to
+    # evaluate whole arrays. Expressions which are not element-wise (see
+    # compiled_expression) are always evaluated on whole arrays:
+    chunk_size = Int( 0 )
+
     # The current value of the associated numeric array:
     data = Property
 
@@ -69,7 +74,8 @@ class EvaluatedItem ( ANumericItem ):
                     raise NumericItemError( "Recursive definition involving "
                                             "the value of '%s'" % self.name )
                 self._busy = True
-                self._data = self._block.evaluate( self.context )
+                self._data = self._expression.evaluate( self.context,
+                                                        self.chunk_size )
             finally:
                 self._busy = False
 
@@ -101,9 +107,8 @@ class EvaluatedItem ( ANumericItem ):
     def _evaluate_changed ( self, evaluate ):
         """ Handles the 'evaluate' trait being changed.
         """
-        self._block  = ExpressionBlock.from_string( evaluate )
-        self._inputs = dict.fromkeys( self._block.inputs )
-        self._data   = None
+        self._expression = compile_expression( evaluate )
+        self._data       = None
         if self.context is not None:
             self.context.post_context_modified(
                 ContextModified( modified = [ self.name ] )
@@ -118,13 +123,11 @@ class EvaluatedItem ( ANumericItem ):
     def _context_modified_changed_for_context ( self, event ):
         """ Handles the data associated with this item being changed.
         """
-        inputs = self._inputs
-        if inputs is not None:
-            for name in event.all_modified:
-                if name in inputs:
-                    self._data = None
-                    self.context.post_context_modified(
-                        ContextModified( modified = [ self.name ] )
-                    )
-                    break
+        expression = self._expression
+        if (expression is not None) and expression.depends_on(
+                                                        event.all_modified ):
+            self._data = None
+            self.context.post_context_modified(
+                ContextModified( modified = [ self.name ] )
+            )
 
@@ -62,48 +62,68 @@ def merge_context_modified_events(a, b):
         This entails, for example, that 'a.added' and 'b.added' are disjoint,
         since it doesn't make sense for the same name to be added twice in
         succession.
+
+        Membership is tracked with sets, so merging many events into one (e.g.
+        while events are deferred) takes time linear in the number of names.
     '''
-    assert disjoint(set(a.added), set(a.modified), set(a.removed))
+    added    = set(a.added)
+    modified = set(a.modified)
+    removed  = set(a.removed)
+    assert disjoint(added, modified, removed)
     assert disjoint(set(b.added), set(b.modified), set(b.removed))
 
     for x in b.added:
-        if x in a.added:
+        if x in added:
             assert False
-        elif x in a.modified:
+        elif x in modified:
             assert False
-        elif x in a.removed:
-            a.removed.remove(x)
-            a.added.append(x)
+        elif x in removed:
+            removed.remove(x)
+            added.add(x)
         else:
-            a.added.append(x)
+            added.add(x)
 
     for x in b.modified:
-        if x in a.added:
+        if x in added:
             pass # 'a.added' is already correct
-        elif x in a.modified:
+        elif x in modified:
             pass # 'a.modified' is already correct
-        elif x in a.removed:
+        elif x in removed:
             assert False
         else:
-            a.modified.append(x)
+            modified.add(x)
 
     for x in b.removed:
-        if x in a.added:
-            a.added.remove(x)
-        elif x in a.modified:
-            a.modified.remove(x)
-            a.removed.append(x)
-        elif x in a.removed:
+        if x in added:
+            added.remove(x)
+        elif x in modified:
+            modified.remove(x)
+            removed.add(x)
+        elif x in removed:
             assert False
         else:
-            a.removed.append(x)
+            removed.add(x)
+
+    # Keep the names in the order they were first reported
+    a.added    = _ordered(a.added + b.added, added)
+    a.modified = _ordered(a.modified + b.modified, modified)
+    a.removed  = _ordered(a.removed + b.removed, removed)
 
     # 'changed' gives us little information, so this is the best we can do
     a.changed = list(set(a.changed + b.changed))
 
     a.reset |= b.reset
 
-    assert disjoint(set(a.added), set(a.modified), set(a.removed))
+def _ordered(names, members):
+    ''' Return the names in 'members', without duplicates, in the order they
+        appear in 'names'.
+    '''
+    result = []
+    for name in names:
+        if name in members:
+            result.append(name)
+            members.discard(name)
+    return result
 
 def single_event(f):
     ''' Method decorator that merges all of a method's events into one.
@@ -22,17 +22,17 @@
 from numpy import issubdtype
 
 from traits.api \
-    import Expression, Property
+    import Expression, Int, Property
 
 from traitsui.api \
     import View
 
-from codetools.blocks.api \
-    import Expression as ExpressionBlock
-
 from a_numeric_filter \
     import ANumericFilter
 
+from compiled_expression \
+    import compile_expression
+
 #-------------------------------------------------------------------------------
 #  'ExpressionFilter' class:
 #-------------------------------------------------------------------------------
@@ -52,6 +52,11 @@ class ExpressionFilter ( ANumericFilter ):
     # Name of the filter:
     name = Property
 
+    # Number of elements of the context arrays evaluated at a time, or 0 to
+    # evaluate whole arrays. Expressions which are not element-wise (see
+    # compiled_expression) are always evaluated on whole arrays:
+    chunk_size = Int( 0, event = 'modified' )
+
     # Should the value, is_bit and color traits be used? (override):
     use_value = True
 
@@ -101,9 +106,8 @@ class ExpressionFilter ( ANumericFilter ):
     def _filter_changed ( self, filter ):
         """ Handles the 'filter' expression being changed.
         """
-        self._block  = ExpressionBlock.from_string( filter )
-        self._inputs = dict.fromkeys( self._block.inputs )
-        self.updated = True
+        self._expression = compile_expression( filter )
+        self.updated     = True
         self._name_updated()
 
     #---------------------------------------------------------------------------
@@ -125,7 +129,7 @@ class ExpressionFilter ( ANumericFilter ):
         """ Evaluates the result of the filter for the specified context.
         """
         try:
-            mask = self._block.evaluate( context )
+            mask = self._expression.evaluate( context, self.chunk_size )
             if ((mask is None) or
                 issubdtype(mask.dtype, bool) or
                 issubdtype(mask.dtype, int)):
@@ -143,11 +147,9 @@ class ExpressionFilter ( ANumericFilter ):
             filter.
         """
         if self.enabled:
-            inputs = self._inputs
-            if inputs is not None:
-                for name in names:
-                    if name in inputs:
-                        return True
+            expression = self._expression
+            if expression is not None:
+                return expression.depends_on( names )
 
         return False
 
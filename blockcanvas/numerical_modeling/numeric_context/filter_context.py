@@ -19,8 +19,11 @@
 #  Imports:
 #-------------------------------------------------------------------------------
 
+from numpy \
+    import ndarray
+
 from traits.api \
-    import Instance, Property, Undefined
+    import Any, Instance, Property, Undefined
 
 from a_numeric_filter \
     import ANumericFilter
@@ -55,6 +58,11 @@ class FilterContext ( DerivativeContext ):
     # Current selection mask:
     _mask = Property
 
+    # The filtered data of each name, as a tuple of the form:
+    # ( upstream data, filtered data ), valid while the mask is unchanged and
+    # the upstream data is the same object:
+    _filtered = Any( transient = True )
+
     #-- 'ANumericContext' Class Method Overrides -------------------------------
 
     #---------------------------------------------------------------------------
@@ -72,6 +80,72 @@ class FilterContext ( DerivativeContext ):
               ' ' * indent, self.__class__.__name__, id( self ), filter )
         self.context.dump_context( indent + 3 )
 
+    #-- Private Methods --------------------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Returns the filtered value of an item, computing it only if needed:
+    #---------------------------------------------------------------------------
+
+    def _filtered_data ( self, name, data, filter, *args ):
+        """ Returns the result of 'filter( data, *args )' for the specified
+            item, reusing the last result computed for it as long as neither
+            the mask nor the upstream data changed. Since the result is shared
+            by all the callers, an array result is made read-only.
+        """
+        cache = self._filtered
+        if cache is None:
+            self._filtered = cache = {}
+
+        entry = cache.get( name )
+        if (entry is not None) and (entry[0] is data):
+            return entry[1]
+
+        result = filter( data, *args )
+        if isinstance( result, ndarray ):
+            result.flags.writeable = False
+        cache[ name ] = ( data, result )
+
+        return result
+
+    #---------------------------------------------------------------------------
+    #  Returns the upstream value of an item, to be modified in place:
+    #---------------------------------------------------------------------------
+
+    def _writable_data ( self, name ):
+        """ Returns the upstream value of the specified item, copied if it is
+            a read-only array, such as the cached value of an upstream filter
+            context.
+        """
+        data = self.context.get_context_data( name )
+        if isinstance( data, ndarray ) and (not data.flags.writeable):
+            data = data.copy()
+
+        return data
+
+    #---------------------------------------------------------------------------
+    #  Forgets the filtered values of a list of items:
+    #---------------------------------------------------------------------------
+
+    def _forget_filtered ( self, names ):
+        """ Forgets the filtered values of a list of items.
+        """
+        cache = self._filtered
+        if cache:
+            for name in names:
+                cache.pop( name, None )
+
+    #---------------------------------------------------------------------------
+    #  Forgets the current mask and everything computed from it:
+    #
+    #  Subclasses caching other values computed from the mask should extend it.
+    #---------------------------------------------------------------------------
+
+    def _reset_mask ( self ):
+        """ Forgets the current mask and everything computed from it.
+        """
+        self._cur_mask = Undefined
+        self._filtered = None
+
     #-- Property Implementations -----------------------------------------------
 
     #---------------------------------------------------------------------------
@@ -97,13 +171,24 @@ class FilterContext ( DerivativeContext ):
         """ Handles the context modified event.
         """
         if event.reset:
-            self._cur_mask = Undefined
-        elif self.context_filter is not None:
-            self.context_filter.context_has_changed( self.context,
-                                                     event.all_modified )
+            self._reset_mask()
+        else:
+            self._forget_filtered( event.all_modified )
+            if self.context_filter is not None:
+                self.context_filter.context_has_changed( self.context,
+                                                         event.all_modified )
 
         super( FilterContext, self )._context_is_modified( event )
 
+    def _dict_is_modified ( self, event ):
+        """ Handles the 'dict_modified' event being fired.
+        """
+        self._forget_filtered( event.added )
+        self._forget_filtered( event.changed )
+        self._forget_filtered( event.removed )
+
+        super( FilterContext, self )._dict_is_modified( event )
+
     #---------------------------------------------------------------------------
     #  Handles the context filter being changed:
     #---------------------------------------------------------------------------
@@ -115,6 +200,6 @@ class FilterContext ( DerivativeContext ):
 
     def _updated_changed_for_context_filter ( self ):
         if self._cur_mask is not Undefined:
-            self._cur_mask = Undefined
+            self._reset_mask()
             self.post_context_modified( ContextModified( reset = True ) )
 
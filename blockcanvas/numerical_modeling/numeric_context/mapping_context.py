@@ -68,7 +68,7 @@ class MappingContext ( FilterContext ):
         if mask is None:
             return data
 
-        return take( data, mask, axis = 0 )
+        return self._filtered_data( name, data, take, mask, 0 )
 
     #---------------------------------------------------------------------------
     #  Gets the value of a currently undefined item:
@@ -94,11 +94,12 @@ class MappingContext ( FilterContext ):
     def set_context_data ( self, name, value ):
         """ Sets the value of a specified item.
         """
-        data = self.context.get_context_data( name )
         mask = self._imask
         if mask is not None:
+            data = self._writable_data( name )
             putmask( data, ones( data.shape, bool ), value )
             data = take( data, mask, axis = 0 )
+            self._forget_filtered( [ name ] )
             self.context.set_context_data( name, data )
         else:
             self.context.set_context_data( name, value )
@@ -138,19 +139,17 @@ class MappingContext ( FilterContext ):
         """
         return self.create_context( mode )
 
-    #-- Event Handlers ---------------------------------------------------------
+    #-- Private Methods --------------------------------------------------------
 
     #---------------------------------------------------------------------------
-    #  Handles the context modified event:
+    #  Forgets the current mask and everything computed from it:
     #---------------------------------------------------------------------------
 
-    def _context_is_modified ( self, event ):
-        """ Handles the context modified event.
+    def _reset_mask ( self ):
+        """ Forgets the current mask and everything computed from it.
         """
-        if event.reset:
-            self._cur_imask = None
-
-        super( MappingContext, self )._context_is_modified( event )
+        super( MappingContext, self )._reset_mask()
+        self._cur_imask = None
 
     #-- Property Implementations -----------------------------------------------
 
@@ -174,10 +173,8 @@ class MappingContext ( FilterContext ):
         if (self._cur_imask is None) and (self.context_filter is not None):
             mask = self._mask
             if mask is not None:
-                # fixme: Is there a faster way to compute the inverse mask?
                 self._cur_imask = imask = arange( len( mask ) )
-                for i, j in enumerate( mask ):
-                    imask[j] = i
+                imask[ mask ] = arange( len( mask ) )
 
         return self._cur_imask
 
@@ -25,7 +25,7 @@ from numpy \
 
 from traits.api \
     import HasTraits, Instance, Str, List, Property, Undefined, \
-           TraitDictEvent, TraitError, Dict, Bool
+           TraitDictEvent, TraitError, Dict, Bool, Int
 
 from codetools.util.dict \
     import sub_dict
@@ -117,9 +117,22 @@ class NumericContext ( ANumericContext ):
     # fire that represents the net change since 'defer_events' was set.
     defer_events = Property( depends_on = 'context_data.defer_events' )
 
+    # Number of milliseconds over which changes are coalesced into a single
+    # pair of events. If the value is less than or equal to zero, events are
+    # posted as soon as the changes occur; otherwise the first change starts
+    # deferring events, and the net change is posted once the delay expires:
+    context_coalesce_delay = Int( 0 )
+
     # Whether to withhold events entirely.
     _no_events = Bool( False )
 
+    # Whether events are being coalesced until 'context_coalesce_delay'
+    # expires:
+    _coalescing = Bool( False, transient = True )
+
+    # Whether deferred events are being released:
+    _releasing = Bool( False, transient = True )
+
     #-- 'object' Class Method Overrides ----------------------------------------
 
     #---------------------------------------------------------------------------
@@ -254,12 +267,21 @@ class NumericContext ( ANumericContext ):
 
     def post_dict_modified ( self, event ):
         if not self._no_events:
+            self._start_coalescing()
             super( NumericContext, self ).post_dict_modified( event )
 
     def post_context_modified ( self, event ):
         if not self._no_events:
+            self._start_coalescing()
             super( NumericContext, self ).post_context_modified( event )
 
+    def _defer_events_changed ( self ):
+        self._releasing = True
+        try:
+            super( NumericContext, self )._defer_events_changed()
+        finally:
+            self._releasing = False
+
     #---------------------------------------------------------------------------
     #  Returns the value of a specified item:
     #---------------------------------------------------------------------------
@@ -886,6 +908,38 @@ class NumericContext ( ANumericContext ):
         """
         return self._context_groups.get( self.context_group, empty_group )
 
+    #---------------------------------------------------------------------------
+    #  Starts coalescing events over the 'context_coalesce_delay':
+    #---------------------------------------------------------------------------
+
+    def _start_coalescing ( self ):
+        """ Starts deferring events until the 'context_coalesce_delay' expires,
+            unless they are already deferred.
+        """
+        # Events released at the end of a deferral (including our own) are
+        # posted at once. They may arrive before our '_defer_events_changed'
+        # handler runs, while our deferred events are still pending:
+        if ((self.context_coalesce_delay > 0) and (not self.defer_events) and
+            (not self._releasing) and
+            (self._deferred_context_modified is None)):
+            from pyface.timer.api import do_after
+
+            self._coalescing  = True
+            self.defer_events = True
+            do_after( self.context_coalesce_delay, self._end_coalescing )
+
+    #---------------------------------------------------------------------------
+    #  Posts the events coalesced over the 'context_coalesce_delay':
+    #---------------------------------------------------------------------------
+
+    def _end_coalescing ( self ):
+        """ Posts the net change since coalescing started as a single pair of
+            events.
+        """
+        if self._coalescing:
+            self._coalescing  = False
+            self.defer_events = False
+
     #---------------------------------------------------------------------------
     #  Removes a list of context items:
     #---------------------------------------------------------------------------
@@ -22,7 +22,7 @@
 #-------------------------------------------------------------------------------
 
 from numpy \
-    import compress, nonzero, put, putmask
+    import nonzero, put, putmask, take
 
 from traits.api \
     import Bool, Property, Undefined
@@ -54,6 +54,14 @@ class ReductionContext ( FilterContext ):
     # discarded?
     use_value = Bool( False )
 
+    #-- Private Traits ---------------------------------------------------------
+
+    # The indices of the values selected by the mask:
+    _indices = Property
+
+    # Whether each value is not selected by the mask:
+    _excluded = Property
+
     #-- 'ANumericContext' Class Method Overrides -------------------------------
 
     #---------------------------------------------------------------------------
@@ -62,18 +70,19 @@ class ReductionContext ( FilterContext ):
 
     def get_context_data ( self, name ):
         """ Returns the value of a specified item.
+
+            The reduced values are cached until the mask or the upstream
+            value changes, so they are read-only.
         """
         data = self.context.get_context_data( name )
-        mask = self._mask
-        if mask is None:
+        if self._mask is None:
             return data
 
         if self.use_value:
-            temp = data.copy()
-            putmask( temp, mask == 0, self.context_value_for( name ) )
-            return temp
+            return self._filtered_data( name, data, self._fill,
+                                        self.context_value_for( name ) )
 
-        return compress( mask, data, axis = 0 )
+        return self._filtered_data( name, data, self._reduce )
 
     #---------------------------------------------------------------------------
     #  Gets the value of a currently undefined item:
@@ -86,16 +95,13 @@ class ReductionContext ( FilterContext ):
         if data is Undefined:
             return data
 
-        mask = self._mask
-        if mask is None:
+        if self._mask is None:
             return data
 
         if self.use_value:
-            temp = data.copy()
-            putmask( temp, mask == 0, self.context_value_for( name ) )
-            return temp
+            return self._fill( data, self.context_value_for( name ) )
 
-        return compress( mask, data, axis = 0 )
+        return self._reduce( data )
 
     #---------------------------------------------------------------------------
     #  Sets the value of a specified item:
@@ -104,10 +110,12 @@ class ReductionContext ( FilterContext ):
     def set_context_data ( self, name, value ):
         """ Sets the value of a specified item.
         """
-        mask = self._mask
-        if mask is not None:
-            data = self.context.get_context_data( name )
-            put( data, nonzero( mask ), value )
+        if self._mask is not None:
+            data = self._writable_data( name )
+            put( data, self._indices, value )
+
+            # The upstream data is changed in place, which may not be noticed:
+            self._forget_filtered( [ name ] )
             self.context.set_context_data( name, data )
         else:
             self.context.set_context_data( name, value )
@@ -125,7 +133,7 @@ class ReductionContext ( FilterContext ):
         else:
             data = self.context.get_context_undefined( name, value )
             if data is not Undefined:
-                put( data, nonzero( mask ), value )
+                put( data, self._indices, value )
                 self.context.set_context_undefined( name, data )
 
     #---------------------------------------------------------------------------
@@ -137,6 +145,52 @@ class ReductionContext ( FilterContext ):
         """
         return self.create_context( mode )
 
+    #-- Private Methods --------------------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Returns the values of an array selected by the mask:
+    #---------------------------------------------------------------------------
+
+    def _reduce ( self, data ):
+        """ Returns the values of an array selected by the mask.
+        """
+        return take( data, self._indices, axis = 0 )
+
+    #---------------------------------------------------------------------------
+    #  Returns a copy of an array with the values not selected by the mask
+    #  set to a specified value:
+    #---------------------------------------------------------------------------
+
+    def _fill ( self, data, value ):
+        """ Returns a copy of an array with the values not selected by the mask
+            set to a specified value.
+        """
+        temp = data.copy()
+        putmask( temp, self._excluded, value )
+        return temp
+
+    #---------------------------------------------------------------------------
+    #  Forgets the current mask and everything computed from it:
+    #---------------------------------------------------------------------------
+
+    def _reset_mask ( self ):
+        """ Forgets the current mask and everything computed from it.
+        """
+        super( ReductionContext, self )._reset_mask()
+        self._cur_indices  = None
+        self._cur_excluded = None
+
+    #-- Event Handlers ---------------------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Handles the 'use_value' trait being changed:
+    #---------------------------------------------------------------------------
+
+    def _use_value_changed ( self ):
+        """ Handles the 'use_value' trait being changed.
+        """
+        self._filtered = None
+
     #-- Property Implementations -----------------------------------------------
 
     #---------------------------------------------------------------------------
@@ -149,5 +203,25 @@ class ReductionContext ( FilterContext ):
         if (self_mask is None) or (context_mask is None):
             return context_mask
 
-        return compress( self_mask, context_mask, axis = 0 )
+        return take( context_mask, self._indices, axis = 0 )
+
+    #---------------------------------------------------------------------------
+    #  Implementation of the '_indices' property:
+    #---------------------------------------------------------------------------
+
+    def _get__indices ( self ):
+        if self._cur_indices is None:
+            self._cur_indices = nonzero( self._mask )[0]
+
+        return self._cur_indices
+
+    #---------------------------------------------------------------------------
+    #  Implementation of the '_excluded' property:
+    #---------------------------------------------------------------------------
+
+    def _get__excluded ( self ):
+        if self._cur_excluded is None:
+            self._cur_excluded = (self._mask == 0)
+
+        return self._cur_excluded
 
@@ -17,14 +17,21 @@
     elements of a context's arrays based on a specified Python expression.
     The result of the expression can be used to sort the elements in either
     ascending or descending order.
+
+    An expression returning a tuple of arrays, such as 'name, -age', sorts
+    lexicographically on them, the first array being the primary key. Ties are
+    always kept in their original order.
 """
 
 #-------------------------------------------------------------------------------
 #  Imports:
 #-------------------------------------------------------------------------------
 
+from numpy \
+    import argsort, asarray, lexsort
+
 from traits.api \
-    import Enum
+    import Any, Enum
 
 from traitsui.api \
     import View
@@ -50,6 +57,12 @@ class SortFilter ( ExpressionFilter ):
     # Sort mode:
     mode = Enum( 'ascending', 'descending', event = 'modified' )
 
+    #-- Private Traits ---------------------------------------------------------
+
+    # The last sort order computed, and the context and input values it was
+    # computed from:
+    _order = Any( transient = True )
+
     #---------------------------------------------------------------------------
     #  Traits view definitions:
     #---------------------------------------------------------------------------
@@ -65,18 +78,29 @@ class SortFilter ( ExpressionFilter ):
     def __call__ ( self, context ):
         """ Evaluates the result of the filter for the specified context.
         """
-        if self.enabled:
-            values = self.evaluate( context )
-            if values is not None:
-                values = zip( range( len( values ) ), values )
-                if self.mode == 'ascending':
-                    values.sort( lambda l, r: cmp( l[1], r[1] ) )
-                else:
-                    values.sort( lambda l, r: cmp( r[1], l[1] ) )
+        if not self.enabled:
+            return None
 
-                return [ v[0] for v in values ]
+        inputs = self._input_values( context )
+        cached = self._order
+        if ((cached is not None) and (cached[0] is context) and
+            _same_values( cached[1], inputs )):
+            return cached[2]
 
-        return None
+        order  = None
+        values = self.evaluate( context )
+        if values is not None:
+            if isinstance( values, tuple ):
+                keys = [ asarray( value ) for value in values ]
+            else:
+                keys = [ asarray( values ) ]
+
+            if (len( keys ) > 0) and (keys[0].ndim > 0):
+                order = sort_order( keys, self.mode == 'descending' )
+
+        self._order = ( context, inputs, order )
+
+        return order
 
     #---------------------------------------------------------------------------
     #  Evaluates the result of the filter for the specified context:
@@ -86,7 +110,66 @@ class SortFilter ( ExpressionFilter ):
         """ Evaluates the result of the filter for the specified context.
         """
         try:
-            return self._block.evaluate( context )
+            return self._expression.evaluate( context, self.chunk_size )
         except:
             return None
 
+    #-- Private Methods --------------------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Returns the current values of the inputs of the sort expression:
+    #---------------------------------------------------------------------------
+
+    def _input_values ( self, context ):
+        """ Returns the current values of the inputs of the sort expression.
+        """
+        return [ context.get( name )
+                 for name in sorted( self._expression.inputs ) ]
+
+    #-- Event Handlers ---------------------------------------------------------
+
+    #---------------------------------------------------------------------------
+    #  Handles the filter being updated:
+    #---------------------------------------------------------------------------
+
+    def _updated_changed ( self ):
+        """ Handles the filter being updated.
+        """
+        self._order = None
+
+#-------------------------------------------------------------------------------
+#  Returns the permutation which stably sorts a list of keys:
+#-------------------------------------------------------------------------------
+
+def sort_order ( keys, descending = False ):
+    """ Returns the array of indices which stably sorts the elements of a list
+        of equal length arrays lexicographically, the first array being the
+        primary key.
+    """
+    if descending:
+        # Sorting the reversed keys and reversing the result keeps ties in
+        # their original order:
+        last = len( keys[0] ) - 1
+        return last - sort_order( [ key[::-1] for key in keys ] )[::-1]
+
+    if len( keys ) == 1:
+        return argsort( keys[0], kind = 'mergesort' )
+
+    return lexsort( keys[::-1] )
+
+#-------------------------------------------------------------------------------
+#  Returns whether two lists of values are the same objects:
+#-------------------------------------------------------------------------------
+
+def _same_values ( values1, values2 ):
+    """ Returns whether two lists of values are the same objects.
+    """
+    if len( values1 ) != len( values2 ):
+        return False
+
+    for i, value in enumerate( values1 ):
+        if value is not values2[i]:
+            return False
+
+    return True
+
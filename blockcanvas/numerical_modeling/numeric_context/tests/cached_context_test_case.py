@@ -0,0 +1,111 @@
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+
+from numpy import arange, memmap, zeros
+from numpy.testing import assert_array_equal
+
+from blockcanvas.numerical_modeling.numeric_context.api import \
+    CachedContext, NumericContext
+
+class CachedContextTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.base = NumericContext()
+        for name in 'abc':
+            self.base[name] = zeros(100)    # 800 bytes each
+        self.context = CachedContext(self.base)
+
+    def test_unbounded(self):
+        a = self.context['a']
+        self.assertTrue(self.context['a'] is a)
+        self.context['b']
+
+        statistics = self.context.cache_statistics()
+        self.assertEqual(statistics['hits'], 1)
+        self.assertEqual(statistics['misses'], 2)
+        self.assertEqual(statistics['entries'], 2)
+        self.assertEqual(statistics['nbytes'], 1600)
+
+    def test_lru_eviction(self):
+        self.context.context_cache_size = 1600
+        self.context['a']
+        self.context['b']
+        self.context['a']
+        self.context['c']
+
+        statistics = self.context.cache_statistics()
+        self.assertEqual(statistics['evictions'], 1)
+        self.assertEqual(statistics['nbytes'], 1600)
+        self.assertEqual(sorted(self.context._context_cache), ['a', 'c'])
+
+    def test_too_large(self):
+        self.context.context_cache_size = 100
+        self.context['a']
+        statistics = self.context.cache_statistics()
+        self.assertEqual(statistics['entries'], 0)
+        self.assertEqual(statistics['nbytes'], 0)
+
+    def test_upstream_change(self):
+        self.context['a']
+        self.base['a'] = arange(100.0)
+        assert_array_equal(self.context['a'], arange(100.0))
+        self.assertEqual(self.context.cache_statistics()['misses'], 2)
+
+class SpillTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.base = NumericContext()
+        self.base['a'] = arange(100.0)
+        self.base['b'] = arange(100.0) * 2
+        self.context = CachedContext(self.base, context_cache_size=800,
+                                     context_spill_directory=self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_spilled_values_are_mapped(self):
+        self.context['a']
+        self.context['b']
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        a = self.context['a']
+        self.assertTrue(isinstance(a, memmap))
+        assert_array_equal(a, arange(100.0))
+
+        statistics = self.context.cache_statistics()
+        self.assertEqual(statistics['spills'], 1)
+        self.assertEqual(statistics['spill_hits'], 1)
+
+    def test_spilled_files_are_removed(self):
+        self.context['a']
+        self.context['b']
+        self.base['a'] = arange(100.0) + 1
+        self.assertEqual(os.listdir(self.directory), [])
+        assert_array_equal(self.context['a'], arange(100.0) + 1)
+
+    def test_spilled_files_are_removed_with_context(self):
+        self.context['a']
+        self.context['b']
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        del self.context
+        gc.collect()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_missing_spill_directory(self):
+        self.context.context_spill_directory = os.path.join(self.directory,
+                                                            'missing')
+        self.context['a']
+        self.context['b']
+        assert_array_equal(self.context['a'], arange(100.0))
+
+        statistics = self.context.cache_statistics()
+        self.assertEqual(statistics['spills'], 0)
+        self.assertEqual(statistics['misses'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
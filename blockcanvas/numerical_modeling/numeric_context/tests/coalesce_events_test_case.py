@@ -0,0 +1,83 @@
+import unittest
+
+from numpy import arange
+
+import pyface.timer.api
+
+from blockcanvas.numerical_modeling.numeric_context.api import NumericContext
+from blockcanvas.numerical_modeling.numeric_context.context_modified import \
+    ContextModified
+from blockcanvas.numerical_modeling.numeric_context.event import \
+    merge_context_modified_events
+
+class CoalesceEventsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.context = NumericContext()
+        self.events = []
+        self.context.on_trait_change(lambda event: self.events.append(event),
+                                     'context_modified')
+
+        # Keep the callbacks of the timer to run them explicitly
+        self.timers = []
+        self._do_after = pyface.timer.api.do_after
+        pyface.timer.api.do_after = \
+            lambda interval, callable: self.timers.append(callable)
+
+    def tearDown(self):
+        pyface.timer.api.do_after = self._do_after
+
+    def test_merge(self):
+        'Merge keeps the first order of the names'
+        a = ContextModified(added=['x', 'y'], modified=['z'], removed=['w'])
+        b = ContextModified(added=['w'], modified=['z', 'v'], removed=['x'],
+                            changed=['u'])
+        merge_context_modified_events(a, b)
+        self.assertEqual(a.added, ['y', 'w'])
+        self.assertEqual(a.modified, ['z', 'v'])
+        self.assertEqual(a.removed, [])
+        self.assertEqual(a.changed, ['u'])
+
+    def test_no_delay(self):
+        'Events are posted immediately without a delay'
+        self.context['x'] = 1
+        self.context['y'] = arange(3)
+        self.assertEqual(len(self.events), 2)
+        self.assertEqual(self.timers, [])
+
+    def test_delay(self):
+        'Changes within the delay are posted as a single event'
+        self.context.context_coalesce_delay = 10
+        self.context['x'] = 1
+        self.context['y'] = arange(3)
+        self.context['x'] = 2
+        self.assertEqual(self.events, [])
+        self.assertEqual(len(self.timers), 1)
+
+        self.timers.pop()()
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+        self.assertEqual(event.added, ['y'])
+        self.assertEqual(event.changed, ['x'])
+        self.assertFalse(self.context.defer_events)
+
+        # The next change starts a new delay
+        self.context['x'] = 3
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(len(self.timers), 1)
+        self.timers.pop()()
+        self.assertEqual(len(self.events), 2)
+        self.assertEqual(self.timers, [])
+
+    def test_delay_while_deferred(self):
+        'No delay starts while events are already deferred'
+        self.context.context_coalesce_delay = 10
+        self.context.defer_events = True
+        self.context['x'] = 1
+        self.context.defer_events = False
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.timers, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from numpy import arange, sqrt
+from numpy.testing import assert_array_equal
+
+from blockcanvas.numerical_modeling.numeric_context.api import \
+    EvaluatedItem, ExpressionFilter, NumericContext
+from blockcanvas.numerical_modeling.numeric_context.compiled_expression \
+    import compile_expression
+
+class CompiledExpressionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.context = NumericContext()
+        self.context['a'] = arange(10.0)
+        self.context['b'] = arange(10.0) * 2
+
+    def test_shared(self):
+        expression = compile_expression('a + b')
+        self.assertTrue(compile_expression('a + b') is expression)
+        self.assertEqual(expression.inputs, frozenset(['a', 'b']))
+        self.assertTrue(expression.depends_on(['c', 'b']))
+        self.assertFalse(expression.depends_on(['c']))
+
+    def test_chunks(self):
+        expression = compile_expression('(a + b) * 2 > 10')
+        assert_array_equal(expression.evaluate(self.context, 3),
+                           expression.evaluate(self.context))
+
+    def test_chunks_not_element_wise(self):
+        # The result of a reduction is computed on whole arrays.
+        expression = compile_expression('a.sum()')
+        self.assertEqual(expression.evaluate(self.context, 3), 45.0)
+
+    def test_not_chunked(self):
+        # Attributes, subscripts and calls of functions which are not ufuncs
+        # may mix the elements, so the expression is not chunked.
+        for text in ('a - a.mean()', 'a - a[::-1]', 'a - sorted(a)'):
+            expression = compile_expression(text)
+            assert_array_equal(expression.evaluate(self.context, 3),
+                               expression.evaluate(self.context))
+        assert_array_equal(compile_expression('a - a.mean()').evaluate(
+                               self.context, 3), arange(10.0) - 4.5)
+
+    def test_chunks_ufunc(self):
+        self.context['sqrt'] = sqrt
+        expression = compile_expression('sqrt(a) + abs(b)')
+        self.assertEqual(expression._calls, set(['sqrt', 'abs']))
+        assert_array_equal(expression.evaluate(self.context, 3),
+                           sqrt(arange(10.0)) + arange(10.0) * 2)
+
+    def test_filter(self):
+        filter = ExpressionFilter('a > b - 5', chunk_size=4)
+        assert_array_equal(filter(self.context), arange(10) < 5)
+        self.assertTrue(filter.context_changed(self.context, ['b']))
+        self.assertFalse(filter.context_changed(self.context, ['c']))
+
+    def test_evaluated_item(self):
+        item = EvaluatedItem(evaluate='a * b', chunk_size=4)
+        self.context.context_items.append(item)
+        assert_array_equal(self.context['a * b'], arange(10.0)**2 * 2)
+
+if __name__ == '__main__':
+    unittest.main()
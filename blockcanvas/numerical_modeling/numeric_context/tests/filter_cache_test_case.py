@@ -0,0 +1,100 @@
+import unittest
+
+from numpy import arange, array, nan
+from numpy.testing import assert_array_equal
+
+from blockcanvas.numerical_modeling.numeric_context.api import \
+    MappingContext, MaskFilter, NumericContext, ReductionContext
+
+class ReductionCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.base = NumericContext()
+        self.base['x'] = arange(5.0)
+        self.base['y'] = arange(5.0) * 10
+        self.filter = MaskFilter(mask=array([1, 0, 1, 1, 0], bool))
+        self.context = ReductionContext(self.base, context_filter=self.filter)
+
+    def test_reduced_values_are_cached(self):
+        x = self.context['x']
+        assert_array_equal(x, [0, 2, 3])
+        self.assertTrue(self.context['x'] is x)
+        assert_array_equal(self.context['y'], [0, 20, 30])
+
+    def test_cached_values_are_read_only(self):
+        x = self.context['x']
+        def modify():
+            x[0] = 100.0
+        self.assertRaises(ValueError, modify)
+        assert_array_equal(self.context['x'], [0, 2, 3])
+        self.assertEqual(self.base['x'][0], 0.0)
+
+    def test_upstream_change(self):
+        x = self.context['x']
+        self.base['x'] = arange(5.0) + 1
+        assert_array_equal(self.context['x'], [1, 3, 4])
+        self.assertFalse(self.context['x'] is x)
+
+    def test_mask_change(self):
+        self.context['x']
+        self.filter.mask = array([0, 1, 0, 0, 1], bool)
+        assert_array_equal(self.context['x'], [1, 4])
+        assert_array_equal(self.context.context_indices, arange(5))
+
+    def test_set_through_mask(self):
+        self.context['x']
+        self.context['x'] = array([7.0, 8.0, 9.0])
+        assert_array_equal(self.base['x'], [7, 1, 8, 9, 4])
+        assert_array_equal(self.context['x'], [7, 8, 9])
+
+    def test_set_through_nested_contexts(self):
+        # The inner context hands out its cached, read-only value.
+        outer = ReductionContext(self.context, context_filter=MaskFilter(
+            mask=array([1, 0, 1], bool)))
+        assert_array_equal(outer['x'], [0, 3])
+        outer['x'] = array([7.0, 9.0])
+        assert_array_equal(self.base['x'], [7, 1, 2, 9, 4])
+        assert_array_equal(self.context['x'], [7, 2, 9])
+        assert_array_equal(outer['x'], [7, 9])
+
+    def test_use_value(self):
+        self.context['x']
+        self.context.use_value = True
+        assert_array_equal(self.context['x'], [0, nan, 2, 3, nan])
+
+class MappingCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.base = NumericContext()
+        self.base['x'] = arange(4.0) * 10
+        self.filter = MaskFilter(mask=array([3, 1, 0, 2]))
+        self.context = MappingContext(self.base, context_filter=self.filter)
+
+    def test_mapped_values_are_cached(self):
+        x = self.context['x']
+        assert_array_equal(x, [30, 10, 0, 20])
+        self.assertTrue(self.context['x'] is x)
+        self.assertFalse(x.flags.writeable)
+
+    def test_set_through_nested_contexts(self):
+        # The value read from the inner context before is left unchanged.
+        x = self.context['x']
+        outer = MappingContext(self.context, context_filter=MaskFilter(
+            mask=array([1, 0, 2, 3])))
+        assert_array_equal(outer['x'], [10, 30, 0, 20])
+        outer['x'] = array([1.0, 2.0, 3.0, 4.0])
+        assert_array_equal(x, [30, 10, 0, 20])
+        assert_array_equal(outer['x'], [1, 2, 3, 4])
+        assert_array_equal(self.context['x'], [2, 1, 3, 4])
+        assert_array_equal(self.base['x'], [3, 1, 4, 2])
+
+    def test_mask_change(self):
+        self.context['x']
+        assert_array_equal(self.context._imask, [2, 1, 3, 0])
+        self.filter.mask = array([0, 1, 3, 2])
+        assert_array_equal(self.context['x'], [0, 10, 30, 20])
+        assert_array_equal(self.context._imask, [0, 1, 3, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from numpy import arange, array
+from numpy.testing import assert_array_equal
+
+from blockcanvas.numerical_modeling.numeric_context.api import \
+    NumericContext, SortFilter
+from blockcanvas.numerical_modeling.numeric_context.sort_filter import \
+    sort_order
+
+class CountingExpression(object):
+    """ Stand-in for a compiled expression, counting its evaluations.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.count = 0
+
+    def __getattr__(self, name):
+        return getattr(self.expression, name)
+
+    def evaluate(self, context, chunk_size=0):
+        self.count += 1
+        return self.expression.evaluate(context, chunk_size)
+
+class SortOrderTestCase(unittest.TestCase):
+
+    def test_ascending_is_stable(self):
+        assert_array_equal(sort_order([array([3, 1, 2, 1])]), [1, 3, 2, 0])
+
+    def test_descending_is_stable(self):
+        assert_array_equal(sort_order([array([3, 1, 2, 1, 3])], True),
+                           [0, 4, 2, 1, 3])
+
+    def test_multiple_keys(self):
+        keys = [array([1, 0, 1, 0]), array([2.0, 5.0, 1.0, 4.0])]
+        assert_array_equal(sort_order(keys), [3, 1, 2, 0])
+        assert_array_equal(sort_order(keys, True), [0, 2, 1, 3])
+
+class SortFilterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.context = NumericContext()
+        self.context['a'] = array([2.0, 0.0, 1.0])
+        self.context['b'] = array([1, 0, 0])
+        self.filter = SortFilter('a')
+        self.expression = CountingExpression(self.filter._expression)
+        self.filter._expression = self.expression
+
+    def test_order_is_cached(self):
+        order = self.filter(self.context)
+        assert_array_equal(order, [1, 2, 0])
+        self.assertTrue(self.filter(self.context) is order)
+        self.assertEqual(self.expression.count, 1)
+
+    def test_input_change(self):
+        self.filter(self.context)
+        self.context['a'] = arange(3.0)
+        assert_array_equal(self.filter(self.context), [0, 1, 2])
+
+    def test_mode_change(self):
+        order = self.filter(self.context)
+        self.filter.mode = 'descending'
+        assert_array_equal(self.filter(self.context), [0, 2, 1])
+        self.assertFalse(self.filter(self.context) is order)
+        self.assertEqual(self.expression.count, 2)
+
+    def test_multiple_keys(self):
+        self.filter.filter = 'b, -a'
+        assert_array_equal(self.filter(self.context), [2, 1, 0])
+
+if __name__ == '__main__':
+    unittest.main()
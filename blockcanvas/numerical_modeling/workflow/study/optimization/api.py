@@ -0,0 +1,3 @@
+from optimization_study import (OptimizationConstraint, OptimizationStudy,
+                                OptimizationVariable)
+from telemetry import OptimizationTelemetry
@@ -0,0 +1,211 @@
+""" Optimization of the inputs of a block with COBYLA.
+
+A study minimizes an objective computed by a block, subject to bounds on
+other values the block computes, by changing some of its inputs.  The inputs
+and constraints can be scalars or arrays: their values are flattened into the
+vector of variables and the list of constraints COBYLA works on.  The block
+is restricted once to the statements between the inputs and the values the
+study needs, and every evaluation is recorded in the study's telemetry.
+"""
+
+# Standard library imports
+import time
+
+# Numeric library imports
+from numpy import asarray, concatenate, inf, isinf, prod
+
+# Enthought library imports
+from codetools.blocks.api import Block
+from traits.api import (Any, Bool, Dict, Float, HasTraits, Instance, Int,
+                        List, Str)
+
+# Local imports
+from blockcanvas.cobyla2c.cobyla import minimize, RCSTRINGS
+from telemetry import OptimizationTelemetry
+
+
+class OptimizationVariable(HasTraits):
+    """ An input of the block changed by the study, scalar or array.
+    """
+
+    # The name of the input in the context.
+    name = Str
+
+    # Bounds of the values of the input.  Infinite bounds are ignored.
+    low = Float(-inf)
+    high = Float(inf)
+
+
+class OptimizationConstraint(HasTraits):
+    """ Bounds on a value computed by the block, scalar or array.
+    """
+
+    # The name of the value computed by the block.
+    name = Str
+
+    # Bounds of the value.  Infinite bounds are ignored.
+    low = Float(-inf)
+    high = Float(inf)
+
+
+class OptimizationStudy(HasTraits):
+    """ Minimize an output of a block by changing some of its inputs.
+    """
+
+    # The block computing the objective and constraints.
+    block = Instance(Block)
+
+    # The context holding the inputs of the block.  It is left at the
+    # solution, with the outputs of the block updated, after an optimization.
+    context = Any
+
+    # The name of the scalar value computed by the block which is minimized.
+    objective = Str
+
+    # The inputs changed to minimize the objective.
+    variables = List(OptimizationVariable)
+
+    # The bounds on the values computed by the block.
+    constraints = List(OptimizationConstraint)
+
+    # Initial and final changes to the variables.
+    rhobeg = Float(0.5)
+    rhoend = Float(1.0e-6)
+
+    # Maximum number of evaluations of an optimization, COBYLA's default if 0.
+    maxfun = Int(0)
+
+    # Whether an optimization starts from the solution of the previous one
+    # rather than from the values of the variables in the context.
+    warm_start = Bool(True)
+
+    # The values of the variables found by the last optimization.
+    solution = Dict
+
+    # COBYLA's return code and message for the last optimization.
+    rc = Int
+    message = Str
+
+    # Record of all the evaluations of the optimizations.
+    telemetry = Instance(OptimizationTelemetry, ())
+
+    ##########################################################################
+    # OptimizationStudy interface
+    ##########################################################################
+
+    def optimize(self):
+        """ Minimize the objective and return the solution, a dict of the
+            values of the variables.
+        """
+        names = [variable.name for variable in self.variables]
+        outputs = [self.objective] + [constraint.name
+                                      for constraint in self.constraints]
+        sub_block = self.block.restrict(inputs=names, outputs=outputs)
+
+        # The values the block reads, which the variables are set in.
+        namespace = {}
+        for name in sub_block.inputs:
+            if name in self.context:
+                namespace[name] = self.context[name]
+
+        start = self._start_values(names)
+        shapes = [asarray(start[name]).shape for name in names]
+        x0 = concatenate([asarray(start[name], dtype=float).ravel()
+                          for name in names])
+        low, up = self._bounds(shapes)
+
+        telemetry = self.telemetry
+        telemetry.start()
+
+        def function(x):
+            namespace.update(_unpack(x, names, shapes))
+            block_start = time.time()
+            sub_block.execute(namespace)
+            block_time = time.time() - block_start
+
+            objective = float(namespace[self.objective])
+            constraints = self._constraint_values(namespace)
+            violation = max([0.0] + [-value for value in constraints])
+            telemetry.record(objective, violation, block_time)
+            return objective, constraints
+
+        self.rc, nfeval, x = minimize(function, x0.tolist(), low=low, up=up,
+                                      rhobeg=self.rhobeg, rhoend=self.rhoend,
+                                      maxfun=self.maxfun or None)
+        self.message = RCSTRINGS.get(self.rc, '')
+        self.solution = dict(_unpack(x, names, shapes))
+
+        # Leave the context at the solution, updating everything which
+        # depends on the variables.
+        for name, value in self.solution.iteritems():
+            self.context[name] = value
+        self.block.restrict(inputs=names).execute(self.context)
+
+        return self.solution
+
+    ##########################################################################
+    # Protected interface
+    ##########################################################################
+
+    def _bounds(self, shapes):
+        """ Return COBYLA's lists of lower and upper bounds of the variables,
+            None for the missing ones, or None for a list of missing bounds.
+        """
+        low = []
+        up = []
+        for variable, shape in zip(self.variables, shapes):
+            size = int(prod(shape))
+            low.extend([_bound(variable.low)] * size)
+            up.extend([_bound(variable.high)] * size)
+        if low.count(None) == len(low):
+            low = None
+        if up.count(None) == len(up):
+            up = None
+        return low, up
+
+    def _constraint_values(self, namespace):
+        """ Return the values which COBYLA keeps positive to meet the
+            constraints.
+        """
+        values = []
+        for constraint in self.constraints:
+            value = asarray(namespace[constraint.name], dtype=float).ravel()
+            if not isinf(constraint.low):
+                values.extend((value - constraint.low).tolist())
+            if not isinf(constraint.high):
+                values.extend((constraint.high - value).tolist())
+        return values
+
+    def _start_values(self, names):
+        """ Return the values of the variables to start an optimization from.
+        """
+        if self.warm_start and set(names).issubset(self.solution):
+            return self.solution
+        return dict((name, self.context[name]) for name in names)
+
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
+
+def _bound(value):
+    """ COBYLA's bound for a value: None if it is infinite.
+    """
+    if isinf(value):
+        return None
+    return value
+
+def _unpack(x, names, shapes):
+    """ Return the (name, value) pairs of the variables packed in x.
+    """
+    x = asarray(x, dtype=float)
+    pairs = []
+    offset = 0
+    for name, shape in zip(names, shapes):
+        size = int(prod(shape))
+        if shape == ():
+            value = float(x[offset])
+        else:
+            value = x[offset:offset+size].reshape(shape)
+        pairs.append((name, value))
+        offset += size
+    return pairs
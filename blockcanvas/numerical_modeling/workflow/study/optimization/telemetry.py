@@ -0,0 +1,150 @@
+""" Per-iteration record of the progress of an optimization.
+
+Each evaluation of the objective stores a few numbers in arrays which double
+in size when they are full, so recording an iteration only costs a few
+assignments, and the history can be analysed with numpy directly.
+"""
+
+# Standard library imports
+import time
+
+# Numeric library imports
+from numpy import empty, float64
+
+# Enthought library imports
+from traits.api import Any, Array, Float, HasTraits, Int, Property
+
+
+# Columns of the record, in order.
+COLUMNS = ('run', 'evaluations', 'objective', 'violation', 'wall_time',
+           'block_time')
+
+
+class OptimizationTelemetry(HasTraits):
+    """ Objective value, constraint violation, function evaluation count and
+        timings of each iteration of the optimizations of a study.
+    """
+
+    # Number of iterations recorded.
+    iterations = Int(0)
+
+    # Number of optimizations recorded, numbered from 0 in the run column.
+    runs = Int(0)
+
+    # The columns recorded for each iteration, as views on the first
+    # iterations rows of the record:
+    #   run: the optimization the iteration belongs to
+    #   evaluations: total number of evaluations of the objective so far
+    #   objective: value of the objective
+    #   violation: largest violation of a constraint, or 0
+    #   wall_time: seconds since the start of the optimization
+    #   block_time: seconds spent evaluating the block in the iteration
+    run = Property(Array)
+    evaluations = Property(Array)
+    objective = Property(Array)
+    violation = Property(Array)
+    wall_time = Property(Array)
+    block_time = Property(Array)
+
+    # Time the current optimization started at.
+    _start_time = Float
+
+    # The record, one row per column and one column per iteration, with room
+    # for more iterations, or None before the first iteration.
+    _data = Any
+
+    ##########################################################################
+    # OptimizationTelemetry interface
+    ##########################################################################
+
+    def start(self):
+        """ Start recording a new optimization.
+        """
+        self.runs += 1
+        self._start_time = time.time()
+
+    def record(self, objective, violation, block_time):
+        """ Record an iteration of the current optimization.
+        """
+        index = self.iterations
+        data = self._data
+        if data is None or index == data.shape[1]:
+            data = self._grow()
+
+        column = data[:, index]
+        column[0] = self.runs - 1
+        column[1] = index + 1
+        column[2] = objective
+        column[3] = violation
+        column[4] = time.time() - self._start_time
+        column[5] = block_time
+        self.iterations = index + 1
+
+    def clear(self):
+        """ Forget all the iterations recorded.
+        """
+        self._data = None
+        self.iterations = 0
+        self.runs = 0
+
+    def summary(self):
+        """ Return a dict of the totals of the iterations recorded: the number
+            of runs and evaluations, the wall time, the time spent in the block
+            and in the optimizer itself, and the last objective value and
+            constraint violation.
+        """
+        wall_time = 0.0
+        for run in range(self.runs):
+            times = self.wall_time[self.run == run]
+            if len(times):
+                wall_time += times[-1]
+        block_time = float(self.block_time.sum())
+
+        summary = {'runs': self.runs,
+                   'evaluations': self.iterations,
+                   'wall_time': wall_time,
+                   'block_time': block_time,
+                   'optimizer_time': wall_time - block_time}
+        if self.iterations:
+            summary['objective'] = float(self.objective[-1])
+            summary['violation'] = float(self.violation[-1])
+        return summary
+
+    ##########################################################################
+    # Protected interface
+    ##########################################################################
+
+    def _grow(self):
+        """ Double the room in the record.
+        """
+        size = 64
+        if self._data is not None:
+            size = 2 * self._data.shape[1]
+        data = empty((len(COLUMNS), size), dtype=float64)
+        if self._data is not None:
+            data[:, :self.iterations] = self._data[:, :self.iterations]
+        self._data = data
+        return data
+
+    def _column(self, name):
+        if self._data is None:
+            return empty(0, dtype=float64)
+        return self._data[COLUMNS.index(name), :self.iterations]
+
+    def _get_run(self):
+        return self._column('run').astype(int)
+
+    def _get_evaluations(self):
+        return self._column('evaluations').astype(int)
+
+    def _get_objective(self):
+        return self._column('objective')
+
+    def _get_violation(self):
+        return self._column('violation')
+
+    def _get_wall_time(self):
+        return self._column('wall_time')
+
+    def _get_block_time(self):
+        return self._column('block_time')
@@ -0,0 +1,121 @@
+""" Unit testing for the optimization study.
+"""
+
+# Standard imports
+import unittest
+
+# Numeric library imports
+from numpy import array
+from numpy.testing import assert_almost_equal
+
+# ETS imports
+from codetools.blocks.api import Block
+from codetools.contexts.api import DataContext
+
+# Local imports
+from blockcanvas.numerical_modeling.workflow.study.optimization.api import (
+    OptimizationConstraint, OptimizationStudy, OptimizationTelemetry,
+    OptimizationVariable)
+
+
+class OptimizationStudyTestCase(unittest.TestCase):
+    """ Unit testing for OptimizationStudy
+    """
+
+    def setUp(self):
+        code = "error = ((x - target)**2).sum() + (y - 1.0)**2\n" \
+               "total = x.sum() + y\n" \
+               "first = x[0]\n"
+        self.block = Block(code)
+
+        self.context = DataContext()
+        self.context['x'] = array([0.0, 0.0, 0.0])
+        self.context['y'] = 0.0
+        self.context['target'] = array([1.0, 2.0, 3.0])
+
+        self.study = OptimizationStudy(
+            block=self.block, context=self.context, objective='error',
+            variables=[OptimizationVariable(name='x'),
+                       OptimizationVariable(name='y', low=-2.0, high=2.0)])
+
+    def test_vector_inputs(self):
+        solution = self.study.optimize()
+        assert_almost_equal(solution['x'], [1.0, 2.0, 3.0], 4)
+        assert_almost_equal(solution['y'], 1.0, 4)
+        self.assertEqual(solution['x'].shape, (3,))
+        self.assertTrue(isinstance(solution['y'], float))
+
+        # The context is left at the solution.
+        assert_almost_equal(self.context['x'], [1.0, 2.0, 3.0], 4)
+        assert_almost_equal(self.context['total'], 7.0, 4)
+
+    def test_multiple_constraints(self):
+        self.study.constraints = [
+            OptimizationConstraint(name='total', high=5.0),
+            OptimizationConstraint(name='first', low=1.5)]
+        solution = self.study.optimize()
+        self.assertTrue(solution['x'].sum() + solution['y'] <= 5.0 + 1e-4)
+        self.assertTrue(solution['x'][0] >= 1.5 - 1e-4)
+        self.assertTrue(self.study.telemetry.violation[-1] < 1e-4)
+
+    def test_warm_start(self):
+        self.study.optimize()
+        first_run = self.study.telemetry.iterations
+
+        self.study.optimize()
+        second_run = self.study.telemetry.iterations - first_run
+        self.assertTrue(second_run < first_run)
+
+        # Without a warm start, the optimization starts from the context,
+        # which is at the solution as well.
+        self.context['x'] = array([0.0, 0.0, 0.0])
+        self.study.warm_start = False
+        self.study.optimize()
+        third_run = (self.study.telemetry.iterations - first_run -
+                     second_run)
+        self.assertTrue(third_run > second_run)
+
+    def test_telemetry(self):
+        self.study.optimize()
+        telemetry = self.study.telemetry
+        count = telemetry.iterations
+        self.assertTrue(count > 64)
+        self.assertEqual(list(telemetry.evaluations), range(1, count+1))
+        self.assertEqual(set(telemetry.run), set([0]))
+        self.assertTrue((telemetry.wall_time[1:] >=
+                         telemetry.wall_time[:-1]).all())
+        self.assertEqual(telemetry.objective[0], 14.0 + 1.0)
+
+        summary = telemetry.summary()
+        self.assertEqual(summary['runs'], 1)
+        self.assertEqual(summary['evaluations'], count)
+        assert_almost_equal(summary['objective'], 0.0, 6)
+
+
+class OptimizationTelemetryTestCase(unittest.TestCase):
+    """ Unit testing for OptimizationTelemetry
+    """
+
+    def test_record(self):
+        telemetry = OptimizationTelemetry()
+        for run in range(2):
+            telemetry.start()
+            for i in range(100):
+                telemetry.record(float(i), 0.5, 0.001)
+
+        self.assertEqual(telemetry.iterations, 200)
+        self.assertEqual(list(telemetry.run), [0]*100 + [1]*100)
+        self.assertEqual(list(telemetry.objective), range(100)*2)
+        assert_almost_equal(telemetry.summary()['block_time'], 0.2)
+
+    def test_clear(self):
+        telemetry = OptimizationTelemetry()
+        telemetry.start()
+        telemetry.record(1.0, 0.0, 0.0)
+        telemetry.clear()
+        self.assertEqual(len(telemetry.objective), 0)
+        self.assertEqual(telemetry.summary()['evaluations'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+""" Evaluation of a block over the Cartesian product of values of its inputs.
+
+The values of each swept input are stacked along a new leading axis, one entry
+per case.  When the functions of the block are known to compute each case
+independently of the others, the sweep can be asked to execute the block
+restricted to the swept inputs once on the stacked inputs, every output then
+holding the results of all the cases.  This is not the default: a function
+such as a cumulative sum broadcasts over the stacked inputs but mixes the
+cases, and no check of the results can tell.  Otherwise, or when the
+vectorized execution fails, the cases are executed one at a time, in chunks
+spread over a pool of worker processes.  Either way the results are stored as
+one array per name, with one row per case.
+"""
+
+# Standard library imports
+import logging
+import multiprocessing
+
+# Numeric library imports
+from numpy import array, asarray, indices
+
+# Enthought library imports
+from codetools.blocks.api import Block
+from traits.api import Any, Bool, Dict, HasTraits, Instance, Int, List, Str
+
+# Logger
+logger = logging.getLogger(__name__)
+
+
+class SweepResults(HasTraits):
+    """ The inputs and outputs of all the cases of a sweep, one array per name
+        with one row per case.
+    """
+
+    # The swept inputs, in the order of the axes of the sweep.
+    input_names = List(Str)
+
+    # The outputs of the block stored for each case.
+    output_names = List(Str)
+
+    # The number of values of each swept input.
+    shape = Any
+
+    # The values by name, stacked along a leading case axis.
+    arrays = Dict
+
+    # Whether the cases were evaluated all at once.
+    vectorized = Bool(False)
+
+    def __len__(self):
+        if not self.input_names:
+            return 0
+        return len(self.arrays[self.input_names[0]])
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def case(self, index):
+        """ Return a dict of the inputs and outputs of a case.
+        """
+        return dict((name, values[index])
+                    for name, values in self.arrays.iteritems())
+
+    def grid(self, name):
+        """ Return the values of name with the case axis reshaped to one axis
+            per swept input.
+        """
+        values = self.arrays[name]
+        return values.reshape(self.shape + values.shape[1:])
+
+
+class ParametricSweep(HasTraits):
+    """ Execute a block for every combination of values of some inputs.
+    """
+
+    # The block to execute.
+    block = Instance(Block)
+
+    # The context holding the inputs of the block which are not swept.
+    context = Any
+
+    # The values of each swept input.
+    inputs = Dict(Str, List)
+
+    # The outputs to store for each case.  All the outputs of the block which
+    # depend on the swept inputs if empty.
+    outputs = List(Str)
+
+    # Whether to execute all the cases at once, on the stacked inputs.  Only
+    # set it for blocks whose functions compute each case of stacked inputs
+    # independently of the others, otherwise the results are wrong.
+    vectorize = Bool(False)
+
+    # Number of worker processes executing the cases when they are not
+    # executed all at once.  They are executed in this process if it is 0.
+    workers = Int(0)
+
+    # Number of cases sent to a worker at a time.
+    chunk_size = Int(64)
+
+    def run(self):
+        """ Execute the block for all the cases and return the SweepResults.
+        """
+        if not self.inputs:
+            raise ValueError('ParametricSweep: no input to sweep')
+
+        input_names = sorted(self.inputs)
+        values = [list(self.inputs[name]) for name in input_names]
+        shape = tuple(len(value_list) for value_list in values)
+
+        # The values of each input for all the cases, in C order.
+        stacked = {}
+        case_indices = indices(shape).reshape(len(shape), -1)
+        for axis, name in enumerate(input_names):
+            value_list = values[axis]
+            stacked[name] = array([value_list[i] for i in case_indices[axis]])
+
+        if self.outputs:
+            sub_block = self.block.restrict(inputs=input_names,
+                                            outputs=self.outputs)
+            output_names = list(self.outputs)
+        else:
+            sub_block = self.block.restrict(inputs=input_names)
+            output_names = sorted(sub_block.outputs)
+
+        base = {}
+        for name in sub_block.inputs:
+            if name in self.context and name not in stacked:
+                base[name] = self.context[name]
+
+        outputs = None
+        if self.vectorize:
+            outputs = execute_vectorized(sub_block, base, stacked,
+                                         output_names)
+        vectorized = outputs is not None
+        if not vectorized:
+            logger.debug('ParametricSweep: executing %d cases one at a time',
+                         len(case_indices[0]))
+            outputs = self._execute_cases(sub_block, base, stacked,
+                                          output_names)
+
+        arrays = dict(stacked)
+        arrays.update(outputs)
+        return SweepResults(input_names=input_names,
+                            output_names=output_names, shape=shape,
+                            arrays=arrays, vectorized=vectorized)
+
+    def _execute_cases(self, block, base, stacked, output_names):
+        """ Execute the cases one at a time, in chunks over the workers, and
+            return the stacked outputs.
+        """
+        count = len(stacked.values()[0])
+        chunks = []
+        for start in range(0, count, self.chunk_size):
+            chunk = dict((name, values[start:start+self.chunk_size])
+                         for name, values in stacked.iteritems())
+            chunks.append((block, base, chunk, output_names))
+
+        if self.workers > 0 and len(chunks) > 1:
+            pool = multiprocessing.Pool(self.workers)
+            try:
+                results = pool.map(_execute_chunk, chunks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = map(_execute_chunk, chunks)
+
+        return dict((name, array([value for result in results
+                                  for value in result[name]]))
+                    for name in output_names)
+
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
+
+def _execute_case(block, base, stacked, index, output_names):
+    """ Execute a single case and return the list of its outputs.
+    """
+    namespace = dict(base)
+    for name, values in stacked.iteritems():
+        namespace[name] = values[index]
+    block.execute(namespace)
+    return [namespace[name] for name in output_names]
+
+def _execute_chunk(task):
+    """ Execute the cases of a chunk of a sweep in a worker.
+    """
+    return execute_cases(*task)
+
+#-------------------------------------------------------------------------
+# Public functions
+#-------------------------------------------------------------------------
+
+def execute_cases(block, base, stacked, output_names):
+    """ Execute the cases of stacked inputs one at a time and return lists of
+        their outputs by name.
+    """
+    results = dict((name, []) for name in output_names)
+    for index in range(len(stacked.values()[0])):
+        case = _execute_case(block, base, stacked, index, output_names)
+        for name, value in zip(output_names, case):
+            results[name].append(value)
+    return results
+
+def execute_vectorized(block, base, stacked, output_names):
+    """ Execute all the cases at once and return the stacked outputs, or None
+        if the execution fails or an output does not hold one value per case.
+
+        The functions of the block must compute each case independently of
+        the others: functions mixing the cases, such as cumulative sums, give
+        an output of the right length with wrong values.
+    """
+    count = len(stacked.values()[0])
+    namespace = dict(base)
+    namespace.update(stacked)
+    try:
+        block.execute(namespace)
+        outputs = dict((name, asarray(namespace[name]))
+                       for name in output_names)
+    except Exception:
+        return None
+
+    for output in outputs.itervalues():
+        if output.ndim == 0 or len(output) != count:
+            return None
+
+    return outputs
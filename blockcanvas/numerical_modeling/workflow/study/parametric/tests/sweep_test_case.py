@@ -0,0 +1,100 @@
+""" Unit testing for the parametric sweep.
+"""
+
+# Standard imports
+import unittest
+
+# Numeric library imports
+from numpy import array
+from numpy.testing import assert_array_equal
+
+# ETS imports
+from codetools.blocks.api import Block
+from codetools.contexts.api import DataContext
+
+# Local imports
+from blockcanvas.numerical_modeling.workflow.study.parametric.sweep import \
+     ParametricSweep, SweepResults
+
+
+class ParametricSweepTestCase(unittest.TestCase):
+    """ Unit testing for ParametricSweep
+    """
+
+    def setUp(self):
+        self.context = DataContext()
+        self.context['a'] = 1
+        self.context['b'] = 2
+        self.context['c'] = 10
+
+    def test_vectorized(self):
+        block = Block("d = a + b\n"
+                      "e = d * c\n")
+        sweep = ParametricSweep(block=block, context=self.context,
+                                inputs={'a': [1, 2, 3], 'b': [10, 20]},
+                                vectorize=True)
+        results = sweep.run()
+
+        self.assertTrue(results.vectorized)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results.output_names, ['d', 'e'])
+        assert_array_equal(results['a'], [1, 1, 2, 2, 3, 3])
+        assert_array_equal(results['b'], [10, 20, 10, 20, 10, 20])
+        assert_array_equal(results['e'], (results['a'] + results['b']) * 10)
+        assert_array_equal(results.grid('d'), [[11, 21], [12, 22], [13, 23]])
+        self.assertEqual(results.case(1), {'a': 1, 'b': 20, 'd': 21,
+                                           'e': 210})
+
+    def test_not_broadcasting(self):
+        # range() does not broadcast, so the cases are run one at a time.
+        block = Block("d = len(range(a)) + b\n")
+        sweep = ParametricSweep(block=block, context=self.context,
+                                inputs={'a': [1, 2, 3]}, chunk_size=2,
+                                vectorize=True)
+        results = sweep.run()
+
+        self.assertFalse(results.vectorized)
+        assert_array_equal(results['d'], [3, 4, 5])
+
+    def test_not_vectorized_by_default(self):
+        # A cumulative function broadcasts but mixes the cases, which no
+        # check of the results can tell, so the cases are run one at a time
+        # unless the sweep is told otherwise.
+        block = Block("from numpy import atleast_1d, minimum\n"
+                      "d = minimum.accumulate(atleast_1d(a))\n")
+        sweep = ParametricSweep(block=block, context=self.context,
+                                inputs={'a': [1, 5, 0]}, outputs=['d'])
+        results = sweep.run()
+
+        self.assertFalse(results.vectorized)
+        assert_array_equal(results['d'], [[1], [5], [0]])
+
+    def test_reduction(self):
+        # A reduction gives a single value for all the cases.
+        block = Block("d = a.sum()\n")
+        sweep = ParametricSweep(block=block, context=self.context,
+                                inputs={'a': [1, 2, 3]}, vectorize=True)
+        results = sweep.run()
+
+        self.assertFalse(results.vectorized)
+        assert_array_equal(results['d'], [1, 2, 3])
+
+    def test_workers(self):
+        block = Block("d = len(range(a)) * c\n")
+        sweep = ParametricSweep(block=block, context=self.context,
+                                inputs={'a': range(10)}, workers=2,
+                                chunk_size=3)
+        results = sweep.run()
+
+        self.assertFalse(results.vectorized)
+        assert_array_equal(results['d'], array(range(10)) * 10)
+
+    def test_no_inputs(self):
+        block = Block("d = a + b\n")
+        sweep = ParametricSweep(block=block, context=self.context)
+        self.assertRaises(ValueError, sweep.run)
+        self.assertEqual(len(SweepResults()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,256 @@
+""" Monte Carlo propagation of the distributions of inputs through a block.
+
+The samples are split into independent streams, each with its own seed drawn
+from the seed of the study, so a run can be reproduced whatever the number of
+worker processes.  A stream draws the inputs in batches, one array per input,
+executes the block restricted to these inputs once per batch when the study
+is told its functions compute each sample independently, or once per sample
+otherwise, and folds the outputs into streaming statistics.  Only a batch of realizations is held in memory at a
+time; the statistics of the streams are merged, in order, as they complete.
+"""
+
+# Standard library imports
+import logging
+import multiprocessing
+
+# Numeric library imports
+from numpy import array, full, iinfo, int32
+from numpy.random import RandomState
+
+# Enthought library imports
+from codetools.blocks.api import Block
+from traits.api import Any, Bool, Dict, HasTraits, Instance, Int, List, Str
+
+# Local imports
+from blockcanvas.numerical_modeling.workflow.study.parametric.sweep import \
+     execute_cases, execute_vectorized
+from statistics import StreamingStatistics
+
+# Logger
+logger = logging.getLogger(__name__)
+
+
+# Parameters of each kind of distribution, in the order draw_samples takes
+# them.
+PARAMETERS = {'constant': ('value',),
+              'gaussian': ('mean', 'std'),
+              'triangular': ('low', 'mode', 'high'),
+              'uniform': ('low', 'high')}
+
+
+class MonteCarloResults(HasTraits):
+    """ Statistics of the outputs of the block over all the samples of a run.
+    """
+
+    # The outputs of the block the statistics are computed for.
+    output_names = List(Str)
+
+    # Number of samples drawn.
+    samples = Int
+
+    # Seed of each stream, which reproduces its samples.
+    seeds = List(Int)
+
+    # StreamingStatistics of each output.
+    statistics = Dict
+
+    # Whether all the batches were executed at once.
+    vectorized = Bool(True)
+
+    def mean(self, name):
+        return self.statistics[name].mean
+
+    def variance(self, name):
+        return self.statistics[name].variance
+
+    def std(self, name):
+        return self.statistics[name].std
+
+    def quantile(self, name, q):
+        """ Estimate the q quantile of an output, q in [0, 1] or a sequence of
+            them.
+        """
+        return self.statistics[name].quantile(q)
+
+
+class MonteCarloStudy(HasTraits):
+    """ Execute a block for samples of the distributions of some inputs.
+    """
+
+    # The block to execute.
+    block = Instance(Block)
+
+    # The context holding the inputs of the block which are not sampled.
+    context = Any
+
+    # The distribution of each sampled input.
+    distributions = Dict(Str, Any)
+
+    # The outputs to compute statistics for.  All the outputs of the block
+    # which depend on the sampled inputs if empty.
+    outputs = List(Str)
+
+    # Number of samples to draw.
+    samples = Int(1000)
+
+    # Number of samples drawn and executed at a time.
+    batch_size = Int(10000)
+
+    # Whether to execute a batch of samples at once.  Only set it for blocks
+    # whose functions compute each sample of arrays of samples independently
+    # of the others, otherwise the results are wrong.
+    vectorize = Bool(False)
+
+    # Number of worker processes.  The streams are executed in this process
+    # if it is 0.
+    workers = Int(0)
+
+    # Number of independent streams the samples are split into.  It does not
+    # depend on the number of workers, so that a seed draws the same samples
+    # whatever their number.
+    streams = Int(16)
+
+    # Seed of the streams' seeds, None for a different run each time.
+    seed = Any
+
+    # Number of values of each output kept to estimate the quantiles.
+    reservoir_size = Int(10000)
+
+    def run(self, progress=None):
+        """ Execute the block for all the samples and return the
+            MonteCarloResults.
+
+            progress is called with the number of samples done so far after
+            each stream completes.
+        """
+        input_names = sorted(self.distributions)
+        if self.outputs:
+            sub_block = self.block.restrict(inputs=input_names,
+                                            outputs=self.outputs)
+            output_names = list(self.outputs)
+        else:
+            sub_block = self.block.restrict(inputs=input_names)
+            output_names = sorted(sub_block.outputs)
+
+        base = {}
+        for name in sub_block.inputs:
+            if name in self.context and name not in self.distributions:
+                base[name] = self.context[name]
+
+        distributions = dict((name, distribution_parameters(distribution))
+                             for name, distribution
+                             in self.distributions.iteritems())
+
+        streams = max(1, self.streams)
+        seeds = RandomState(self.seed).randint(iinfo(int32).max,
+                                               size=streams).tolist()
+        counts = [self.samples // streams + (index < self.samples % streams)
+                  for index in range(streams)]
+        tasks = [(sub_block, base, distributions, output_names, count, seed,
+                  self.batch_size, self.reservoir_size, self.vectorize)
+                 for count, seed in zip(counts, seeds) if count]
+
+        statistics = dict((name, StreamingStatistics(self.reservoir_size,
+                                                     seed=self.seed))
+                          for name in output_names)
+        vectorized = self.vectorize
+        done = 0
+
+        if self.workers > 0 and len(tasks) > 1:
+            pool = multiprocessing.Pool(self.workers)
+            results = pool.imap(_run_stream, tasks)
+        else:
+            pool = None
+            results = (_run_stream(task) for task in tasks)
+
+        try:
+            for count, stream_statistics, stream_vectorized in results:
+                for name in output_names:
+                    statistics[name].merge(stream_statistics[name])
+                vectorized = vectorized and stream_vectorized
+                done += count
+                if progress is not None:
+                    progress(done)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if not vectorized:
+            logger.debug('MonteCarloStudy: executed samples one at a time')
+
+        return MonteCarloResults(output_names=output_names,
+                                 samples=self.samples, seeds=seeds,
+                                 statistics=statistics,
+                                 vectorized=vectorized)
+
+#-------------------------------------------------------------------------
+# Public functions
+#-------------------------------------------------------------------------
+
+def distribution_parameters(distribution):
+    """ Return the kind of a distribution and the tuple of its parameters,
+        which can be sent to a worker.  Tuples are returned unchanged.
+    """
+    if isinstance(distribution, tuple):
+        return distribution
+    kind = distribution.__class__.__name__.lower()
+    if kind not in PARAMETERS:
+        raise ValueError('Unsupported distribution: %s' %
+                         distribution.__class__.__name__)
+    return kind, tuple(float(getattr(distribution, name))
+                       for name in PARAMETERS[kind])
+
+def draw_samples(kind, parameters, count, random_state):
+    """ Draw count samples of a distribution given by its kind and
+        parameters.
+    """
+    if kind == 'constant':
+        return full(count, parameters[0])
+    elif kind == 'gaussian':
+        mean, std = parameters
+        return random_state.normal(mean, std, count)
+    elif kind == 'triangular':
+        low, mode, high = parameters
+        return random_state.triangular(low, mode, high, count)
+    elif kind == 'uniform':
+        low, high = parameters
+        return random_state.uniform(low, high, count)
+    raise ValueError('Unsupported distribution: %s' % kind)
+
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
+
+def _run_stream(task):
+    """ Execute the samples of a stream, a batch at a time, and return their
+        number, the StreamingStatistics of each output, and whether all the
+        batches were executed at once.
+    """
+    (block, base, distributions, output_names, count, seed, batch_size,
+     reservoir_size, vectorized) = task
+
+    random_state = RandomState(seed)
+    statistics = dict((name, StreamingStatistics(reservoir_size, seed=seed))
+                      for name in output_names)
+    names = sorted(distributions)
+
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        stacked = dict((name, draw_samples(distributions[name][0],
+                                           distributions[name][1], size,
+                                           random_state))
+                       for name in names)
+
+        # Once a batch fails to execute at once, later ones would as well.
+        outputs = None
+        if vectorized:
+            outputs = execute_vectorized(block, base, stacked, output_names)
+            vectorized = outputs is not None
+        if outputs is None:
+            outputs = execute_cases(block, base, stacked, output_names)
+
+        for name in output_names:
+            statistics[name].update(array(outputs[name]))
+
+    return count, statistics, vectorized
@@ -0,0 +1,170 @@
+""" Summary statistics of a stream of values, updated a batch at a time.
+
+The count, mean, variance, minimum and maximum are combined exactly from the
+moments of each batch.  Quantiles are estimated from a uniform random sample
+of bounded size of all the values seen, kept up to date by reservoir
+sampling, so the memory used does not grow with the number of values.
+Statistics of separate streams can be merged, as if all their values had
+been seen by a single one.
+"""
+
+# Numeric library imports
+from numpy import arange, asarray, concatenate, empty, float64, int64, \
+     maximum, minimum, percentile, sqrt
+from numpy.random import RandomState
+
+
+class StreamingStatistics(object):
+    """ Statistics of a stream of values, scalars or arrays of the same shape,
+        computed element-wise.
+    """
+
+    def __init__(self, reservoir_size=10000, seed=None):
+        # Maximum number of values kept to estimate the quantiles.
+        self.reservoir_size = reservoir_size
+
+        # Number of values seen, and their element-wise mean, minimum and
+        # maximum.  The latter are None until a value is seen.
+        self.count = 0
+        self.mean = None
+        self.min = None
+        self.max = None
+
+        # Sum of the squared differences to the mean.
+        self._m2 = None
+
+        # Uniform sample of the values seen, filled up to _filled.
+        self._reservoir = None
+        self._filled = 0
+        self._random = RandomState(seed)
+
+    def update(self, values):
+        """ Add a batch of values, stacked along the first axis.
+        """
+        values = asarray(values, dtype=float64)
+        if len(values) == 0:
+            return
+
+        self._sample(values)
+
+        mean = values.mean(axis=0)
+        m2 = ((values - mean)**2).sum(axis=0)
+        self._combine(len(values), mean, m2, values.min(axis=0),
+                      values.max(axis=0))
+
+    def merge(self, other):
+        """ Add the values seen by other statistics.
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self._set_reservoir(other.reservoir)
+        else:
+            self._merge_reservoir(other)
+        self._combine(other.count, other.mean, other._m2, other.min,
+                      other.max)
+
+    @property
+    def variance(self):
+        """ The element-wise sample variance of the values seen.
+        """
+        if self.count < 2:
+            return self.mean * 0.0 if self.mean is not None else None
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        """ The element-wise sample standard deviation of the values seen.
+        """
+        variance = self.variance
+        if variance is None:
+            return None
+        return sqrt(variance)
+
+    @property
+    def reservoir(self):
+        """ The uniform sample of the values seen.
+        """
+        if self._reservoir is None:
+            return empty(0, dtype=float64)
+        return self._reservoir[:self._filled]
+
+    def quantile(self, q):
+        """ Estimate the element-wise q quantile of the values seen, with q in
+            [0, 1] or a sequence of them.  It is exact while no more than
+            reservoir_size values were seen.
+        """
+        return percentile(self.reservoir, asarray(q) * 100.0, axis=0)
+
+    #-------------------------------------------------------------------------
+    # Protected interface
+    #-------------------------------------------------------------------------
+
+    def _combine(self, count, mean, m2, min, max):
+        """ Combine the moments of a batch of values with the current ones.
+        """
+        if self.count == 0:
+            self.count = count
+            self.mean = mean
+            self._m2 = m2
+            self.min = min
+            self.max = max
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (float(count) / total)
+        self._m2 = self._m2 + m2 + delta**2 * (float(self.count) * count /
+                                               total)
+        self.min = minimum(self.min, min)
+        self.max = maximum(self.max, max)
+        self.count = total
+
+    def _sample(self, values):
+        """ Keep each value of a batch in the reservoir with the probability
+            it would have one at a time.
+        """
+        size = self.reservoir_size
+        if self._reservoir is None:
+            self._reservoir = empty((size,) + values.shape[1:], dtype=float64)
+
+        fill = min(size - self._filled, len(values))
+        if fill > 0:
+            self._reservoir[self._filled:self._filled+fill] = values[:fill]
+            self._filled += fill
+
+        rest = values[fill:]
+        if len(rest):
+            # The i-th value of the stream replaces a random slot with
+            # probability size/i.
+            seen = self.count + fill + arange(1, len(rest)+1)
+            slots = (self._random.random_sample(len(rest)) *
+                     seen).astype(int64)
+            keep = slots < size
+            self._reservoir[slots[keep]] = rest[keep]
+
+    def _merge_reservoir(self, other):
+        """ Merge the reservoir of other statistics, keeping values from each
+            side in proportion to the number of values seen.
+        """
+        mine, theirs = self.reservoir, other.reservoir
+        size = self.reservoir_size
+        if len(mine) + len(theirs) <= size:
+            merged = concatenate([mine, theirs])
+        else:
+            share = float(self.count) / (self.count + other.count)
+            count = self._random.binomial(size, share)
+            count = max(size - len(theirs), min(count, len(mine)))
+            merged = concatenate([
+                mine[self._random.permutation(len(mine))[:count]],
+                theirs[self._random.permutation(len(theirs))[:size-count]]])
+
+        self._set_reservoir(merged)
+
+    def _set_reservoir(self, values):
+        """ Replace the values of the reservoir.
+        """
+        self._reservoir = empty((self.reservoir_size,) + values.shape[1:],
+                                dtype=float64)
+        self._reservoir[:len(values)] = values
+        self._filled = len(values)
@@ -0,0 +1,99 @@
+""" Unit testing for the Monte Carlo study.
+"""
+
+# Standard imports
+import unittest
+
+# Numeric library imports
+from numpy.testing import assert_allclose
+
+# ETS imports
+from codetools.blocks.api import Block
+from codetools.contexts.api import DataContext
+
+# Local imports
+from blockcanvas.numerical_modeling.workflow.study.stochastic.monte_carlo \
+     import MonteCarloStudy
+
+
+class Gaussian(object):
+    """ Stand-in for a distribution, with the same parameters.
+    """
+
+    def __init__(self, mean, std):
+        self.mean = mean
+        self.std = std
+
+
+class MonteCarloStudyTestCase(unittest.TestCase):
+    """ Unit testing for MonteCarloStudy
+    """
+
+    def setUp(self):
+        self.context = DataContext()
+        self.context['a'] = 1.0
+        self.context['b'] = 2.0
+        self.context['c'] = 10.0
+
+    def test_vectorized(self):
+        block = Block("d = a + b\n"
+                      "e = d * c\n")
+        study = MonteCarloStudy(block=block, context=self.context,
+                                distributions={'a': Gaussian(5.0, 2.0),
+                                               'b': ('uniform', (0.0, 1.0))},
+                                samples=20000, batch_size=3000, seed=0,
+                                vectorize=True)
+        results = study.run()
+
+        self.assertTrue(results.vectorized)
+        self.assertEqual(results.output_names, ['d', 'e'])
+        self.assertEqual(results.statistics['e'].count, 20000)
+        assert_allclose(results.mean('d'), 5.5, atol=0.05)
+        assert_allclose(results.variance('d'), 4.0 + 1.0/12, rtol=0.05)
+        assert_allclose(results.quantile('e', 0.5), 55.0, rtol=0.01)
+
+    def test_reproducible(self):
+        block = Block("d = a * c\n")
+        means = []
+        for seed in (4, 4, 5):
+            study = MonteCarloStudy(block=block, context=self.context,
+                                    distributions={'a': Gaussian(0.0, 1.0)},
+                                    samples=1000, streams=3, seed=seed)
+            means.append(study.run().mean('d'))
+        self.assertEqual(means[0], means[1])
+        self.assertNotEqual(means[0], means[2])
+
+    def test_not_broadcasting(self):
+        # range() does not broadcast, so the samples are run one at a time.
+        block = Block("d = len(range(int(a))) + b\n")
+        study = MonteCarloStudy(block=block, context=self.context,
+                                distributions={'a': ('constant', (3.0,))},
+                                samples=50, batch_size=20, vectorize=True)
+        results = study.run()
+
+        self.assertFalse(results.vectorized)
+        self.assertEqual(results.mean('d'), 5.0)
+        self.assertEqual(results.std('d'), 0.0)
+
+    def test_workers(self):
+        # The samples, and so the statistics, only depend on the seed, not on
+        # the number of workers.
+        block = Block("d = 2 * a\n")
+        results = []
+        for workers in (0, 1, 2):
+            study = MonteCarloStudy(block=block, context=self.context,
+                                    distributions={'a': ('uniform',
+                                                         (0.0, 1.0))},
+                                    samples=4000, workers=workers, seed=1)
+            results.append(study.run())
+
+        for other in results[1:]:
+            self.assertEqual(other.seeds, results[0].seeds)
+            self.assertEqual(other.statistics['d'].count, 4000)
+            self.assertEqual(other.mean('d'), results[0].mean('d'))
+            self.assertEqual(other.variance('d'), results[0].variance('d'))
+            self.assertEqual(other.quantile('d', 0.5),
+                             results[0].quantile('d', 0.5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+""" Unit testing for the streaming statistics.
+"""
+
+# Standard imports
+import unittest
+
+# Numeric library imports
+from numpy import arange, percentile
+from numpy.random import RandomState
+from numpy.testing import assert_allclose, assert_array_equal
+
+# Local imports
+from blockcanvas.numerical_modeling.workflow.study.stochastic.statistics \
+     import StreamingStatistics
+
+
+class StreamingStatisticsTestCase(unittest.TestCase):
+    """ Unit testing for StreamingStatistics
+    """
+
+    def setUp(self):
+        self.values = RandomState(0).normal(3.0, 2.0, size=(5000, 2))
+
+    def test_batches(self):
+        statistics = StreamingStatistics()
+        for start in range(0, len(self.values), 700):
+            statistics.update(self.values[start:start+700])
+
+        self.assertEqual(statistics.count, 5000)
+        assert_allclose(statistics.mean, self.values.mean(axis=0))
+        assert_allclose(statistics.variance,
+                        self.values.var(axis=0, ddof=1))
+        assert_array_equal(statistics.min, self.values.min(axis=0))
+        assert_array_equal(statistics.max, self.values.max(axis=0))
+
+        # Every value fits in the reservoir, so the quantiles are exact.
+        assert_allclose(statistics.quantile([0.1, 0.5]),
+                        percentile(self.values, [10, 50], axis=0))
+
+    def test_merge(self):
+        first = StreamingStatistics(seed=1)
+        first.update(self.values[:2000])
+        second = StreamingStatistics(seed=2)
+        second.update(self.values[2000:])
+        first.merge(second)
+
+        self.assertEqual(first.count, 5000)
+        assert_allclose(first.mean, self.values.mean(axis=0))
+        assert_allclose(first.std, self.values.std(axis=0, ddof=1))
+
+    def test_reservoir(self):
+        statistics = StreamingStatistics(reservoir_size=1000, seed=0)
+        values = arange(100000.0)
+        for start in range(0, len(values), 10000):
+            statistics.update(values[start:start+10000])
+
+        reservoir = statistics.reservoir
+        self.assertEqual(len(reservoir), 1000)
+        self.assertEqual(len(set(reservoir)), 1000)
+
+        # The sample is spread over the whole stream.
+        assert_allclose(statistics.quantile(0.5), 50000.0, rtol=0.1)
+        assert_allclose(statistics.quantile(0.9), 90000.0, rtol=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
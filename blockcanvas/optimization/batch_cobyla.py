@@ -0,0 +1,149 @@
+""" Minimization of many independent problems of the same shape with COBYLA.
+
+The problems are minimized in lockstep: each one runs COBYLA in its own
+greenlet, which switches back to the driver whenever it needs its objective
+evaluated. Once every active problem waits for an evaluation, the driver
+evaluates all of them with a single vectorized call and resumes them. The
+problems which converged are retired from the active mask, so evaluations get
+cheaper as the minimization proceeds.
+"""
+
+# Numeric library imports
+from numpy import array, asarray, flatnonzero, ndarray, newaxis, ones, zeros
+
+# Enthought library imports
+from traits.api import (Any, Array, Bool, Callable, Float, HasTraits, Int,
+                        List)
+
+# Local imports
+from blockcanvas.cobyla2c.cobyla import minimize
+from blockcanvas.greenlet import greenlet
+
+
+class BatchCOBYLA(HasTraits):
+    """ Minimize independent problems at once, one per row of an array of
+        starting points.
+    """
+
+    # Evaluates the problems at some points.  It is called with the (n,
+    # variables) array of the points and the indices of the problems they
+    # belong to, and returns the n objective values and the (n, constraints)
+    # array of the constraint values, which COBYLA keeps positive, or None
+    # if there are no constraints.
+    evaluate = Callable
+
+    # Lower and upper bounds of the variables, the same for all the problems.
+    low = List(Float)
+    up = List(Float)
+
+    # Initial and final changes to the variables.
+    rhobeg = Float(0.5)
+    rhoend = Float(1.0e-6)
+
+    # Maximum number of evaluations of each problem, COBYLA's default if 0.
+    maxfun = Int(0)
+
+    # Solutions of the problems, one per row.
+    x = Array
+
+    # COBYLA's return code and number of evaluations for each problem.
+    rc = Array
+    nfeval = Array
+
+    # Mask of the problems still being minimized.
+    active = Array
+
+    # Number of calls to evaluate by the last minimization.
+    evaluations = Int(0)
+
+    # Set to stop the minimization before the next evaluation.  The problems
+    # keep the best point COBYLA found so far.
+    cancelled = Bool(False)
+
+    # The greenlet of the driver, which the problems switch back to.
+    _driver = Any
+
+    def minimize(self, x0):
+        """ Minimize the problems starting from the rows of x0, and return the
+            array of their solutions.
+        """
+        x0 = array(x0, dtype=float)
+        if x0.ndim == 1:
+            x0 = x0[:, newaxis]
+        count = len(x0)
+
+        self.x = x0
+        self.rc = zeros(count, dtype=int)
+        self.nfeval = zeros(count, dtype=int)
+        self.active = ones(count, dtype=bool)
+        self.evaluations = 0
+        self.cancelled = False
+
+        # Start every problem up to its first request for an evaluation.
+        self._driver = greenlet.getcurrent()
+        greenlets = [greenlet(self._minimize_at_index) for i in range(count)]
+        for index, problem in enumerate(greenlets):
+            problem.switch(index)
+            if problem.dead:
+                self.active[index] = False
+
+        while self.active.any():
+            indices = flatnonzero(self.active)
+            if self.cancelled:
+                # COBYLA aborts when the objective evaluates to None.
+                for index in indices:
+                    greenlets[index].switch(None)
+                self.active[indices] = False
+                break
+
+            objective, constraints = self.evaluate(self.x[indices], indices)
+            objective = asarray(objective, dtype=float).reshape(len(indices))
+            if constraints is None:
+                constraints = zeros((len(indices), 0))
+            else:
+                constraints = asarray(constraints,
+                                      dtype=float).reshape(len(indices), -1)
+            self.evaluations += 1
+
+            for position, index in enumerate(indices):
+                problem = greenlets[index]
+                problem.switch((objective[position],
+                                constraints[position].tolist()))
+                if problem.dead:
+                    # Retire the problem, which wrote its solution.
+                    self.active[index] = False
+                    greenlets[index] = None
+
+        return self.x
+
+    def _minimize_at_index(self, index):
+        """ Run COBYLA on a problem, in its own greenlet.
+        """
+        def function(x):
+            self.x[index] = x
+            return self._driver.switch()
+
+        rc, nfeval, x = minimize(function, self.x[index].tolist(),
+                                 low=self.low or None,
+                                 up=self.up or None,
+                                 rhobeg=self.rhobeg,
+                                 rhoend=self.rhoend,
+                                 maxfun=self.maxfun or None)
+        self.x[index] = x
+        self.rc[index] = rc
+        self.nfeval[index] = nfeval
+
+
+def take_indices(context, names, indices, length):
+    """ Return a dict of the values of names in context, taking the indices
+        from the arrays which have length values, one per index.
+    """
+    values = {}
+    for name in names:
+        if name in context:
+            value = context[name]
+            if (isinstance(value, ndarray) and value.ndim > 0 and
+                len(value) == length):
+                value = value[indices]
+            values[name] = value
+    return values
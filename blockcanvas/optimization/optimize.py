@@ -1,15 +1,16 @@
-from numpy import zeros, arange
+from numpy import arange, asarray, column_stack
 
 # Enthought library imports
 from traits.api import HasTraits, Instance, Str, Int, Float, List
 from traitsui.api import View, Item, TableEditor
+from pyface.api import ProgressDialog
 from codetools.blocks.api import Block
 from codetools.contexts.parametric_context import ShadowContext
 from codetools.contexts.parametric_context import ParametricContext
 
 from codetools.contexts.data_context import DataContext
-from blockcanvas.cobyla2c.cobyla import minimize
-from blockcanvas.greenlet import greenlet
+from blockcanvas.optimization.batch_cobyla import BatchCOBYLA, take_indices
+from blockcanvas.optimization.sharded import minimize_sharded, shard_ranges
 from blockcanvas.plot.configurable_context_plot import ConfigurableContextPlot
 from blockcanvas.interactor.interactor_config import PlotConfig
 from blockcanvas.plot.context_plot import ContextPlotEditor
@@ -41,6 +42,10 @@ class Optimizer(HasTraits):
     input_vars = List(InputOptimizationVariable)
     _working_context = Instance(DataContext)
 
+    # Number of worker processes the indices are shared between.  They are
+    # all optimized in this process if it is 0.
+    processes = Int(0)
+
     inputs_table_editor = TableEditor(columns=[ObjectColumn(name='name'),
                                                ObjectColumn(name='min'),
                                                ObjectColumn(name='max')],
@@ -67,19 +72,24 @@ class Optimizer(HasTraits):
         sub_block = self.block.restrict(inputs=input_var_names,
                                         outputs=[self.objective_var, self.constraint_var])
         input_len = len(self._working_context[input_var_names[0]])
-        cobyla_instances = [COBYLAInstance(index=i, optimizer=self) for \
-                            i in range(input_len)]
-        greenlet_list = [greenlet(cobyla_instance.minimize_at_index) for \
-                         cobyla_instance in cobyla_instances]
-        self.cobyla_status_arr = zeros(input_len, dtype=bool)
-        active_greenlets = input_len
-        while active_greenlets > 0:
-            active_greenlets = 0
-            for greenlet_inst in greenlet_list:
-                if not greenlet_inst.dead:
-                    active_greenlets += 1
-                    greenlet_inst.switch()
-            sub_block.execute(self._working_context)
+
+        # Minimize all the indices at once, evaluating the block on the
+        # indices which did not converge yet.
+        def evaluate(x, indices):
+            return self._evaluate(sub_block, input_var_names, x, indices)
+
+        low = [var_obj.min for var_obj in self.input_vars]
+        up = [var_obj.max for var_obj in self.input_vars]
+        if self.processes > 1:
+            x = self._minimize_sharded(sub_block, input_var_names, low, up)
+        else:
+            batch = BatchCOBYLA(evaluate=evaluate, low=low, up=up)
+            x0 = column_stack([self._working_context[var_name]
+                               for var_name in input_var_names])
+            x = batch.minimize(x0)
+        for var_index, var_name in enumerate(input_var_names):
+            self._working_context[var_name][:] = x[:, var_index]
+        sub_block.execute(self._working_context)
 
         self.context['plot_index'] = arange(input_len)
         input_plots = [PlotConfig(number=plot_num, x = 'plot_index', y=var_name, type='Line') for \
@@ -102,36 +112,56 @@ class Optimizer(HasTraits):
 
         return
 
+    def _minimize_sharded(self, sub_block, input_var_names, low, up):
+        """ Minimize shards of the indices in worker processes, showing the
+            progress of all the workers in a progress dialog.
+        """
+        progress_dialog = ProgressDialog(title='Optimizing',
+                                         message='Optimizing',
+                                         max=100, show_time=True,
+                                         can_cancel=True)
+        progress_dialog.open()
+
+        # Number of indices still being optimized by each worker.
+        input_len = len(self._working_context[input_var_names[0]])
+        active = [stop - start
+                  for start, stop in shard_ranges(input_len, self.processes)]
+
+        def progress(shard, evaluations, active_count):
+            active[shard] = active_count
+            cont_val, skip_val = progress_dialog.update(
+                100 - int(100.0*sum(active)/input_len))
+            return cont_val and not skip_val
+
+        x = minimize_sharded(sub_block, self._working_context,
+                             input_var_names, self.objective_var,
+                             self.constraint_var, low, up, self.processes,
+                             progress=progress)
+        progress_dialog.update(100)
+        return x
+
+    def _evaluate(self, sub_block, input_var_names, x, indices):
+        """ Evaluate the objective and constraint of some indices with the
+            input variables set to the rows of x.
+        """
+        context = self._working_context
+        input_len = len(context[input_var_names[0]])
+
+        if len(indices) == input_len:
+            sub_context = context
+            for var_index, var_name in enumerate(input_var_names):
+                context[var_name][:] = x[:, var_index]
+        else:
+            # Only evaluate the block on the active indices, taking them
+            # from the arrays of the inputs which have one value per index.
+            sub_context = DataContext(subcontext=take_indices(
+                context, sub_block.inputs, indices, input_len))
+            for var_index, var_name in enumerate(input_var_names):
+                sub_context[var_name] = x[:, var_index]
+                context[var_name][indices] = x[:, var_index]
+
+        sub_block.execute(sub_context)
+        return (asarray(sub_context[self.objective_var]),
+                asarray(sub_context[self.constraint_var]))
 
 
-class COBYLAInstance(HasTraits):
-    # The index in the array to be optimized that this instance refers to
-    index = Int()
-    # A back reference to the overall optimizer
-    optimizer = Instance(Optimizer)
-
-    def minimize_at_index(self):
-        context = self.optimizer._working_context
-        input_vars = [var_obj.name for var_obj in self.optimizer.input_vars]
-        input_upper_bounds = [var_obj.max for var_obj in self.optimizer.input_vars]
-        input_lower_bounds = [var_obj.min for var_obj in self.optimizer.input_vars]
-
-        result = minimize(self.objective_func,
-                          [context[input_var][self.index] for input_var in input_vars],
-                          low = input_lower_bounds,
-                          up = input_upper_bounds,
-                          )
-        for var_index, var_name in enumerate(input_vars):
-            context[var_name][self.index] = result[2][var_index]
-
-
-
-    def objective_func(self, x):
-        optimizer = self.optimizer
-        context = optimizer._working_context
-        index = self.index
-        for var_index in range(len(optimizer.input_vars)):
-            context[optimizer.input_vars[var_index].name][index] = x[var_index]
-        greenlet.getcurrent().parent.switch()
-        return (context[optimizer.objective_var][index],
-                [context[optimizer.constraint_var][index]])
@@ -0,0 +1,134 @@
+""" Optimization of independent indices across a pool of worker processes.
+
+The index range is split in contiguous shards, each one minimized by a
+BatchCOBYLA in a worker process, with its own copy of the restricted block
+and the slice of the context it reads.  The workers report their progress
+through a queue after every evaluation, and all stop once a shared event is
+set.
+"""
+
+# Standard library imports
+import multiprocessing
+from Queue import Empty
+
+# Numeric library imports
+from numpy import column_stack, concatenate
+
+# Local imports
+from blockcanvas.optimization.batch_cobyla import BatchCOBYLA, take_indices
+
+
+def shard_ranges(count, shards):
+    """ Split range(count) in at most shards contiguous (start, stop) ranges
+        of nearly equal sizes.
+    """
+    shards = max(1, min(shards, count))
+    size, extra = divmod(count, shards)
+    ranges = []
+    start = 0
+    for shard in range(shards):
+        stop = start + size + (shard < extra)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def minimize_sharded(block, context, input_var_names, objective_var,
+                     constraint_var, low, up, processes, shards=None,
+                     progress=None):
+    """ Minimize the objective of block independently at each index of the
+        input variables, across a pool of processes.
+
+        Parameters
+        ----------
+        block : Block
+            The block restricted to compute the objective and constraint from
+            the input variables.
+        context : dict-like
+            The context holding the inputs of the block.  The arrays with one
+            value per index are sliced for each shard.
+        input_var_names : list of str
+            The variables to optimize, arrays with one value per index.
+        objective_var, constraint_var : str
+            The names of the objective and constraint computed by block.
+        low, up : list of float
+            The bounds of the input variables.
+        processes : int
+            The number of worker processes.
+        shards : int
+            The number of shards the indices are split in, processes by
+            default.
+        progress : callable
+            Called as progress(shard, evaluations, active) whenever a worker
+            evaluated its shard, with the number of indices of the shard still
+            being minimized.  The minimization is cancelled if it returns
+            False.
+
+        Returns
+        -------
+        x : array
+            The solutions, one row per index and one column per variable.
+            The indices keep the best point found so far if the
+            minimization was cancelled.
+    """
+    input_len = len(context[input_var_names[0]])
+    if shards is None:
+        shards = processes
+    ranges = shard_ranges(input_len, shards)
+
+    manager = multiprocessing.Manager()
+    queue = manager.Queue()
+    cancel = manager.Event()
+
+    tasks = []
+    for shard, (start, stop) in enumerate(ranges):
+        values = take_indices(context, block.inputs, slice(start, stop),
+                              input_len)
+        tasks.append((shard, block, values, input_var_names, objective_var,
+                      constraint_var, low, up, queue, cancel))
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        result = pool.map_async(_minimize_shard, tasks, chunksize=1)
+        while not result.ready():
+            try:
+                report = queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if progress is not None and progress(*report) is False:
+                cancel.set()
+        shard_solutions = result.get()
+    finally:
+        pool.close()
+        pool.join()
+        manager.shutdown()
+
+    return concatenate(shard_solutions)
+
+#-------------------------------------------------------------------------
+# Helping functions
+#-------------------------------------------------------------------------
+
+def _minimize_shard(task):
+    """ Minimize the indices of a shard in a worker process, and return their
+        solutions.
+    """
+    (shard, block, values, input_var_names, objective_var, constraint_var,
+     low, up, queue, cancel) = task
+    shard_len = len(values[input_var_names[0]])
+
+    def evaluate(x, indices):
+        sub_context = take_indices(values, block.inputs, indices, shard_len)
+        for var_index, var_name in enumerate(input_var_names):
+            sub_context[var_name] = x[:, var_index]
+        block.execute(sub_context)
+
+        queue.put((shard, batch.evaluations + 1, len(indices)))
+        if cancel.is_set():
+            batch.cancelled = True
+
+        return sub_context[objective_var], sub_context[constraint_var]
+
+    batch = BatchCOBYLA(evaluate=evaluate, low=low, up=up)
+    return batch.minimize(column_stack([values[var_name]
+                                        for var_name in input_var_names]))
@@ -0,0 +1,138 @@
+""" Tests for the batch COBYLA driver, against COBYLA run on each problem.
+"""
+
+# Standard library imports
+import unittest
+
+# Numeric library imports
+from numpy import arange, array, column_stack, zeros
+from numpy.testing import assert_array_equal
+
+# Local imports
+from blockcanvas.cobyla2c.cobyla import USERABORT, minimize
+from blockcanvas.optimization.batch_cobyla import BatchCOBYLA, take_indices
+
+
+class BatchCOBYLATestCase(unittest.TestCase):
+
+    def assert_same_as_cobyla(self, batch, x0, function):
+        """ Check that batch found the solutions of COBYLA run on each row of
+            x0, with function(x, index) computing the objective and
+            constraints of a problem.
+        """
+        for index, start in enumerate(x0):
+            rc, nfeval, x = minimize(lambda x: function(array(x), index),
+                                     list(start), low=batch.low or None,
+                                     up=batch.up or None, rhobeg=batch.rhobeg,
+                                     rhoend=batch.rhoend,
+                                     maxfun=batch.maxfun or None)
+            assert_array_equal(batch.x[index], x)
+            self.assertEqual(batch.rc[index], rc)
+            self.assertEqual(batch.nfeval[index], nfeval)
+
+    def test_bounds(self):
+        # The minimum of the problem i is at i, which is out of the bounds
+        # for the last problems.
+        targets = arange(-2.0, 4.0)
+        def evaluate(x, indices):
+            return (x[:, 0] - targets[indices])**2, None
+
+        batch = BatchCOBYLA(evaluate=evaluate, low=[-1.0], up=[1.5])
+        x0 = zeros((len(targets), 1))
+        x = batch.minimize(x0)
+        self.assertEqual(x.shape, (len(targets), 1))
+        self.assertFalse(batch.active.any())
+        self.assert_same_as_cobyla(batch, x0,
+            lambda x, index: (x[0] - targets[index])**2)
+
+    def test_constraints(self):
+        # Minimize the distance to a target point on the half plane
+        # x + y <= 1, within the bounds.
+        targets = array([[0.0, 0.0], [1.0, 1.0], [2.0, -3.0], [-1.0, 3.0]])
+        def function(x, targets):
+            objective = ((x - targets)**2).sum(axis=-1)
+            return objective, (1.0 - x.sum(axis=-1))[..., None]
+
+        batch = BatchCOBYLA(evaluate=lambda x, indices:
+                                function(x, targets[indices]),
+                            low=[-2.0, -2.0], up=[2.0, 2.0], maxfun=500)
+        x0 = column_stack([arange(4.0), -arange(4.0)])
+        batch.minimize(x0)
+        self.assert_same_as_cobyla(batch, x0, lambda x, index:
+            (function(x, targets[index])[0],
+             function(x, targets[index])[1].tolist()))
+
+    def test_evaluations(self):
+        # The problems which converged are not evaluated any more.
+        counts = zeros(3, dtype=int)
+        sizes = []
+        def evaluate(x, indices):
+            counts[indices] += 1
+            sizes.append(len(indices))
+            return (x[:, 0] - 10.0**indices)**2, None
+
+        batch = BatchCOBYLA(evaluate=evaluate, rhobeg=1.0)
+        batch.minimize([0.0, 0.0, 0.0])
+        self.assertEqual(batch.evaluations, len(sizes))
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        self.assertTrue(sizes[-1] < 3)
+
+        # COBYLA evaluates a problem once more to count its constraints.
+        assert_array_equal(counts, batch.nfeval + 1)
+
+    def test_cancel(self):
+        def evaluate(x, indices):
+            if batch.evaluations == 2:
+                batch.cancelled = True
+            return (x[:, 0] - indices)**2, None
+
+        batch = BatchCOBYLA(evaluate=evaluate)
+        x0 = zeros((3, 1))
+        x = batch.minimize(x0)
+        self.assertEqual(batch.evaluations, 3)
+        self.assertFalse(batch.active.any())
+        assert_array_equal(batch.rc, USERABORT)
+
+        # Each problem aborted on its fourth evaluation.
+        def function(x, index):
+            calls.append(x)
+            if len(calls) == 4:
+                return None
+            return (x[0] - index)**2
+        for index in range(3):
+            calls = []
+            rc, nfeval, solution = minimize(lambda x: function(x, index),
+                                            [0.0])
+            self.assertEqual(rc, USERABORT)
+            assert_array_equal(x[index], solution)
+
+    def test_empty(self):
+        batch = BatchCOBYLA(evaluate=lambda x, indices: (x[:, 0], None))
+        x = batch.minimize(zeros((0, 2)))
+        self.assertEqual(x.shape, (0, 2))
+        self.assertEqual(batch.evaluations, 0)
+
+
+class TakeIndicesTestCase(unittest.TestCase):
+
+    def test_take_indices(self):
+        context = {'a': arange(4.0), 'b': arange(3.0), 'c': 2.0,
+                   'd': array(5.0), 'e': arange(8.0).reshape(4, 2)}
+        values = take_indices(context, ['a', 'b', 'c', 'd', 'e', 'f'],
+                              [1, 3], 4)
+        self.assertEqual(sorted(values), ['a', 'b', 'c', 'd', 'e'])
+        assert_array_equal(values['a'], [1.0, 3.0])
+        assert_array_equal(values['e'], [[2.0, 3.0], [6.0, 7.0]])
+
+        # The values which are not one per index are left as they are.
+        self.assertTrue(values['b'] is context['b'])
+        self.assertEqual(values['c'], 2.0)
+        self.assertTrue(values['d'] is context['d'])
+
+    def test_slice(self):
+        values = take_indices({'a': arange(4.0)}, ['a'], slice(1, 3), 4)
+        assert_array_equal(values['a'], [1.0, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+""" Tests for the Optimizer, against COBYLA run on each index.
+"""
+
+# Standard library imports
+import unittest
+
+# Numeric library imports
+from numpy import arange, array, column_stack, zeros
+from numpy.testing import assert_array_almost_equal
+
+# ETS imports
+from codetools.blocks.api import Block
+from codetools.contexts.api import DataContext
+from codetools.contexts.parametric_context import ParametricContext
+
+# Local imports
+from blockcanvas.cobyla2c.cobyla import minimize
+from blockcanvas.optimization import optimize
+from blockcanvas.optimization.optimize import (InputOptimizationVariable,
+                                               Optimizer)
+
+
+class QuietOptimizer(Optimizer):
+    """ An Optimizer which does not show its results.
+    """
+
+    def edit_traits(self, **traits):
+        pass
+
+
+class QuietProgressDialog(object):
+    """ Stands for the progress dialog of the sharded optimization, which
+        needs a GUI.
+    """
+
+    updates = []
+
+    def __init__(self, **traits):
+        pass
+
+    def open(self):
+        pass
+
+    def update(self, value):
+        self.updates.append(value)
+        return True, False
+
+
+class OptimizerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # The minimum of the index i is at target[i], under the constraint
+        # x <= 1.
+        code = "objective = (x - target)**2 + offset\n" \
+               "constraint = 1.0 - x\n"
+        self.block = Block(code)
+        self.targets = array([-1.0, 0.5, 2.0, 3.0, 0.0])
+
+        self.context = ParametricContext(DataContext(), {})
+        self.context['x'] = zeros(len(self.targets))
+        self.context['target'] = self.targets
+        self.context['offset'] = 2.0
+
+        self.optimizer = QuietOptimizer(
+            context=self.context, block=self.block,
+            objective_var='objective', constraint_var='constraint',
+            input_vars=[InputOptimizationVariable(name='x', min=-0.5,
+                                                  max=5.0)])
+
+    def expected(self):
+        """ Return the solutions of COBYLA run on each index.
+        """
+        solutions = []
+        for target in self.targets:
+            rc, nfeval, x = minimize(lambda x: ((x[0] - target)**2 + 2.0,
+                                                [1.0 - x[0]]),
+                                     [0.0], low=[-0.5], up=[5.0])
+            solutions.append(x[0])
+        return solutions
+
+    def test_optimize(self):
+        self.optimizer.optimize()
+        context = self.optimizer._working_context
+        assert_array_almost_equal(context['x'], self.expected())
+        assert_array_almost_equal(context['objective'],
+                                  (context['x'] - self.targets)**2 + 2.0)
+        assert_array_almost_equal(self.context['plot_index'],
+                                  arange(len(self.targets)))
+
+    def test_optimize_sharded(self):
+        progress_dialog = optimize.ProgressDialog
+        optimize.ProgressDialog = QuietProgressDialog
+        QuietProgressDialog.updates = []
+        try:
+            self.optimizer.processes = 2
+            self.optimizer.optimize()
+        finally:
+            optimize.ProgressDialog = progress_dialog
+
+        context = self.optimizer._working_context
+        assert_array_almost_equal(context['x'], self.expected())
+        assert_array_almost_equal(context['objective'],
+                                  (context['x'] - self.targets)**2 + 2.0)
+
+        # The progress goes up to 100% as the indices converge.
+        updates = QuietProgressDialog.updates
+        self.assertEqual(updates, sorted(updates))
+        self.assertEqual(updates[-1], 100)
+
+    def test_evaluate(self):
+        # Only the given indices are evaluated, and the points they are
+        # evaluated at written to the working context.
+        sub_block = self.block.restrict(inputs=['x'],
+                                        outputs=['objective', 'constraint'])
+        self.optimizer._working_context = DataContext(
+            subcontext={'x': zeros(len(self.targets)),
+                        'target': self.targets, 'offset': 2.0})
+        x = array([[1.0], [4.0]])
+        objective, constraint = self.optimizer._evaluate(sub_block, ['x'], x,
+                                                         array([1, 3]))
+        assert_array_almost_equal(objective, [2.25, 3.0])
+        assert_array_almost_equal(constraint, [0.0, -3.0])
+        assert_array_almost_equal(self.optimizer._working_context['x'],
+                                  [0.0, 1.0, 0.0, 4.0, 0.0])
+
+    def test_evaluate_all(self):
+        sub_block = self.block.restrict(inputs=['x'],
+                                        outputs=['objective', 'constraint'])
+        self.optimizer._working_context = DataContext(
+            subcontext={'x': zeros(len(self.targets)),
+                        'target': self.targets, 'offset': 2.0})
+        x = column_stack([arange(5.0)])
+        objective, constraint = self.optimizer._evaluate(sub_block, ['x'], x,
+                                                         arange(5))
+        assert_array_almost_equal(objective, (arange(5.0) - self.targets)**2
+                                             + 2.0)
+        assert_array_almost_equal(constraint, 1.0 - arange(5.0))
+        assert_array_almost_equal(self.optimizer._working_context['x'],
+                                  arange(5.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
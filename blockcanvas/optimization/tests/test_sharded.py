@@ -0,0 +1,122 @@
+""" Tests for the optimization of shards of the indices in worker processes.
+"""
+
+# Standard library imports
+import threading, unittest
+from Queue import Queue
+
+# Numeric library imports
+from numpy import array, zeros
+from numpy.testing import assert_array_equal
+
+# ETS imports
+from codetools.blocks.api import Block
+from codetools.contexts.api import DataContext
+
+# Local imports
+from blockcanvas.optimization.batch_cobyla import BatchCOBYLA, take_indices
+from blockcanvas.optimization.sharded import (minimize_sharded,
+                                              shard_ranges, _minimize_shard)
+
+
+class ShardRangesTestCase(unittest.TestCase):
+
+    def assert_ranges(self, count, shards, expected):
+        ranges = shard_ranges(count, shards)
+        self.assertEqual(ranges, expected)
+        self.assertEqual(sum([range(start, stop) for start, stop in ranges],
+                             []), range(count))
+
+    def test_even(self):
+        self.assert_ranges(6, 3, [(0, 2), (2, 4), (4, 6)])
+
+    def test_uneven(self):
+        # The first shards take the extra indices.
+        self.assert_ranges(10, 4, [(0, 3), (3, 6), (6, 8), (8, 10)])
+        self.assert_ranges(7, 2, [(0, 4), (4, 7)])
+
+    def test_fewer_indices_than_shards(self):
+        self.assert_ranges(2, 4, [(0, 1), (1, 2)])
+
+    def test_no_indices(self):
+        self.assert_ranges(0, 3, [(0, 0)])
+
+    def test_no_shards(self):
+        self.assert_ranges(5, 0, [(0, 5)])
+
+
+class MinimizeShardedTestCase(unittest.TestCase):
+
+    def setUp(self):
+        code = "objective = (x - target)**2 + offset\n" \
+               "constraint = 1.0 - x\n"
+        self.block = Block(code).restrict(inputs=['x'],
+                                          outputs=['objective', 'constraint'])
+        self.context = DataContext()
+        self.context['x'] = zeros(7)
+        self.context['target'] = array([-1.0, 0.5, 2.0, 3.0, 0.0, 0.9, -4.0])
+        self.context['offset'] = 2.0
+
+    def minimize(self):
+        """ Return the solutions of a BatchCOBYLA on all the indices.
+        """
+        def evaluate(x, indices):
+            sub_context = DataContext(subcontext=take_indices(
+                self.context, self.block.inputs, indices, 7))
+            sub_context['x'] = x[:, 0]
+            self.block.execute(sub_context)
+            return sub_context['objective'], sub_context['constraint']
+
+        batch = BatchCOBYLA(evaluate=evaluate, low=[-0.5], up=[5.0])
+        return batch.minimize(self.context['x'])
+
+    def test_same_as_unsharded(self):
+        expected = self.minimize()
+        for shards in (None, 3, 10):
+            x = minimize_sharded(self.block, self.context, ['x'],
+                                 'objective', 'constraint', [-0.5], [5.0],
+                                 processes=1, shards=shards)
+            assert_array_equal(x, expected)
+
+    def test_progress(self):
+        reports = []
+        def progress(shard, evaluations, active):
+            reports.append((shard, evaluations, active))
+
+        minimize_sharded(self.block, self.context, ['x'], 'objective',
+                         'constraint', [-0.5], [5.0], processes=1, shards=2,
+                         progress=progress)
+
+        # Each shard reports after every evaluation of its active indices.
+        for shard, size in enumerate([4, 3]):
+            shard_reports = [report[1:] for report in reports
+                             if report[0] == shard]
+            self.assertEqual([evaluations for evaluations, active
+                              in shard_reports],
+                             range(1, len(shard_reports) + 1))
+            self.assertEqual(shard_reports[0][1], size)
+
+    def test_no_indices(self):
+        self.context['x'] = zeros(0)
+        self.context['target'] = zeros(0)
+        x = minimize_sharded(self.block, self.context, ['x'], 'objective',
+                             'constraint', [-0.5], [5.0], processes=1)
+        self.assertEqual(x.shape, (0, 1))
+
+    def test_cancel(self):
+        # A worker stops its shard after the evaluation during which the
+        # cancel event is set.
+        queue = Queue()
+        cancel = threading.Event()
+        cancel.set()
+        values = take_indices(self.context, self.block.inputs, slice(2, 5),
+                              7)
+        x = _minimize_shard((1, self.block, values, ['x'], 'objective',
+                             'constraint', [-0.5], [5.0], queue, cancel))
+        assert_array_equal(x, zeros((3, 1)))
+        self.assertEqual(queue.get_nowait(), (1, 1, 3))
+        self.assertTrue(queue.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+""" Timing the RowLayoutEngine on large random dependency graphs.
+
+    The graphs are made from the code of debug.random_code_generator: each
+    line depends on the last previous lines writing its inputs.
+"""
+
+def dependency_graph(code):
+    """ Returns the dependency graph of the lines of random code, as used by
+        the layout engine.
+    """
+    graph = {}
+    writers = {}
+    for number, line in enumerate(code.splitlines()):
+        outputs, call = line.split(' = ')
+        inputs = call[call.index('(') + 1:-1].split(', ')
+        graph[number] = [writers[name] for name in set(inputs)
+                         if name in writers]
+        for name in outputs.split(', '):
+            writers[name] = number
+    return graph
+
+def main(sizes=(1000, 2000, 5000)):
+    """ Time the layout, and the layout again after a small edit, of random
+        graphs of the given sizes.
+    """
+    import random
+    import time
+
+    from blockcanvas.debug.random_code_generator import random_code_generator
+    from blockcanvas.block_display.row_layout_engine import RowLayoutEngine
+
+    random.seed(1000)
+    for size in sizes:
+        graph = dependency_graph(random_code_generator(size))
+        edges = sum([len(parents) for parents in graph.values()])
+        engine = RowLayoutEngine()
+
+        start = time.time()
+        rows = engine.organize_rows(graph)
+        layout_time = time.time() - start
+
+        # Add a node depending on a few others and lay the graph out again.
+        graph[size] = random.sample(range(size), 3)
+        start = time.time()
+        new_rows = engine.organize_rows(graph)
+        relayout_time = time.time() - start
+
+        # The rows whose nodes were reordered, not counting the new node.
+        reordered = 0
+        for row, new_row in zip(rows, new_rows):
+            if [node for node in new_row if node != size] != row:
+                reordered += 1
+
+        print '%d nodes, %d edges, %d rows:' % (size, edges, len(rows))
+        print '    layout %.3fs, layout after an edit %.3fs (%d rows ' \
+              'reordered)' % (layout_time, relayout_time, reordered)
+
+if __name__ == '__main__':
+    main()